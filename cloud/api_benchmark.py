@@ -0,0 +1,302 @@
+#!/usr/bin/env python
+
+"""
+AWS API Call Benchmark (moto)
+
+Runs the cloud scripts against a moto-mocked fleet and reports how many AWS
+API calls, retries, throttles and seconds each one takes, using the hooks in
+aws_call_stats. Nothing is sent to AWS.
+
+Scenarios:
+- aws_monitor2:              spend, EC2 and SageMaker report for every account
+- ec2_status_report:         EC2 scan across the account/region map
+- lambda_updater_multi:      Lambda runtime updater (force mode, no AI review)
+- lambda_runtime_updater:    simple Lambda runtime updater (all selected)
+- sagemaker_notebook_updater: notebook platform migration (force mode; moto
+                              does not implement UpdateNotebookInstance, so
+                              those calls show up as errors)
+- aws_cleanup_multiaccount2: cleanup of every account (force, S3 included)
+
+The fleet is created in every account and region before the scenarios run:
+EC2 instances, Lambda functions, notebook instances and S3 buckets. The
+first account is the caller's; the others are reached with assume_role.
+
+Requirements:
+    pip install "moto[all]"
+
+Usage:
+    python api_benchmark.py
+    python api_benchmark.py --accounts 3 --regions us-east-1 us-west-2 --instances 50 --functions 20
+    python api_benchmark.py --scenarios aws_monitor2 ec2_status_report --verbose
+    python api_benchmark.py --json results.json
+"""
+
+import argparse
+import asyncio
+import contextlib
+import importlib.util
+import io
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+
+# Fake credentials so nothing can reach a real account
+os.environ.update({
+    'AWS_ACCESS_KEY_ID': 'testing',
+    'AWS_SECRET_ACCESS_KEY': 'testing',
+    'AWS_SECURITY_TOKEN': 'testing',
+    'AWS_SESSION_TOKEN': 'testing',
+})
+
+import boto3
+
+import aws_call_stats
+
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+MAIN_ACCOUNT_ID = '123456789012'  # moto's default account
+AMI_ID = 'ami-12c6146b'  # Available in every moto region
+LAMBDA_ROLE_NAME = 'benchmark-lambda-role'
+ORG_ROLE = 'OrganizationAccountAccessRole'
+
+SCENARIOS = [
+    'aws_monitor2',
+    'ec2_status_report',
+    'lambda_updater_multi',
+    'lambda_runtime_updater',
+    'sagemaker_notebook_updater',
+    'aws_cleanup_multiaccount2',
+]
+
+
+def load_module(name, path):
+    """Import a script by path (some have hyphens in their names)."""
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def get_session(account_id):
+    if account_id == MAIN_ACCOUNT_ID:
+        return boto3.Session()
+    credentials = boto3.client('sts').assume_role(
+        RoleArn=f'arn:aws:iam::{account_id}:role/{ORG_ROLE}',
+        RoleSessionName='benchmark-setup'
+    )['Credentials']
+    return boto3.Session(
+        aws_access_key_id=credentials['AccessKeyId'],
+        aws_secret_access_key=credentials['SecretAccessKey'],
+        aws_session_token=credentials['SessionToken']
+    )
+
+
+def make_zip():
+    buffer = io.BytesIO()
+    import zipfile
+    with zipfile.ZipFile(buffer, 'w') as zf:
+        zf.writestr('lambda_function.py', 'def lambda_handler(event, context):\n    return event\n')
+    return buffer.getvalue()
+
+
+def create_fleet(args):
+    """Create instances, functions, notebooks and buckets in every account and region."""
+    code = make_zip()
+    for account_id in args.account_ids:
+        session = get_session(account_id)
+        role_arn = session.client('iam').create_role(
+            RoleName=LAMBDA_ROLE_NAME,
+            AssumeRolePolicyDocument=json.dumps({'Version': '2012-10-17', 'Statement': []})
+        )['Role']['Arn']
+
+        for region in args.regions:
+            if args.instances:
+                ec2 = session.client('ec2', region_name=region)
+                instances = ec2.run_instances(
+                    ImageId=AMI_ID, MinCount=args.instances, MaxCount=args.instances, InstanceType='t3.micro',
+                    TagSpecifications=[{'ResourceType': 'instance', 'Tags': [{'Key': 'Name', 'Value': 'benchmark'}]}]
+                )['Instances']
+                # Leave a quarter of them stopped
+                stopped = [i['InstanceId'] for i in instances[::4]]
+                if stopped:
+                    ec2.stop_instances(InstanceIds=stopped)
+
+            lambda_client = session.client('lambda', region_name=region)
+            for i in range(args.functions):
+                # Alternate runtimes so both Lambda updaters have their own functions to process
+                lambda_client.create_function(
+                    FunctionName=f'benchmark-{i:04d}',
+                    Runtime='python3.8' if i % 2 else 'python3.9',
+                    Role=role_arn,
+                    Handler='lambda_function.lambda_handler',
+                    Code={'ZipFile': code}
+                )
+
+            sagemaker = session.client('sagemaker', region_name=region)
+            for i in range(args.notebooks):
+                sagemaker.create_notebook_instance(
+                    NotebookInstanceName=f'benchmark-{i:04d}',
+                    InstanceType='ml.t3.medium',
+                    RoleArn=role_arn,
+                    PlatformIdentifier='notebook-al2-v2'
+                )
+
+        s3 = session.client('s3', region_name='us-east-1')
+        for i in range(args.buckets):
+            bucket = f'benchmark-{account_id}-{i:04d}'
+            s3.create_bucket(Bucket=bucket)
+            s3.put_object(Bucket=bucket, Key='object.txt', Body=b'benchmark')
+
+
+def queue_cost_results(account_ids, count):
+    """Queue Cost Explorer responses in moto (it returns no results by default)."""
+    import requests
+    result = {'ResultsByTime': [{
+        'Total': {'BlendedCost': {'Amount': '12.34', 'Unit': 'USD'}},
+        'Groups': [{'Keys': ['BoxUsage:t3.micro'], 'Metrics': {'BlendedCost': {'Amount': '1.23', 'Unit': 'USD'}}}]
+    }]}
+    for account_id in account_ids:
+        requests.post('http://motoapi.amazonaws.com/moto-api/static/ce/cost-and-usage-results',
+                      json={'account_id': account_id, 'results': [result] * count})
+
+
+def run_aws_monitor2(args, workdir):
+    queue_cost_results(args.account_ids, 2)
+    module = load_module('aws_monitor2', os.path.join(SCRIPT_DIR, 'aws_monitor2.py'))
+    account_ids = {f'Account{i}': account_id for i, account_id in enumerate(args.account_ids)}
+    module.main(argparse.Namespace(account_ids=json.dumps(account_ids), region_list=','.join(args.regions)))
+
+
+def run_ec2_status_report(args, workdir):
+    module = load_module('ec2_status_report', os.path.join(SCRIPT_DIR, 'ec2_status_report.py'))
+    region_map = os.path.join(workdir, 'account_region_map.json')
+    with open(region_map, 'w') as f:
+        json.dump({account_id: args.regions for account_id in args.account_ids}, f)
+    asyncio.run(module.main(argparse.Namespace(region_map=region_map)))
+
+
+def run_lambda_updater_multi(args, workdir):
+    module = load_module('lambda_updater_multi', os.path.join(SCRIPT_DIR, 'updater', 'lambda-updater-multi.py'))
+    module.UPDATE_WAITER_DELAY = 0
+    updater = module.LambdaRuntimeUpdater(
+        regions=args.regions, target_runtime='python3.12', mode='force',
+        source_runtimes=['python3.8'], cache_dir=None
+    )
+    updater.run()
+
+
+def run_lambda_runtime_updater(args, workdir):
+    module = load_module('lambda_runtime_updater', os.path.join(SCRIPT_DIR, 'lambda_runtime_updater.py'))
+    module.check_and_update_lambda_runtimes(args.regions, 'python3.9', 'python3.12', selection='all')
+
+
+def run_sagemaker_notebook_updater(args, workdir):
+    module = load_module('sagemaker_notebook_updater',
+                         os.path.join(SCRIPT_DIR, 'updater', 'sagemaker-notebook-updater.py'))
+    module.POLL_INTERVAL = 0.1
+    module.PROGRESS_INTERVAL = 60
+    # moto does not return PlatformIdentifier, so match the 'unknown' placeholder the updater uses instead
+    updater = module.SageMakerNotebookUpdater(regions=args.regions, target_platform='notebook-al2-v3', mode='force',
+                                              source_platforms=['notebook-al2-v2', 'unknown'])
+    updater.run()
+
+
+def run_aws_cleanup_multiaccount2(args, workdir):
+    module = load_module('aws_cleanup_multiaccount2', os.path.join(SCRIPT_DIR, 'aws_cleanup_multiaccount2.py'))
+    for account_id in args.account_ids:
+        for region in args.regions:
+            os.environ['AWS_DEFAULT_REGION'] = region
+            module.cleanup_all_resources(
+                account_id,
+                argparse.Namespace(force=True, s3=(region == args.regions[0]), terminate_ec2=False)
+            )
+    os.environ['AWS_DEFAULT_REGION'] = args.regions[0]
+
+
+def run_scenario(name, args, stats):
+    """Run one scenario with its output captured. Returns (seconds, error or None)."""
+    func = globals()[f'run_{name}']
+    output = io.StringIO()
+    previous_dir = os.getcwd()
+    error = None
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)  # Reports and caches are written to the working directory
+        stats.reset()
+        start = time.perf_counter()
+        try:
+            with contextlib.redirect_stdout(output), contextlib.redirect_stderr(output):
+                func(args, workdir)
+        except Exception as e:
+            error = f'{type(e).__name__}: {e}'
+        elapsed = time.perf_counter() - start
+        os.chdir(previous_dir)
+    if args.verbose:
+        print(output.getvalue())
+    return elapsed, error
+
+
+def main(args):
+    try:
+        from moto import mock_aws
+    except ImportError:
+        print('moto is required: pip install "moto[all]"')
+        return 1
+
+    os.environ['AWS_DEFAULT_REGION'] = args.regions[0]
+    args.account_ids = [MAIN_ACCOUNT_ID] + [f'{100000000000 + i:012d}' for i in range(1, args.accounts)]
+    if not args.verbose:
+        logging.disable(logging.CRITICAL)
+
+    results = {}
+    with mock_aws():
+        print(f"Creating fleet: {args.accounts} accounts x {len(args.regions)} regions, per region "
+              f"{args.instances} instances, {args.functions} functions, {args.notebooks} notebooks; "
+              f"{args.buckets} buckets per account")
+        create_fleet(args)
+
+        stats = aws_call_stats.install()
+        for name in args.scenarios:
+            elapsed, error = run_scenario(name, args, stats)
+            totals = stats.totals()
+            results[name] = {'seconds': round(elapsed, 3), 'error': error, 'totals': totals,
+                             'operations': stats.as_dict()}
+            if args.verbose:
+                print(f"\n=== {name} ===")
+                print(stats.format_table())
+                print()
+        aws_call_stats.uninstall()
+
+    print(f"\n{'SCENARIO':28} {'TIME (s)':>9} {'CALLS':>7} {'ERR':>5} {'RETRY':>6} {'THROT':>6} {'ASSUME':>7}  STATUS")
+    print("-" * 90)
+    for name, result in results.items():
+        totals = result['totals']
+        assume_role = result['operations'].get('sts.AssumeRole', {}).get('calls', 0)
+        status = 'OK' if result['error'] is None else result['error'][:60]
+        print(f"{name:28} {result['seconds']:9.2f} {totals['calls']:7d} {totals['errors']:5d} "
+              f"{totals['retries']:6d} {totals['throttles']:6d} {assume_role:7d}  {status}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'fleet': {k: v for k, v in vars(args).items() if k not in ('json', 'verbose')},
+                       'results': results}, f, indent=2)
+        print(f"\nResults written to {args.json}")
+    return 1 if any(r['error'] for r in results.values()) else 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Count AWS API calls made by the cloud scripts against moto')
+    parser.add_argument('--scenarios', nargs='+', choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument('--accounts', type=int, default=2, help='Number of accounts (the first is the caller)')
+    parser.add_argument('--regions', nargs='+', default=['us-east-1', 'ap-southeast-1'])
+    parser.add_argument('--instances', type=int, default=10, help='EC2 instances per account and region')
+    parser.add_argument('--functions', type=int, default=10, help='Lambda functions per account and region')
+    parser.add_argument('--notebooks', type=int, default=2, help='Notebook instances per account and region')
+    parser.add_argument('--buckets', type=int, default=3, help='S3 buckets per account')
+    parser.add_argument('--json', help='Write the full results to a JSON file')
+    parser.add_argument('--verbose', action='store_true', help='Show script output and per-operation tables')
+    args = parser.parse_args()
+    sys.exit(main(args))
@@ -0,0 +1,213 @@
+#!/usr/bin/env python
+
+"""
+AWS API Call Accounting
+
+Counts AWS API calls made through boto3/botocore using botocore event hooks,
+per (service, operation):
+- calls, errors and total/max latency (after-call / after-call-error)
+- retry attempts (from the response metadata)
+- throttling responses, including ones that were retried (needs-retry)
+
+Once installed, every botocore session created afterwards is instrumented,
+including the sessions made for cross-account role assumption. Clients that
+were created before installing are not tracked.
+
+Usage:
+    import aws_call_stats
+
+    with aws_call_stats.track() as stats:
+        run_something()
+    print(stats.format_table())
+
+    # or, for a whole script
+    stats = aws_call_stats.install()
+    ...
+    print(stats.format_table())
+"""
+
+import boto3
+import botocore.session
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+
+THROTTLE_CODES = {
+    'Throttling',
+    'ThrottlingException',
+    'ThrottledException',
+    'RequestThrottledException',
+    'TooManyRequestsException',
+    'ProvisionedThroughputExceededException',
+    'TransactionInProgressException',
+    'RequestLimitExceeded',
+    'BandwidthLimitExceeded',
+    'LimitExceededException',
+    'RequestThrottled',
+    'SlowDown',
+    'PriorRequestNotComplete',
+    'EC2ThrottledException',
+}
+
+
+class OperationStats:
+    __slots__ = ('calls', 'errors', 'retries', 'throttles', 'total_time', 'max_time')
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.retries = 0
+        self.throttles = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+
+
+class ApiCallStats:
+    """Thread-safe counters of API calls per (service, operation)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.operations = defaultdict(OperationStats)
+
+    def reset(self):
+        with self._lock:
+            self.operations = defaultdict(OperationStats)
+
+    def register(self, session):
+        """Attach the hooks to a botocore session."""
+        for event, handler in [('before-call', self._before_call),
+                               ('after-call', self._after_call),
+                               ('after-call-error', self._after_call_error),
+                               ('needs-retry', self._needs_retry)]:
+            # unique_id stops a session from being hooked twice
+            session.register(event, handler, unique_id=f'api-call-stats-{event}')
+
+    @staticmethod
+    def _operation(event_name):
+        # e.g. 'after-call.ec2.DescribeInstances'
+        _, service, operation = event_name.split('.', 2)
+        return service, operation
+
+    def _before_call(self, context=None, **kwargs):
+        if context is not None:
+            context['api_call_stats_start'] = time.perf_counter()
+
+    def _record(self, event_name, context, error=False, retries=0):
+        start = (context or {}).get('api_call_stats_start')
+        elapsed = time.perf_counter() - start if start is not None else 0.0
+        with self._lock:
+            stats = self.operations[self._operation(event_name)]
+            stats.calls += 1
+            stats.errors += 1 if error else 0
+            stats.retries += retries
+            stats.total_time += elapsed
+            stats.max_time = max(stats.max_time, elapsed)
+
+    def _after_call(self, event_name, http_response=None, parsed=None, context=None, **kwargs):
+        error = http_response is not None and http_response.status_code >= 400
+        retries = (parsed or {}).get('ResponseMetadata', {}).get('RetryAttempts', 0)
+        self._record(event_name, context, error, retries)
+
+    def _after_call_error(self, event_name, context=None, **kwargs):
+        self._record(event_name, context, error=True)
+
+    def _needs_retry(self, event_name, response=None, **kwargs):
+        # Called after every attempt, so throttled attempts are counted even if a retry succeeds
+        if response is None:
+            return
+        http_response, parsed = response
+        if http_response.status_code == 429 or parsed.get('Error', {}).get('Code') in THROTTLE_CODES:
+            with self._lock:
+                self.operations[self._operation(event_name)].throttles += 1
+
+    def totals(self):
+        """Return totals across all operations as a dict."""
+        with self._lock:
+            operations = list(self.operations.values())
+        return {
+            'calls': sum(s.calls for s in operations),
+            'errors': sum(s.errors for s in operations),
+            'retries': sum(s.retries for s in operations),
+            'throttles': sum(s.throttles for s in operations),
+            'time': sum(s.total_time for s in operations),
+        }
+
+    def as_dict(self):
+        """Return the counters as {'service.Operation': {...}}."""
+        with self._lock:
+            items = sorted(self.operations.items())
+        return {
+            f'{service}.{operation}': {
+                'calls': s.calls,
+                'errors': s.errors,
+                'retries': s.retries,
+                'throttles': s.throttles,
+                'total_time': round(s.total_time, 6),
+                'max_time': round(s.max_time, 6),
+            }
+            for (service, operation), s in items
+        }
+
+    def format_table(self):
+        lines = [
+            f"{'SERVICE':20} {'OPERATION':34} {'CALLS':>6} {'ERR':>5} {'RETRY':>6} {'THROT':>6} {'TOTAL (s)':>10} {'AVG (ms)':>9}",
+            "-" * 102,
+        ]
+        with self._lock:
+            items = sorted(self.operations.items(), key=lambda item: -item[1].calls)
+        for (service, operation), s in items:
+            avg_ms = s.total_time / s.calls * 1000 if s.calls else 0.0
+            lines.append(f"{service:20} {operation:34} {s.calls:6d} {s.errors:5d} {s.retries:6d} "
+                         f"{s.throttles:6d} {s.total_time:10.3f} {avg_ms:9.1f}")
+        totals = self.totals()
+        lines.append("-" * 102)
+        lines.append(f"{'TOTAL':55} {totals['calls']:6d} {totals['errors']:5d} {totals['retries']:6d} "
+                     f"{totals['throttles']:6d} {totals['time']:10.3f}")
+        return '\n'.join(lines)
+
+
+_installed = None
+_original_session_init = botocore.session.Session.__init__
+
+
+def install(stats=None):
+    """
+    Instrument every botocore session created from now on (and boto3's
+    default session, if it exists). Returns the ApiCallStats being updated.
+    """
+    global _installed
+    if _installed is not None:
+        return _installed
+    stats = stats or ApiCallStats()
+
+    def __init__(self, *args, **kwargs):
+        _original_session_init(self, *args, **kwargs)
+        stats.register(self)
+
+    botocore.session.Session.__init__ = __init__
+    if boto3.DEFAULT_SESSION is not None:
+        stats.register(boto3.DEFAULT_SESSION._session)
+    _installed = stats
+    return stats
+
+
+def uninstall():
+    """Stop instrumenting new sessions. Existing sessions keep their hooks."""
+    global _installed
+    botocore.session.Session.__init__ = _original_session_init
+    _installed = None
+
+
+@contextmanager
+def track():
+    """Count the API calls made inside a `with` block."""
+    already_installed = _installed is not None
+    stats = install()
+    stats.reset()
+    try:
+        yield stats
+    finally:
+        if not already_installed:
+            uninstall()
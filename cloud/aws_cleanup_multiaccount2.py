@@ -35,13 +35,51 @@ Warning:
 
 import argparse
 import boto3
+import functools
 import logging
 import os
+import sys
 from botocore.exceptions import ClientError
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+@functools.lru_cache(maxsize=None)
+def get_sts():
+    """
+    Return a memoized STS client, created on first use.
+
+    Creating the client lazily keeps `--help` and argument parsing free of
+    any AWS network calls.
+
+    Returns:
+        botocore.client.STS: The shared STS client
+    """
+    return boto3.client('sts')
+
+@functools.lru_cache(maxsize=None)
+def get_main_account_id():
+    """
+    Return the account ID of the caller's credentials, looked up once.
+
+    Returns:
+        str: The AWS Account ID of the current credentials
+
+    Raises:
+        SystemExit: If the caller identity cannot be determined
+    """
+    try:
+        main_account_id = get_sts().get_caller_identity()["Account"]
+        logger.info(f'Using AWS Account ID: {main_account_id}')
+        return main_account_id
+    except ClientError as e:
+        logger.error(f"Failed to get AWS caller identity: {e}")
+        logger.error("Please check your AWS credentials and permissions")
+        sys.exit(1)
+    except Exception as e:
+        logger.error(f"Unexpected error getting AWS caller identity: {e}")
+        sys.exit(1)
+
 def get_session(role_arn):
     """
     Create an AWS session using cross-account role assumption.
@@ -63,7 +101,7 @@ def get_session(role_arn):
     """
     # Assume the specified role and get temporary credentials
     try:
-        resp = sts.assume_role(
+        resp = get_sts().assume_role(
             RoleArn=role_arn,
             RoleSessionName='session'  # Name for this session (appears in CloudTrail logs)
         )
@@ -80,7 +118,7 @@ def get_session(role_arn):
 
 def get_session_keys(role_arn):
     try:
-        resp = sts.assume_role(
+        resp = get_sts().assume_role(
             RoleArn=role_arn,
             RoleSessionName='session'  # Name for this session (appears in CloudTrail logs)
         )
@@ -95,7 +133,7 @@ def get_session_keys(role_arn):
 
 def get_resource(account_id, resource, region=None):
     try:
-        resp = sts.assume_role(
+        resp = get_sts().assume_role(
             RoleArn=f'arn:aws:iam::{account_id}:role/OrganizationAccountAccessRole',
             RoleSessionName='session'  # Name for this session (appears in CloudTrail logs)
         )
@@ -112,7 +150,7 @@ def get_resource(account_id, resource, region=None):
 
 def get_client(account_id: str, service_name: str, region=None):
     # If target account is the same as current account, use direct access
-    if account_id == main_account_id:
+    if account_id == get_main_account_id():
         if region is None:
             return boto3.client(service_name)
         else:
@@ -371,24 +409,14 @@ def cleanup_all_resources(account_id, args):
         delete_all_s3_buckets(account_id, force)
     logger.info("AWS resource cleanup completed")
 
-try:
-    sts = boto3.client('sts')
-    main_account_id = sts.get_caller_identity()["Account"]
-    logger.info(f'Using AWS Account ID: {main_account_id}')
-except ClientError as e:
-    logger.error(f"Failed to get AWS caller identity: {e}")
-    logger.error("Please check your AWS credentials and permissions")
-    sys.exit(1)
-except Exception as e:
-    logger.error(f"Unexpected error getting AWS caller identity: {e}")
-    sys.exit(1)
-
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="AWS Resource Cleanup Tool")
     parser.add_argument("--force", action="store_true", help="Force deletion without prompting")
     parser.add_argument("--s3", action="store_true", help="Cleanup S3 buckets")
     parser.add_argument("--terminate-ec2", action="store_true", help="Terminate EC2 instances")
-    parser.add_argument("--account_id", default=os.getenv('AWS_ACCOUNT_ID', main_account_id))
+    parser.add_argument("--account_id", default=os.getenv('AWS_ACCOUNT_ID'))
     args = parser.parse_args()
-    
+    if args.account_id is None:
+        args.account_id = get_main_account_id()
+
     cleanup_all_resources(args.account_id, args)
@@ -4,6 +4,7 @@ import argparse
 import boto3
 import datetime
 import dotenv
+import functools
 import json
 import logging
 import os
@@ -16,8 +17,15 @@ if DOT_ENV_PATH is None:
 else:
     config = dotenv.dotenv_values(DOT_ENV_PATH)
 
-sts = boto3.client('sts')
-main_account_id = sts.get_caller_identity()['Account']
+
+@functools.lru_cache(maxsize=None)
+def get_sts():
+    return boto3.client('sts')
+
+
+@functools.lru_cache(maxsize=None)
+def get_main_account_id():
+    return get_sts().get_caller_identity()['Account']
 
 
 def get_monthly_spend(ce):
@@ -76,7 +84,7 @@ def get_yesterdays_spend(ce, max_items=10, threshold=0.01):
 
 
 def get_session(role_arn):
-    resp = sts.assume_role(
+    resp = get_sts().assume_role(
         RoleArn=role_arn,
         RoleSessionName='session'
     )
@@ -88,7 +96,7 @@ def get_session(role_arn):
 
 
 def get_client(account_id, service_name, region=None):
-    if account_id == main_account_id:
+    if account_id == get_main_account_id():
         if region is None:
             return boto3.client(service_name)
         else:
@@ -177,7 +185,7 @@ def main(args):
     if args.account_ids:
         account_ids = json.loads(args.account_ids)
     else:
-        account_ids = {'Main': main_account_id}
+        account_ids = {'Main': get_main_account_id()}
     if args.region_list:
         region_list = args.region_list.split(',')
     else:
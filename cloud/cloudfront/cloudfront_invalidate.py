@@ -6,7 +6,10 @@ import argparse
 import boto3
 import datetime
 import os
+import threading
+import time
 import uuid
+from collections import defaultdict
 
 from dotenv import load_dotenv
 
@@ -14,16 +17,191 @@ from dotenv import load_dotenv
 load_dotenv()
 s3_bucket = os.getenv('S3_BUCKET')
 distribution_id = os.getenv('CLOUDFRONT_DISTRIBUTION_ID')
-paths_to_invalidate = os.getenv('CLOUDFRONT_PATHS_TO_INVALIDATE').split(',')
+paths_to_invalidate = [p for p in (os.getenv('CLOUDFRONT_PATHS_TO_INVALIDATE') or '').split(',') if p]
 
+# CloudFront limits (per distribution, for invalidations in progress)
+MAX_PATHS_IN_PROGRESS = 3000
+MAX_WILDCARDS_IN_PROGRESS = 15
 
-def create_cloudfront_invalidation(distribution_id, paths):
+OVER_INVALIDATION_BUDGET = 0.25  # Extra objects a wildcard may cover, as a fraction of the requested paths
+DEBOUNCE_SECONDS = 5.0  # Quiet period before queued paths are submitted
+CAPACITY_POLL_INTERVAL = 20  # Seconds between checks while waiting for invalidations to complete
+CAPACITY_TIMEOUT = 900  # Maximum seconds to wait for capacity
+
+# Path counts of invalidations already looked up, by invalidation ID
+_invalidation_sizes = {}
+_invalidation_sizes_lock = threading.Lock()
+
+
+def _parent_prefixes(path):
+    """Return the directory prefixes of a path, deepest first (e.g. '/a/b/', '/a/', '/')."""
+    prefixes = []
+    end = path.rfind('/', 0, len(path) - 1) if path.endswith('/') else path.rfind('/')
+    while end >= 0:
+        prefixes.append(path[:end + 1])
+        end = path.rfind('/', 0, end)
+    return prefixes
+
+
+def plan_invalidation_paths(paths, known_paths=None, max_paths=MAX_PATHS_IN_PROGRESS,
+                            max_wildcards=MAX_WILDCARDS_IN_PROGRESS,
+                            over_invalidation_budget=OVER_INVALIDATION_BUDGET):
+    """
+    Collapse a list of paths into a smaller set of wildcard prefixes.
+
+    Without `known_paths`, directories are only collapsed when the plan would
+    otherwise exceed `max_paths`. With `known_paths` (every path the site
+    serves), a directory is also collapsed when the objects it would
+    needlessly invalidate fit in the over-invalidation budget.
+
+    Args:
+        paths (list): Paths to invalidate (e.g. ['/index.html', '/css/a.css'])
+        known_paths (list): All paths served by the distribution, if known
+        max_paths (int): Maximum number of paths in the plan
+        max_wildcards (int): Maximum number of wildcard paths in the plan
+        over_invalidation_budget (float): Extra objects allowed, as a fraction of len(paths)
+
+    Returns:
+        list: Paths to submit, wildcard prefixes ending in '*'
+    """
+    paths = {p if p.startswith('/') else '/' + p for p in paths}
+    wildcards = {p[:-1] for p in paths if p.endswith('*')}
+    exact = {p for p in paths if not p.endswith('*')}
+
+    # Drop wildcards and paths already covered by a shorter wildcard
+    wildcards = {w for w in wildcards if not any(w != o and w.startswith(o) for o in wildcards)}
+    exact = {p for p in exact if not any(p.startswith(w) for w in wildcards)}
+
+    requested = set(exact)
+    known = set(known_paths or []) | requested
+    known_under = defaultdict(int)
+    requested_under = defaultdict(int)
+    for path in known:
+        for prefix in _parent_prefixes(path):
+            known_under[prefix] += 1
+            if path in requested:
+                requested_under[prefix] += 1
+
+    budget = over_invalidation_budget * len(requested) if known_paths is not None else 0
+    extra_total = 0
+
+    while True:
+        too_many = len(exact) + len(wildcards) > max_paths or len(wildcards) > max_wildcards
+        exact_under = defaultdict(int)
+        for path in exact:
+            for prefix in _parent_prefixes(path):
+                exact_under[prefix] += 1
+        for wildcard in wildcards:
+            for prefix in _parent_prefixes(wildcard):
+                exact_under[prefix] += 0
+
+        best = None
+        for prefix, count in exact_under.items():
+            absorbed = {w for w in wildcards if w.startswith(prefix)}
+            saved = count + len(absorbed) - 1
+            new_wildcards = len(wildcards) - len(absorbed) + 1
+            if saved < 1 or (new_wildcards > max_wildcards and new_wildcards >= len(wildcards)):
+                continue
+            # Objects under the prefix that were not requested
+            extra = known_under[prefix] - requested_under[prefix]
+            if not too_many and (known_paths is None or extra_total + extra > budget):
+                continue
+            # Least over-invalidation per path saved, then the narrowest prefix
+            score = (extra / saved, -prefix.count('/'), -saved)
+            if best is None or score < best[0]:
+                best = (score, prefix, absorbed, extra)
+
+        if best is None:
+            break
+        _, prefix, absorbed, extra = best
+        wildcards = (wildcards - absorbed) | {prefix}
+        exact = {p for p in exact if not p.startswith(prefix)}
+        extra_total += extra
+
+    if len(exact) + len(wildcards) > max_paths or len(wildcards) > max_wildcards:
+        return ['/*']
+    return sorted(exact) + sorted(w + '*' for w in wildcards)
+
+
+def count_paths(paths):
+    """Return (exact paths, wildcard paths) in a path list."""
+    wildcards = sum(1 for p in paths if p.endswith('*'))
+    return len(paths) - wildcards, wildcards
+
+
+def get_in_progress_usage(cloudfront_client, distribution_id):
+    """
+    Return the exact and wildcard paths used by invalidations in progress.
+
+    Args:
+        cloudfront_client: boto3 CloudFront client
+        distribution_id (str): The CloudFront distribution ID
+
+    Returns:
+        tuple: (exact paths, wildcard paths, number of invalidations in progress)
+    """
+    in_progress = []
+    paginator = cloudfront_client.get_paginator('list_invalidations')
+    for page in paginator.paginate(DistributionId=distribution_id):
+        for item in page['InvalidationList'].get('Items', []):
+            if item['Status'] == 'InProgress':
+                in_progress.append(item['Id'])
+
+    exact = wildcards = 0
+    for invalidation_id in in_progress:
+        with _invalidation_sizes_lock:
+            size = _invalidation_sizes.get(invalidation_id)
+        if size is None:
+            response = cloudfront_client.get_invalidation(DistributionId=distribution_id, Id=invalidation_id)
+            size = count_paths(response['Invalidation']['InvalidationBatch']['Paths'].get('Items', []))
+            with _invalidation_sizes_lock:
+                _invalidation_sizes[invalidation_id] = size
+        exact += size[0]
+        wildcards += size[1]
+    return exact, wildcards, len(in_progress)
+
+
+def wait_for_capacity(cloudfront_client, distribution_id, paths, timeout=CAPACITY_TIMEOUT):
+    """
+    Wait until the distribution's in-progress invalidations leave room for `paths`.
+
+    Args:
+        cloudfront_client: boto3 CloudFront client
+        distribution_id (str): The CloudFront distribution ID
+        paths (list): Paths about to be submitted
+        timeout (int): Maximum seconds to wait
+
+    Returns:
+        bool: True if there is room, False if the timeout expired first
+    """
+    needed_exact, needed_wildcards = count_paths(paths)
+    deadline = time.monotonic() + timeout
+    while True:
+        exact, wildcards, count = get_in_progress_usage(cloudfront_client, distribution_id)
+        if exact + needed_exact <= MAX_PATHS_IN_PROGRESS and wildcards + needed_wildcards <= MAX_WILDCARDS_IN_PROGRESS:
+            return True
+        if time.monotonic() >= deadline:
+            return False
+        print(f"Waiting for {count} invalidations in progress "
+              f"({exact} paths, {wildcards} wildcards) to complete...")
+        time.sleep(CAPACITY_POLL_INTERVAL)
+
+
+def create_cloudfront_invalidation(distribution_id, paths, known_paths=None, coalesce=True,
+                                   over_invalidation_budget=OVER_INVALIDATION_BUDGET):
     """
     Create a CloudFront invalidation for specified paths
     
+    The paths are first coalesced into wildcard prefixes (see
+    plan_invalidation_paths), and the call waits while invalidations already
+    in progress leave no room under the distribution's limits.
+
     Args:
         distribution_id (str): The CloudFront distribution ID
         paths (list): List of paths to invalidate (e.g. ['/images/*', '/css/*'])
+        known_paths (list): All paths served by the distribution, if known
+        coalesce (bool): Collapse paths into wildcard prefixes
+        over_invalidation_budget (float): Extra objects allowed, as a fraction of len(paths)
     
     Returns:
         dict: Invalidation details if successful
@@ -31,6 +209,16 @@ def create_cloudfront_invalidation(distribution_id, paths):
     try:
         # Create CloudFront client
         cloudfront_client = boto3.client('cloudfront')
+
+        if coalesce:
+            planned = plan_invalidation_paths(paths, known_paths=known_paths,
+                                              over_invalidation_budget=over_invalidation_budget)
+            if len(planned) < len(paths):
+                print(f"Coalesced {len(paths)} paths into {len(planned)}")
+            paths = planned
+
+        if not wait_for_capacity(cloudfront_client, distribution_id, paths):
+            print("Timed out waiting for invalidations in progress; submitting anyway")
         
         # Generate a unique caller reference using timestamp and UUID
         caller_reference = f"{datetime.datetime.now().strftime('%Y%m%d%H%M%S')}-{str(uuid.uuid4())}"
@@ -47,6 +235,8 @@ def create_cloudfront_invalidation(distribution_id, paths):
             }
         )
         
+        with _invalidation_sizes_lock:
+            _invalidation_sizes[response['Invalidation']['Id']] = count_paths(paths)
         return response['Invalidation']
         
     except Exception as e:
@@ -54,12 +244,70 @@ def create_cloudfront_invalidation(distribution_id, paths):
         raise
 
 
+class InvalidationQueue:
+    """
+    Debounces invalidation requests into coalesced batches.
+
+    Paths added within `debounce` seconds of each other are submitted as one
+    invalidation. Submitted invalidations are tracked so that `wait()` can
+    block until they have completed.
+    """
+
+    def __init__(self, distribution_id, debounce=DEBOUNCE_SECONDS, known_paths=None,
+                 over_invalidation_budget=OVER_INVALIDATION_BUDGET):
+        self.distribution_id = distribution_id
+        self.debounce = debounce
+        self.known_paths = known_paths
+        self.over_invalidation_budget = over_invalidation_budget
+        self.pending = set()
+        self.in_flight = []
+        self._lock = threading.Lock()
+        self._submit_lock = threading.Lock()
+        self._timer = None
+
+    def add(self, paths):
+        """Queue paths; the batch is submitted once no paths arrive for `debounce` seconds."""
+        with self._lock:
+            self.pending.update(paths)
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = threading.Timer(self.debounce, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self):
+        """Submit the queued paths now. Returns the invalidation, or None if nothing was queued."""
+        with self._submit_lock:
+            with self._lock:
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+                paths = sorted(self.pending)
+                self.pending.clear()
+            if not paths:
+                return None
+
+            invalidation = create_cloudfront_invalidation(
+                self.distribution_id, paths, known_paths=self.known_paths,
+                over_invalidation_budget=self.over_invalidation_budget
+            )
+            self.in_flight.append(invalidation['Id'])
+            return invalidation
+
+    def wait(self):
+        """Flush, then wait for every invalidation submitted by this queue to complete."""
+        self.flush()
+        cloudfront_client = boto3.client('cloudfront')
+        waiter = cloudfront_client.get_waiter('invalidation_completed')
+        while self.in_flight:
+            waiter.wait(DistributionId=self.distribution_id, Id=self.in_flight[0])
+            self.in_flight.pop(0)
+
+
 def main(args):
     # Process arguments
-    if args.distribution_id:
-        distribution_id = args.distribution_id
-    if args.paths:
-        paths_to_invalidate = args.paths
+    distribution_id = args.distribution_id or os.getenv('CLOUDFRONT_DISTRIBUTION_ID')
+    paths = args.paths or list(paths_to_invalidate)
     if args.s3_prefix:
         s3_prefix = args.s3_prefix
         s3_path = f"{s3_prefix}/{os.path.basename(args.file)}"
@@ -72,13 +320,24 @@ def main(args):
 
         try:
             s3_client = boto3.client('s3')
-            s3_client.upload_file(args.file, s3_path, os.path.basename(args.file))
+            s3_client.upload_file(args.file, s3_bucket, s3_path)
         except Exception as e:
             print(f"Error uploading file to S3: {str(e)}")
             raise
 
+    known_paths = None
+    if args.known_paths:
+        with open(args.known_paths) as f:
+            known_paths = [line.strip() for line in f if line.strip()]
+
+    if args.plan:
+        for path in plan_invalidation_paths(paths, known_paths=known_paths, over_invalidation_budget=args.budget):
+            print(path)
+        return
+
     # Create the CloudFront invalidation
-    result = create_cloudfront_invalidation(distribution_id, paths_to_invalidate)
+    result = create_cloudfront_invalidation(distribution_id, paths, known_paths=known_paths,
+                                            coalesce=not args.no_coalesce, over_invalidation_budget=args.budget)
     print(f"Invalidation created successfully. ID: {result['Id']}")
     print(f"Status: {result['Status']}")
     print(f"Created Time: {result['CreateTime']}")
@@ -90,5 +349,10 @@ if __name__ == "__main__":
     parser.add_argument("--paths", nargs="+", default='', help="Paths to invalidate (e.g. /images/* /css/*)")
     parser.add_argument("--s3-prefix", default='', help="S3 prefix to upload file")
     parser.add_argument("--file", default='', help="File to upload to S3")
+    parser.add_argument("--known-paths", default='', help="File listing every path the site serves, one per line")
+    parser.add_argument("--budget", type=float, default=OVER_INVALIDATION_BUDGET,
+                        help="Extra objects a wildcard may invalidate, as a fraction of the paths given")
+    parser.add_argument("--no-coalesce", action="store_true", help="Submit the paths as given")
+    parser.add_argument("--plan", action="store_true", help="Only print the coalesced paths")
     args = parser.parse_args() 
     main(args)
@@ -14,15 +14,32 @@ Configuration:
 - DISTRIBUTION_COMMENT: CloudFront distribution description
 - DEFAULT_TTL, MIN_TTL, MAX_TTL: Cache TTL in seconds (default: 0 = no cache)
 
+Sync:
+- Walks a local build folder and hashes every file (SHA-256)
+- Compares the hashes with a manifest stored in the bucket
+- Uploads only new or changed files, concurrently, with multipart transfers
+  for large files and Content-Type set from the file extension
+- Optionally deletes objects that no longer exist locally
+- Issues a single CloudFront invalidation for exactly the changed paths
+
 Usage:
     python3 deploy.py
+    python3 deploy.py --sync ./build --bucket BUCKET --distribution-id ID
+    python3 deploy.py --sync ./build --bucket BUCKET --distribution-id ID --delete --dry-run
 
 The script prompts for confirmation before creating resources.
 """
+import argparse
 import boto3
+import hashlib
 import json
+import mimetypes
+import os
 import time
 import uuid
+from boto3.s3.transfer import TransferConfig
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import quote
 
 # Configuration
 BUCKET_NAME = None  # Set to None to auto-generate, or specify bucket name
@@ -32,6 +49,27 @@ DEFAULT_TTL = 0  # Default cache TTL in seconds (0 = no cache)
 MIN_TTL = 0  # Minimum cache TTL in seconds
 MAX_TTL = 0  # Maximum cache TTL in seconds
 
+# Sync configuration
+MANIFEST_KEY = ".deploy-manifest.json"  # Object holding the content hashes of the last sync
+SYNC_MAX_WORKERS = 10  # Concurrent file uploads
+HASH_CHUNK_SIZE = 1024 * 1024
+TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=8 * 1024 * 1024,
+    multipart_chunksize=8 * 1024 * 1024,
+    max_concurrency=4
+)
+
+# Types missing from some platforms' mime.types
+mimetypes.add_type('application/javascript', '.js')
+mimetypes.add_type('application/javascript', '.mjs')
+mimetypes.add_type('application/json', '.map')
+mimetypes.add_type('application/manifest+json', '.webmanifest')
+mimetypes.add_type('application/wasm', '.wasm')
+mimetypes.add_type('image/svg+xml', '.svg')
+mimetypes.add_type('image/webp', '.webp')
+mimetypes.add_type('font/woff', '.woff')
+mimetypes.add_type('font/woff2', '.woff2')
+
 s3 = boto3.client('s3', region_name=REGION)
 cloudfront = boto3.client('cloudfront')
 
@@ -165,7 +203,135 @@ def update_bucket_policy(bucket_name, distribution_arn):
     
     s3.put_bucket_policy(Bucket=bucket_name, Policy=json.dumps(policy))
 
-def main():
+def hash_file(path):
+    """Return the SHA-256 hex digest of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def build_local_manifest(build_dir, max_workers=SYNC_MAX_WORKERS):
+    """Hash every file under build_dir, keyed by its S3 key (relative path)."""
+    paths = {}
+    for root, _, files in os.walk(build_dir):
+        for name in files:
+            path = os.path.join(root, name)
+            key = os.path.relpath(path, build_dir).replace(os.sep, '/')
+            if key != MANIFEST_KEY:
+                paths[key] = path
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        hashes = dict(zip(paths, executor.map(hash_file, paths.values())))
+    return {key: {'sha256': hashes[key], 'size': os.path.getsize(path)} for key, path in paths.items()}, paths
+
+def load_remote_manifest(bucket_name):
+    """Load the manifest of the last sync from the bucket (empty if there is none)."""
+    try:
+        response = s3.get_object(Bucket=bucket_name, Key=MANIFEST_KEY)
+    except s3.exceptions.NoSuchKey:
+        return {}
+    return json.loads(response['Body'].read())
+
+def save_remote_manifest(bucket_name, manifest):
+    s3.put_object(
+        Bucket=bucket_name,
+        Key=MANIFEST_KEY,
+        Body=json.dumps(manifest, indent=1, sort_keys=True).encode('utf-8'),
+        ContentType='application/json'
+    )
+
+def get_upload_args(key):
+    """Return ExtraArgs for an upload with the content type of the file."""
+    content_type, encoding = mimetypes.guess_type(key)
+    extra_args = {'ContentType': content_type or 'application/octet-stream'}
+    if encoding:
+        extra_args['ContentEncoding'] = encoding
+    return extra_args
+
+def get_invalidation_paths(keys):
+    """Map S3 keys to CloudFront paths, including '/' and 'dir/' for index.html."""
+    paths = set()
+    for key in keys:
+        paths.add('/' + quote(key))
+        if key == 'index.html' or key.endswith('/index.html'):
+            paths.add('/' + quote(key[:-len('index.html')]))
+    return sorted(paths)
+
+def sync_site(build_dir, bucket_name, distribution_id=None, delete=False,
+              dry_run=False, max_workers=SYNC_MAX_WORKERS):
+    """
+    Upload the changed files of a local build folder and invalidate them.
+
+    Args:
+        build_dir (str): Local folder with the site content
+        bucket_name (str): S3 bucket behind the distribution
+        distribution_id (str): CloudFront distribution to invalidate (None to skip)
+        delete (bool): Delete objects that no longer exist locally
+        dry_run (bool): Only report what would change
+        max_workers (int): Concurrent file uploads
+
+    Returns:
+        list: CloudFront paths that changed
+    """
+    local, paths = build_local_manifest(build_dir, max_workers)
+    remote = load_remote_manifest(bucket_name)
+
+    changed = sorted(key for key, entry in local.items() if remote.get(key, {}).get('sha256') != entry['sha256'])
+    removed = sorted(set(remote) - set(local)) if delete else []
+    unchanged = len(local) - len(changed)
+
+    print(f"Sync {build_dir} -> s3://{bucket_name}: "
+          f"{len(changed)} changed, {len(removed)} to delete, {unchanged} unchanged")
+    if dry_run:
+        for key in changed:
+            print(f"  upload {key}")
+        for key in removed:
+            print(f"  delete {key}")
+        return get_invalidation_paths(changed + removed)
+
+    # Start from the previous manifest so that failed uploads are retried next time
+    manifest = {key: remote[key] for key in local if key in remote}
+    uploaded = []
+    uploaded_bytes = 0
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(s3.upload_file, paths[key], bucket_name, key,
+                            ExtraArgs=get_upload_args(key), Config=TRANSFER_CONFIG): key
+            for key in changed
+        }
+        for future in as_completed(futures):
+            key = futures[future]
+            try:
+                future.result()
+            except Exception as e:
+                print(f"Failed to upload {key}: {str(e)}")
+                continue
+            manifest[key] = local[key]
+            uploaded.append(key)
+            uploaded_bytes += local[key]['size']
+    elapsed = time.perf_counter() - start
+
+    for i in range(0, len(removed), 1000):
+        batch = removed[i:i + 1000]
+        s3.delete_objects(Bucket=bucket_name, Delete={'Objects': [{'Key': key} for key in batch], 'Quiet': True})
+    if not delete:
+        manifest.update({key: entry for key, entry in remote.items() if key not in local})
+
+    save_remote_manifest(bucket_name, manifest)
+    print(f"Uploaded {len(uploaded)}/{len(changed)} files "
+          f"({uploaded_bytes / 1024 / 1024:.1f} MB in {elapsed:.1f}s), deleted {len(removed)}")
+
+    invalidation_paths = get_invalidation_paths(uploaded + removed)
+    if distribution_id and invalidation_paths:
+        from cloudfront_invalidate import create_cloudfront_invalidation
+        result = create_cloudfront_invalidation(distribution_id, invalidation_paths,
+                                                known_paths=get_invalidation_paths(list(local) + removed))
+        print(f"Invalidation {result['Id']} created for {len(invalidation_paths)} paths ({result['Status']})")
+    return invalidation_paths
+
+def deploy():
     bucket_name = BUCKET_NAME or f'cloudfront-s3-{uuid.uuid4().hex[:12]}'
     
     bucket_name = create_s3_bucket(bucket_name)
@@ -180,5 +346,23 @@ def main():
     print(f"CloudFront URL: https://{domain_name}")
     print("\nNote: Distribution deployment takes 15-20 minutes to complete.")
 
+def main(args):
+    if not args.sync:
+        deploy()
+        return
+    if not args.bucket:
+        raise SystemExit("--bucket is required with --sync")
+    sync_site(args.sync, args.bucket, args.distribution_id, delete=args.delete,
+              dry_run=args.dry_run, max_workers=args.max_workers)
+
 if __name__ == '__main__':
-    main()
+    parser = argparse.ArgumentParser(description="Deploy a CloudFront distribution or sync site content to it")
+    parser.add_argument("--sync", metavar="BUILD_DIR", help="Sync a local build folder instead of deploying")
+    parser.add_argument("--bucket", default=BUCKET_NAME, help="S3 bucket to sync to")
+    parser.add_argument("--distribution-id", default=os.getenv('CLOUDFRONT_DISTRIBUTION_ID'),
+                        help="CloudFront distribution to invalidate after the sync")
+    parser.add_argument("--delete", action="store_true", help="Delete objects that no longer exist locally")
+    parser.add_argument("--dry-run", action="store_true", help="Only show what would change")
+    parser.add_argument("--max-workers", type=int, default=SYNC_MAX_WORKERS, help="Concurrent file uploads")
+    args = parser.parse_args()
+    main(args)
@@ -1,34 +1,316 @@
 #!/usr/bin/env python
 
+"""
+DynamoDB Table Utility
+
+Subcommands:
+- put:    write one item
+- get:    read one or many items (batch_get_item, 100 keys per request)
+- load:   bulk load a CSV or JSONL file with concurrent batch writers
+- export: parallel segmented scan straight to JSONL or Parquet
+
+Bulk commands report throughput in items per second. Use --endpoint-url
+(or DYNAMODB_ENDPOINT_URL) to run against DynamoDB Local, e.g.
+
+    docker run -p 8000:8000 amazon/dynamodb-local
+    python dynamodb_tables.py --endpoint-url http://localhost:8000 --table t load items.jsonl
+
+Usage:
+    python dynamodb_tables.py --table t put --id 1 --value hello
+    python dynamodb_tables.py --table t get --id 1 2 3
+    python dynamodb_tables.py --table t get --keys-file keys.jsonl
+    python dynamodb_tables.py --table t load items.csv --workers 8
+    python dynamodb_tables.py --table t export items.jsonl --segments 8
+    python dynamodb_tables.py --table t export items_parquet --format parquet
+"""
+
 import argparse
 import boto3
+import csv
 import json
+import os
+import queue
+import random
+import threading
+import time
+from boto3.dynamodb.types import Binary
+from botocore.config import Config
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
 
 
-dynamo = boto3.resource('dynamodb')
+BATCH_GET_SIZE = 100  # Maximum keys per batch_get_item request
+BATCH_GET_MAX_RETRIES = 8
+BACKOFF_BASE = 0.05
+BACKOFF_MAX = 5.0
+LOAD_QUEUE_SIZE = 10000  # Items read ahead of the writers
+DEFAULT_WORKERS = 4
+DEFAULT_SEGMENTS = 4
+PROGRESS_INTERVAL = 10000  # Items between progress lines
 
+# Adaptive retries back off on throttling (including in batch_writer)
+BOTO_CONFIG = Config(retries={'max_attempts': 10, 'mode': 'adaptive'})
 
-if __name__ == '__main__':
-    parser = argparse.ArgumentParser()
-    parser.add_argument('--table', required=True)
-    parser.add_argument('--id', required=True)
-    parser.add_argument('--value')
-    args = parser.parse_arges()
 
+def get_resource(endpoint_url=None, region=None):
+    """Create a DynamoDB resource. Resources are not thread-safe, so each worker makes its own."""
+    session = boto3.session.Session()
+    return session.resource('dynamodb', endpoint_url=endpoint_url, region_name=region, config=BOTO_CONFIG)
+
+
+def get_key_names(table):
+    """Return the key attribute names of a table, hash key first."""
+    key_schema = sorted(table.key_schema, key=lambda k: k['KeyType'] != 'HASH')
+    return [k['AttributeName'] for k in key_schema]
+
+
+def to_plain(value):
+    """Convert DynamoDB values (Decimal, set, Binary) to JSON/Arrow friendly types."""
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    if isinstance(value, (set, frozenset)):
+        return sorted(to_plain(v) for v in value)
+    if isinstance(value, list):
+        return [to_plain(v) for v in value]
+    if isinstance(value, dict):
+        return {k: to_plain(v) for k, v in value.items()}
+    if isinstance(value, Binary):
+        return bytes(value)
+    return value
+
+
+def read_items(path):
+    """Yield items from a JSONL or CSV file (by extension). Empty CSV fields are omitted."""
+    if path.endswith('.csv'):
+        with open(path, newline='') as f:
+            for row in csv.DictReader(f):
+                yield {k: v for k, v in row.items() if v != ''}
+    else:
+        with open(path) as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line, parse_float=Decimal)
+
+
+def report(action, count, elapsed):
+    rate = count / elapsed if elapsed > 0 else 0.0
+    print(f"{action} {count} items in {elapsed:.2f}s ({rate:,.0f} items/s)")
+
+
+def put_item(table, key_names, key, value):
+    response = table.put_item(Item={key_names[0]: key, 'Value': value})
+    print(json.dumps(response, indent=2, default=str))
+
+
+def batch_get_items(resource, table_name, keys):
+    """
+    Fetch many items with batch_get_item, retrying unprocessed keys with backoff.
+
+    Args:
+        resource: DynamoDB resource
+        table_name (str): Table to read
+        keys (list): Key dicts, e.g. [{'Id': '1'}, {'Id': '2'}]
+
+    Returns:
+        list: Items found (missing keys are skipped)
+    """
+    items = []
+    for i in range(0, len(keys), BATCH_GET_SIZE):
+        request = {table_name: {'Keys': keys[i:i + BATCH_GET_SIZE]}}
+        for attempt in range(BATCH_GET_MAX_RETRIES + 1):
+            response = resource.batch_get_item(RequestItems=request)
+            items.extend(response['Responses'].get(table_name, []))
+            request = response.get('UnprocessedKeys')
+            if not request:
+                break
+            if attempt == BATCH_GET_MAX_RETRIES:
+                raise RuntimeError(f"{len(request[table_name]['Keys'])} keys still unprocessed after retries")
+            time.sleep(random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt)))
+    return items
+
+
+def load_items(path, table_name, workers=DEFAULT_WORKERS, endpoint_url=None, region=None):
+    """
+    Bulk load a CSV or JSONL file into a table.
+
+    One thread reads the file into a bounded queue and `workers` threads each
+    drain it through their own batch_writer, which sends 25-item
+    batch_write_item requests and resends unprocessed items. Items with a
+    key already seen in the same batch replace the earlier one.
+
+    Progress counts items queued in the batch writers, which buffer up to 25
+    items; a writer's items only count as written once it has flushed them all.
+
+    Returns:
+        int: Number of items written
+    """
+    # Resolve the key schema up front, so a missing table or permission fails here
+    key_names = get_key_names(get_resource(endpoint_url, region).Table(table_name))
+    items = queue.Queue(maxsize=LOAD_QUEUE_SIZE)
+    queued = [0] * workers
+    written = [0] * workers
+    errors = []
+
+    def write(index):
+        try:
+            table = get_resource(endpoint_url, region).Table(table_name)
+            with table.batch_writer(overwrite_by_pkeys=key_names) as batch:
+                while True:
+                    item = items.get()
+                    if item is None:
+                        break
+                    batch.put_item(Item=item)
+                    queued[index] += 1
+            # The batch writer has flushed its last items
+            written[index] = queued[index]
+        except Exception as e:
+            errors.append(e)
+            # Keep draining so the reader is never blocked
+            while items.get() is not None:
+                pass
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=write, args=(i,), daemon=True) for i in range(workers)]
+    for thread in threads:
+        thread.start()
+
+    count = 0
+    for item in read_items(path):
+        if errors:
+            # A writer failed: stop reading rather than queue items nobody writes
+            break
+        items.put(item)
+        count += 1
+        if count % PROGRESS_INTERVAL == 0:
+            elapsed = time.perf_counter() - start
+            print(f"  read {count} items, {sum(queued)} queued for writing ({sum(queued) / elapsed:,.0f} items/s)")
+    for _ in threads:
+        items.put(None)
+    for thread in threads:
+        thread.join()
+
+    if errors:
+        raise errors[0]
+    report("Loaded", sum(written), time.perf_counter() - start)
+    return sum(written)
+
+
+def export_items(output, table_name, segments=DEFAULT_SEGMENTS, output_format='jsonl',
+                 endpoint_url=None, region=None):
+    """
+    Export a table with a parallel scan of `segments` segments.
+
+    Each page is written as soon as it arrives. JSONL goes to a single file;
+    Parquet goes to a directory with one file per page (schemas can differ
+    between pages since items are schemaless).
+
+    Returns:
+        int: Number of items exported
+    """
+    if output_format == 'parquet':
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        os.makedirs(output, exist_ok=True)
+        out_file = None
+    else:
+        out_file = open(output, 'w')
+    lock = threading.Lock()
+    counts = [0] * segments
+
+    def scan(segment):
+        table = get_resource(endpoint_url, region).Table(table_name)
+        kwargs = {'Segment': segment, 'TotalSegments': segments}
+        page = 0
+        while True:
+            response = table.scan(**kwargs)
+            rows = [to_plain(item) for item in response['Items']]
+            if output_format == 'parquet':
+                if rows:
+                    pq.write_table(pa.Table.from_pylist(rows),
+                                   os.path.join(output, f'part-{segment:04d}-{page:05d}.parquet'))
+            else:
+                lines = ''.join(json.dumps(row, default=str) + '\n' for row in rows)
+                with lock:
+                    out_file.write(lines)
+            counts[segment] += len(rows)
+            page += 1
+            if 'LastEvaluatedKey' not in response:
+                return
+            kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    start = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=segments) as executor:
+            list(executor.map(scan, range(segments)))
+    finally:
+        if out_file is not None:
+            out_file.close()
+
+    report("Exported", sum(counts), time.perf_counter() - start)
+    return sum(counts)
+
+
+def read_keys(args, key_names):
+    if args.keys_file:
+        keys = list(read_items(args.keys_file))
+        return [{k: key[k] for k in key_names} for key in keys]
+    return [{key_names[0]: key} for key in args.id]
+
+
+def main(args):
+    if args.command == 'load':
+        load_items(args.file, args.table, args.workers, args.endpoint_url, args.region)
+        return
+    if args.command == 'export':
+        export_items(args.output, args.table, args.segments, args.format, args.endpoint_url, args.region)
+        return
+
+    dynamo = get_resource(args.endpoint_url, args.region)
     table = dynamo.Table(args.table)
     table.load()
+    key_names = get_key_names(table)
 
-    if args.value:
-        response = table.put_item(
-            Item = {
-                'Id': args.id
-                'Value': args.value
-            }
-        )
-    else:
-        response = table.get_item(
-             Key = {
-                 'Id': args.id
-             }
-        )
-    print(json.dumps(response, indent=2, default=str)
+    if args.command == 'put':
+        put_item(table, key_names, args.id, args.value)
+    elif args.command == 'get':
+        keys = read_keys(args, key_names)
+        if len(keys) == 1 and not args.keys_file:
+            response = table.get_item(Key=keys[0])
+            print(json.dumps(response, indent=2, default=str))
+            return
+        start = time.perf_counter()
+        items = batch_get_items(dynamo, args.table, keys)
+        elapsed = time.perf_counter() - start
+        for item in items:
+            print(json.dumps(to_plain(item), default=str))
+        report("Fetched", len(items), elapsed)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='DynamoDB table utility')
+    parser.add_argument('--table', required=True)
+    parser.add_argument('--endpoint-url', default=os.getenv('DYNAMODB_ENDPOINT_URL'),
+                        help='e.g. http://localhost:8000 for DynamoDB Local')
+    parser.add_argument('--region', default=None)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    put_parser = subparsers.add_parser('put', help='Write one item')
+    put_parser.add_argument('--id', required=True)
+    put_parser.add_argument('--value', required=True)
+
+    get_parser = subparsers.add_parser('get', help='Read one or many items')
+    get_group = get_parser.add_mutually_exclusive_group(required=True)
+    get_group.add_argument('--id', nargs='+', help='Hash key values')
+    get_group.add_argument('--keys-file', help='CSV or JSONL file of keys')
+
+    load_parser = subparsers.add_parser('load', help='Bulk load a CSV or JSONL file')
+    load_parser.add_argument('file')
+    load_parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help='Concurrent batch writers')
+
+    export_parser = subparsers.add_parser('export', help='Export the table with a parallel scan')
+    export_parser.add_argument('output', help='JSONL file, or directory for Parquet')
+    export_parser.add_argument('--format', choices=['jsonl', 'parquet'], default='jsonl')
+    export_parser.add_argument('--segments', type=int, default=DEFAULT_SEGMENTS, help='Parallel scan segments')
+
+    args = parser.parse_args()
+    main(args)
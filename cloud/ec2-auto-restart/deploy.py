@@ -9,7 +9,8 @@ import time
 import zipfile
 import io
 
-INSTANCE_ID = "i-..."
+INSTANCE_ID = "i-..."  # One or more comma-separated instance IDs
+TAG_SELECTOR = ""  # Optional, e.g. "autorestart=yes" to manage every instance with that tag
 REGIONS = "us-east-1,ap-southeast-1"
 FUNCTION_NAME = "ec2-start-stop"
 REGION = "ap-southeast-1"
@@ -90,7 +91,7 @@ def create_lambda_function(role_arn):
                 Role=role_arn,
                 Handler='ec2_start_stop_lambda.lambda_handler',
                 Code={'ZipFile': zip_buffer.read()},
-                Environment={'Variables': {'INSTANCE_ID': INSTANCE_ID, 'REGIONS': REGIONS}}
+                Environment={'Variables': {'INSTANCE_IDS': INSTANCE_ID, 'TAG_SELECTOR': TAG_SELECTOR, 'REGIONS': REGIONS}}
             )
             return response['FunctionArn']
 
@@ -123,7 +124,7 @@ def add_eventbridge_target(lambda_arn):
         Targets=[{
             'Id': '1',
             'Arn': lambda_arn,
-            'Input': json.dumps({'action': 'check_and_start', 'instance_id': INSTANCE_ID})
+            'Input': json.dumps({'action': 'check_and_start', 'instance_ids': INSTANCE_ID, 'tag': TAG_SELECTOR})
         }]
     )
 
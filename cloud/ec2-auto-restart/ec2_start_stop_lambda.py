@@ -1,48 +1,187 @@
 import boto3
 import json
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Kept across warm invocations
+_clients = {}
+_clients_lock = threading.Lock()
+_instance_regions = {}  # instance ID -> region it was last found in
+
+START_STOP_BATCH_SIZE = 50  # Instance IDs per start_instances / stop_instances call
+DESCRIBE_FILTER_SIZE = 200  # Values per describe_instances filter
+LIVE_STATES = ['pending', 'running', 'stopping', 'stopped']
+
+def get_ec2(region):
+    """Return a cached EC2 client for a region (clients are thread-safe)."""
+    with _clients_lock:
+        if region not in _clients:
+            _clients[region] = boto3.client('ec2', region_name=region)
+        return _clients[region]
+
+def parse_list(value):
+    if not value:
+        return []
+    if isinstance(value, str):
+        return [v.strip() for v in value.split(',') if v.strip()]
+    return list(value)
+
+def parse_tag(value):
+    """Accept {'key': K, 'value': V} or 'K=V' (value optional). Returns (key, value) or None."""
+    if not value:
+        return None
+    if isinstance(value, dict):
+        return value['key'], value.get('value')
+    key, _, tag_value = value.partition('=')
+    return key.strip(), tag_value.strip() or None
+
+def describe_region(region, instance_ids=None, tag=None):
+    """
+    Find instances in one region with a single filtered (paginated) describe.
+
+    Returns:
+        dict: instance ID -> state name
+    """
+    filters = [{'Name': 'instance-state-name', 'Values': LIVE_STATES}]
+    if tag:
+        key, value = tag
+        filters.append({'Name': f'tag:{key}', 'Values': [value]} if value else {'Name': 'tag-key', 'Values': [key]})
+
+    states = {}
+    paginator = get_ec2(region).get_paginator('describe_instances')
+    # Filtering by instance-id (rather than InstanceIds) ignores IDs from other regions instead of failing
+    id_batches = [instance_ids[i:i + DESCRIBE_FILTER_SIZE] for i in range(0, len(instance_ids), DESCRIBE_FILTER_SIZE)] if instance_ids else [None]
+    for ids in id_batches:
+        batch_filters = filters + ([{'Name': 'instance-id', 'Values': ids}] if ids else [])
+        for page in paginator.paginate(Filters=batch_filters):
+            for reservation in page['Reservations']:
+                for instance in reservation['Instances']:
+                    states[instance['InstanceId']] = instance['State']['Name']
+    return states
+
+def find_instances(regions, instance_ids=None, tag=None):
+    """
+    Locate instances by ID and/or tag, describing regions concurrently.
+
+    IDs with a cached region are looked up there first; only IDs that are
+    not found that way are searched for in the other regions.
+
+    Returns:
+        tuple: ({region: {instance ID: state}}, [error messages])
+    """
+    found = {region: {} for region in regions}
+    errors = []
+    instance_ids = instance_ids or []
+
+    def run(lookups):
+        with ThreadPoolExecutor(max_workers=max(1, len(lookups))) as executor:
+            futures = {executor.submit(describe_region, region, ids, tag): region for region, ids in lookups.items()}
+            for future, region in futures.items():
+                try:
+                    found[region].update(future.result())
+                except Exception as e:
+                    errors.append(f'{region}: {str(e)}')
+
+    if tag:
+        # Tag membership can change, so every region is searched; IDs narrow it down if also given
+        run({region: instance_ids for region in regions})
+    else:
+        cached = {}
+        for instance_id in instance_ids:
+            region = _instance_regions.get(instance_id)
+            if region in found:
+                cached.setdefault(region, []).append(instance_id)
+        if cached:
+            run(cached)
+
+        located = {i for states in found.values() for i in states}
+        remaining = [i for i in instance_ids if i not in located]
+        if remaining:
+            run({region: remaining for region in regions})
+
+    for region, states in found.items():
+        for instance_id in states:
+            _instance_regions[instance_id] = region
+    for instance_id in instance_ids:
+        if not any(instance_id in states for states in found.values()):
+            _instance_regions.pop(instance_id, None)
+    return found, errors
+
+def apply_action(region, instance_ids, action):
+    """
+    Start or stop instances in batches, falling back to one call per instance
+    if a batch fails (e.g. one instance is in the wrong state).
+
+    Returns:
+        list: Result messages
+    """
+    ec2 = get_ec2(region)
+    call = ec2.start_instances if action == 'start' else ec2.stop_instances
+    verb = 'Started' if action == 'start' else 'Stopped'
+
+    results = []
+    for i in range(0, len(instance_ids), START_STOP_BATCH_SIZE):
+        batch = instance_ids[i:i + START_STOP_BATCH_SIZE]
+        try:
+            call(InstanceIds=batch)
+            results.extend(f'{region}: {verb} {instance_id}' for instance_id in batch)
+        except Exception:
+            for instance_id in batch:
+                try:
+                    call(InstanceIds=[instance_id])
+                    results.append(f'{region}: {verb} {instance_id}')
+                except Exception as e:
+                    results.append(f'{region}: {instance_id}: {str(e)}')
+    return results
 
 def lambda_handler(event, context):
     """
     Manages EC2 instance state across multiple AWS regions.
-    
+
     Args:
         event: Lambda event containing:
-            - instance_id: EC2 instance ID (required)
+            - instance_ids: EC2 instance IDs, list or comma-separated
+            - instance_id: single EC2 instance ID (still accepted)
+            - tag: tag selector, 'Key=Value', 'Key' or {'key': ..., 'value': ...}
+              (at least one of instance_ids, instance_id or tag is required)
             - action: 'check_and_start' (default), 'start', or 'stop'
             - regions: Comma-separated regions (default: 'us-east-1,ap-southeast-1')
         context: Lambda context object
-    
+
     Returns:
-        dict: Status code and results for each region
+        dict: Status code and results for each instance
     """
-    instance_id = event.get('instance_id') or os.environ.get('INSTANCE_ID')
+    instance_ids = parse_list(event.get('instance_ids') or event.get('instance_id')
+                              or os.environ.get('INSTANCE_IDS') or os.environ.get('INSTANCE_ID'))
+    tag = parse_tag(event.get('tag') or os.environ.get('TAG_SELECTOR'))
     action = event.get('action', 'check_and_start')
-    regions = event.get('regions') or os.environ.get('REGIONS', 'us-east-1,ap-southeast-1')
-    
-    if not instance_id:
-        return {'statusCode': 400, 'body': 'instance_id required'}
-    
-    if isinstance(regions, str):
-        regions = [r.strip() for r in regions.split(',')]
-    
-    results = []
-    for region in regions:
-        ec2 = boto3.client('ec2', region_name=region)
-        
-        try:
-            response = ec2.describe_instances(InstanceIds=[instance_id])
-            state = response['Reservations'][0]['Instances'][0]['State']['Name']
-            
-            if action == 'start' or (action == 'check_and_start' and state == 'stopped'):
-                ec2.start_instances(InstanceIds=[instance_id])
-                results.append(f'{region}: Started {instance_id}')
-            elif action == 'stop':
-                ec2.stop_instances(InstanceIds=[instance_id])
-                results.append(f'{region}: Stopped {instance_id}')
+    regions = parse_list(event.get('regions') or os.environ.get('REGIONS', 'us-east-1,ap-southeast-1'))
+
+    if not instance_ids and not tag:
+        return {'statusCode': 400, 'body': 'instance_id, instance_ids or tag required'}
+
+    found, results = find_instances(regions, instance_ids, tag)
+
+    located = {instance_id for states in found.values() for instance_id in states}
+    results.extend(f'{instance_id}: not found' for instance_id in instance_ids if instance_id not in located)
+
+    to_change = {}
+    for region, states in found.items():
+        for instance_id, state in sorted(states.items()):
+            if action == 'stop' and state in ('pending', 'running'):
+                to_change.setdefault(region, []).append(instance_id)
+            elif action == 'start' and state in ('stopped', 'stopping'):
+                to_change.setdefault(region, []).append(instance_id)
+            elif action == 'check_and_start' and state == 'stopped':
+                to_change.setdefault(region, []).append(instance_id)
             else:
                 results.append(f'{region}: {instance_id} is {state}')
-        except Exception as e:
-            results.append(f'{region}: {str(e)}')
-    
+
+    if to_change:
+        change = 'stop' if action == 'stop' else 'start'
+        with ThreadPoolExecutor(max_workers=len(to_change)) as executor:
+            for region_results in executor.map(lambda region: apply_action(region, to_change[region], change), to_change):
+                results.extend(region_results)
+
     return {'statusCode': 200, 'body': ', '.join(results)}
@@ -2,17 +2,178 @@
 
 # Description:
 # - this is a demo project showing how flask-restful can be used.
+# - objects are kept in a thread-safe in-memory store: it is split into
+#   shards, each with its own lock and LRU eviction, so concurrent requests
+#   for different objects rarely wait on each other
+# - GET returns an ETag and answers If-None-Match with 304 Not Modified;
+#   PUT/DELETE honour If-Match (including *) and answer 412 when it fails
+# - the store can be snapshotted to a JSON file and reloaded on start
+# - the app runs under waitress or gunicorn with N worker threads. A single
+#   process is used on purpose: the store lives in process memory, so
+#   separate worker processes would each see different data.
 #
 # Requirements:
-# pip install Flask flask_restful
+# pip install Flask flask_restful waitress   (or gunicorn instead of waitress)
+#
+# Usage:
+# python flask_restfl.py                                  # waitress if installed, else the dev server
+# python flask_restfl.py --server waitress --threads 16 --snapshot objects.json
+# python flask_restfl.py --server gunicorn --threads 16 --port 8000 --no-browser
+
+import argparse
+import atexit
+import hashlib
+import json
+import os
+import signal
+import sys
+import threading
+import webbrowser
+import zlib
+from collections import OrderedDict
 
 import flask
 import flask_restful
-import webbrowser
+
+
+DEFAULT_SHARDS = 16
+DEFAULT_MAX_ITEMS = 100000
+DEFAULT_THREADS = 8
+DEFAULT_SNAPSHOT_INTERVAL = 60  # seconds
+
+
+def etag_matches(current, if_match):
+    """If-Match check: `if_match` is '*' (any current entry) or a list of ETags."""
+    if current is None:
+        return False
+    return if_match == '*' or current[1] in if_match
+
+
+def make_etag(obj):
+    """Strong ETag from the canonical JSON of an object."""
+    data = json.dumps(obj, sort_keys=True, separators=(',', ':')).encode('utf-8')
+    return '"' + hashlib.sha1(data).hexdigest() + '"'
+
+
+class ShardedLRUStore:
+    """
+    In-memory key/value store split into lock-striped shards.
+
+    Each shard is an OrderedDict in LRU order with its own lock and an equal
+    share of `max_items`; the least recently used entry of a shard is evicted
+    when it is full. Values are stored with their ETag so reads never hash.
+    """
+
+    def __init__(self, shards=DEFAULT_SHARDS, max_items=DEFAULT_MAX_ITEMS):
+        self.shard_capacity = max(1, -(-max_items // shards))
+        self._shards = [OrderedDict() for _ in range(shards)]
+        self._locks = [threading.Lock() for _ in range(shards)]
+        self._dirty = threading.Event()
+        self._evictions_lock = threading.Lock()  # shared by all shards
+        self.evictions = 0
+
+    def _shard(self, key):
+        # crc32 is stable across processes, unlike hash() of a str
+        index = zlib.crc32(key.encode('utf-8')) % len(self._shards)
+        return self._shards[index], self._locks[index]
+
+    def get(self, key):
+        """Return (value, etag), or None if the key is not stored."""
+        shard, lock = self._shard(key)
+        with lock:
+            entry = shard.get(key)
+            if entry is not None:
+                shard.move_to_end(key)
+            return entry
+
+    def put(self, key, value, if_absent=False, if_match=None):
+        """
+        Store a value. Returns (stored, etag, created).
+
+        With if_absent, an existing key is left alone (stored is False).
+        With if_match ('*' or a list of ETags), the value is only stored if
+        the key exists and, unless '*', its current ETag is in the list.
+        """
+        etag = make_etag(value)
+        shard, lock = self._shard(key)
+        with lock:
+            current = shard.get(key)
+            if if_absent and current is not None:
+                return False, current[1], False
+            if if_match is not None and not etag_matches(current, if_match):
+                return False, current[1] if current else None, False
+            shard[key] = (value, etag)
+            shard.move_to_end(key)
+            while len(shard) > self.shard_capacity:
+                shard.popitem(last=False)
+                with self._evictions_lock:
+                    self.evictions += 1
+        self._dirty.set()
+        return True, etag, current is None
+
+    def delete(self, key, if_match=None):
+        """
+        Remove a key, with the same if_match check as put. Returns (deleted, etag):
+        etag is the current ETag, or None if the key is not stored.
+        """
+        shard, lock = self._shard(key)
+        with lock:
+            current = shard.get(key)
+            if current is None or (if_match is not None and not etag_matches(current, if_match)):
+                return False, current[1] if current else None
+            del shard[key]
+        self._dirty.set()
+        return True, current[1]
+
+    def __len__(self):
+        return sum(len(shard) for shard in self._shards)
+
+    def items(self):
+        """Copy of all (key, value) pairs, taking one shard lock at a time."""
+        items = []
+        for shard, lock in zip(self._shards, self._locks):
+            with lock:
+                items.extend((key, value) for key, (value, _) in shard.items())
+        return items
+
+    def save_snapshot(self, path):
+        """Write all entries to a JSON file atomically."""
+        self._dirty.clear()
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(dict(self.items()), f)
+        os.replace(tmp_path, path)
+
+    def load_snapshot(self, path):
+        """Load entries from a snapshot file, if it exists. Returns the number loaded."""
+        if not os.path.isfile(path):
+            return 0
+        with open(path) as f:
+            data = json.load(f)
+        for key, value in data.items():
+            self.put(key, value)
+        self._dirty.clear()
+        return len(data)
+
+    def start_snapshots(self, path, interval=DEFAULT_SNAPSHOT_INTERVAL):
+        """Save a snapshot every `interval` seconds when something changed, and at exit."""
+        def run():
+            while True:
+                self._dirty.wait()
+                threading.Event().wait(interval)
+                self.save_snapshot(path)
+
+        threading.Thread(target=run, daemon=True).start()
+        atexit.register(self.save_if_dirty, path)
+
+    def save_if_dirty(self, path):
+        if self._dirty.is_set():
+            self.save_snapshot(path)
 
 
 app = flask.Flask(__name__, template_folder='flask')
 api = flask_restful.Api(app)
+store = ShardedLRUStore()
 
 objs = [
     {
@@ -24,27 +185,119 @@ objs = [
         'description': 'this is another object'
     }
 ]
+for obj in objs:
+    store.put(obj['name'], obj)
+
+
+def get_if_match():
+    """None without If-Match, '*' for If-Match: *, else the list of quoted ETags."""
+    if_match = flask.request.if_match
+    if if_match.star_tag:
+        return '*'
+    if not if_match:
+        return None
+    return ['"' + etag + '"' for etag in if_match]
 
-class MyObject(flask_restful. Resource):
+
+class MyObject(flask_restful.Resource):
 
     def get(self, name):
-        for obj in objs:
-            if obj['name'] == name:
-                return obj
-        return {'error': 'Resource not found'}
+        entry = store.get(name)
+        if entry is None:
+            return {'error': 'Resource not found'}, 404
+        obj, etag = entry
+        if etag.strip('"') in flask.request.if_none_match:
+            return '', 304, {'ETag': etag}
+        return obj, 200, {'ETag': etag}
+
+    def post(self, name):
+        data = flask.request.get_json()
+        stored, etag, _ = store.put(name, data, if_absent=True)
+        if not stored:
+            return {'error': 'Resource already exists'}, 409, {'ETag': etag}
+        return data, 201, {'ETag': etag}
 
-    def post(self):
+    def put(self, name):
         data = flask.request.get_json()
-        for obj in objs:
-             if obj['name'] == name:
-                 return {'error': 'Resource already exists'}
-        objs.append(data)
+        if_match = get_if_match()
+        stored, etag, created = store.put(name, data, if_match=if_match)
+        if not stored:
+            return {'error': 'Precondition failed'}, 412, ({'ETag': etag} if etag else {})
+        return data, 201 if created else 200, {'ETag': etag}
+
+    def delete(self, name):
+        if_match = get_if_match()
+        deleted, etag = store.delete(name, if_match=if_match)
+        if not deleted:
+            # Like PUT, a failed If-Match is 412 even if the key is missing
+            if if_match is None:
+                return {'error': 'Resource not found'}, 404
+            return {'error': 'Precondition failed'}, 412, ({'ETag': etag} if etag else {})
+        return '', 204
 
 
 api.add_resource(MyObject, '/object/<string:name>')
 
 
+def serve(server, host, port, threads, snapshot=None, snapshot_interval=DEFAULT_SNAPSHOT_INTERVAL):
+    if server == 'waitress':
+        import waitress
+        if snapshot:
+            store.start_snapshots(snapshot, snapshot_interval)
+            # Exit normally on SIGTERM so the final snapshot is written
+            signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+        waitress.serve(app, host=host, port=port, threads=threads)
+    elif server == 'gunicorn':
+        from gunicorn.app.base import BaseApplication
+
+        class GunicornApp(BaseApplication):
+            def load_config(self):
+                self.cfg.set('bind', f'{host}:{port}')
+                self.cfg.set('workers', 1)
+                self.cfg.set('worker_class', 'gthread')
+                self.cfg.set('threads', threads)
+                if snapshot:
+                    # The store lives in the forked worker, so snapshots run there
+                    self.cfg.set('post_worker_init', lambda worker: store.start_snapshots(snapshot, snapshot_interval))
+                    self.cfg.set('worker_exit', lambda server, worker: store.save_if_dirty(snapshot))
+
+            def load(self):
+                return app
+
+        GunicornApp().run()
+    else:
+        if snapshot:
+            store.start_snapshots(snapshot, snapshot_interval)
+        app.run(host=host, port=port, debug=True, threaded=True)
+
+
+def default_server():
+    try:
+        import waitress  # noqa: F401
+        return 'waitress'
+    except ImportError:
+        return 'dev'
+
+
 if __name__ == "__main__":
-    webbrowser.open_new('http://127.0.0.1:5000/object/my_object')
-    app.run(host='0.0.0.0', port=5000, debug=True)
+    parser = argparse.ArgumentParser(description='flask-restful demo with an in-memory object store')
+    parser.add_argument('--server', choices=['dev', 'waitress', 'gunicorn'], default=default_server())
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--threads', type=int, default=DEFAULT_THREADS, help='Worker threads')
+    parser.add_argument('--shards', type=int, default=DEFAULT_SHARDS)
+    parser.add_argument('--max-items', type=int, default=DEFAULT_MAX_ITEMS, help='Entries kept before LRU eviction')
+    parser.add_argument('--snapshot', help='JSON file to load on start and save changes to')
+    parser.add_argument('--snapshot-interval', type=float, default=DEFAULT_SNAPSHOT_INTERVAL)
+    parser.add_argument('--no-browser', action='store_true')
+    args = parser.parse_args()
+
+    store = ShardedLRUStore(args.shards, args.max_items)
+    for obj in objs:
+        store.put(obj['name'], obj)
+    if args.snapshot:
+        print(f"Loaded {store.load_snapshot(args.snapshot)} objects from {args.snapshot}")
 
+    if not args.no_browser:
+        webbrowser.open_new(f'http://127.0.0.1:{args.port}/object/my_object')
+    serve(args.server, args.host, args.port, args.threads, args.snapshot, args.snapshot_interval)
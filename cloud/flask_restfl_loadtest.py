@@ -0,0 +1,169 @@
+#!/usr/bin/env python
+
+"""
+Load test for flask_restfl.py
+
+Starts the flask_restfl app locally with increasing numbers of worker
+threads, drives it with a mixed workload from several client processes, and
+reports throughput and latency for each setting, so the scaling with workers
+can be checked on the machine at hand.
+
+Workload (per request, chosen at random):
+- GET with If-None-Match of the last ETag seen (expects 304)
+- plain GET
+- PUT of a new value (--write-ratio)
+
+Requirements:
+    pip install Flask flask_restful waitress requests
+
+Usage:
+    python flask_restfl_loadtest.py
+    python flask_restfl_loadtest.py --threads 1 2 4 8 16 --duration 10 --clients 4 --client-threads 16
+    python flask_restfl_loadtest.py --server gunicorn --objects 10000 --write-ratio 0.2
+"""
+
+import argparse
+import multiprocessing
+import os
+import random
+import subprocess
+import sys
+import time
+
+import requests
+
+from restapi import percentile
+
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+STARTUP_TIMEOUT = 15  # seconds
+
+
+def start_server(server, port, threads):
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(SCRIPT_DIR, 'flask_restfl.py'), '--server', server,
+         '--host', '127.0.0.1', '--port', str(port), '--threads', str(threads), '--no-browser'],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while time.monotonic() < deadline:
+        try:
+            requests.get(f'http://127.0.0.1:{port}/object/my_object', timeout=1)
+            return process
+        except requests.ConnectionError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError(f'Server did not start on port {port}')
+
+
+def seed_objects(base_url, count):
+    with requests.Session() as session:
+        for i in range(count):
+            session.put(f'{base_url}/object/obj-{i}', json={'name': f'obj-{i}', 'value': i})
+
+
+def client_worker(base_url, objects, duration, threads, write_ratio, conditional_ratio, seed):
+    """Run `threads` client threads for `duration` seconds. Returns (latencies in ms, status counts)."""
+    import threading
+
+    latencies = []
+    statuses = {}
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def run(thread_seed):
+        rng = random.Random(thread_seed)
+        etags = {}
+        local_latencies = []
+        local_statuses = {}
+        with requests.Session() as session:
+            while time.monotonic() < deadline:
+                name = f'obj-{rng.randrange(objects)}'
+                url = f'{base_url}/object/{name}'
+                roll = rng.random()
+                start = time.perf_counter()
+                try:
+                    if roll < write_ratio:
+                        response = session.put(url, json={'name': name, 'value': rng.random()})
+                    elif roll < write_ratio + conditional_ratio and name in etags:
+                        response = session.get(url, headers={'If-None-Match': etags[name]})
+                    else:
+                        response = session.get(url)
+                    status = response.status_code
+                    if 'ETag' in response.headers:
+                        etags[name] = response.headers['ETag']
+                except requests.RequestException:
+                    status = 'error'
+                local_latencies.append((time.perf_counter() - start) * 1000)
+                local_statuses[status] = local_statuses.get(status, 0) + 1
+        with lock:
+            latencies.extend(local_latencies)
+            for status, count in local_statuses.items():
+                statuses[status] = statuses.get(status, 0) + count
+
+    workers = [threading.Thread(target=run, args=(seed * 1000 + i,)) for i in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return latencies, statuses
+
+
+def run_load(base_url, args):
+    jobs = [(base_url, args.objects, args.duration, args.client_threads, args.write_ratio,
+             args.conditional_ratio, seed) for seed in range(args.clients)]
+    start = time.perf_counter()
+    with multiprocessing.Pool(args.clients) as pool:
+        results = pool.starmap(client_worker, jobs)
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(latency for result in results for latency in result[0])
+    statuses = {}
+    for _, result_statuses in results:
+        for status, count in result_statuses.items():
+            statuses[status] = statuses.get(status, 0) + count
+    return {
+        'requests': len(latencies),
+        'rps': len(latencies) / elapsed if elapsed else 0.0,
+        'p50': percentile(latencies, 50),
+        'p99': percentile(latencies, 99),
+        'not_modified': statuses.get(304, 0),
+        'errors': sum(count for status, count in statuses.items() if status == 'error' or status >= 500),
+    }
+
+
+def main(args):
+    print(f"Server: {args.server}, {args.objects} objects, {args.clients} client processes x "
+          f"{args.client_threads} threads, {args.duration}s per run, CPUs: {os.cpu_count()}")
+    print(f"\n{'THREADS':>8} {'REQUESTS':>9} {'REQ/S':>9} {'SPEEDUP':>8} {'P50 (ms)':>9} {'P99 (ms)':>9} {'304s':>7} {'ERRORS':>7}")
+    print("-" * 74)
+
+    baseline = None
+    for threads in args.threads:
+        process = start_server(args.server, args.port, threads)
+        try:
+            base_url = f'http://127.0.0.1:{args.port}'
+            seed_objects(base_url, args.objects)
+            result = run_load(base_url, args)
+        finally:
+            process.terminate()
+            process.wait()
+        baseline = baseline or result['rps']
+        print(f"{threads:8d} {result['requests']:9d} {result['rps']:9.1f} {result['rps'] / baseline:7.2f}x "
+              f"{result['p50']:9.1f} {result['p99']:9.1f} {result['not_modified']:7d} {result['errors']:7d}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Load test flask_restfl.py with increasing worker threads')
+    parser.add_argument('--server', choices=['waitress', 'gunicorn'], default='waitress')
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 2, 4, 8], help='Server worker threads to test')
+    parser.add_argument('--port', type=int, default=5055)
+    parser.add_argument('--objects', type=int, default=1000, help='Objects seeded before each run')
+    parser.add_argument('--duration', type=float, default=5.0, help='Seconds per run')
+    parser.add_argument('--clients', type=int, default=4, help='Client processes')
+    parser.add_argument('--client-threads', type=int, default=8, help='Threads per client process')
+    parser.add_argument('--write-ratio', type=float, default=0.1, help='Fraction of requests that are PUTs')
+    parser.add_argument('--conditional-ratio', type=float, default=0.5,
+                        help='Fraction of requests that are conditional GETs (If-None-Match)')
+    args = parser.parse_args()
+    main(args)
@@ -2,94 +2,208 @@
 
 import argparse
 import boto3
-from typing import List
+import fnmatch
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Optional, Tuple
 
 
-def check_and_update_lambda_runtimes_single_region(region: str, old_runtime: str, new_runtime: str):
+def find_functions_single_region(lambda_client, old_runtime: str) -> List[str]:
     """
-    Check Lambda functions in a single region for specific runtime and update if needed.
-    
+    Find Lambda functions in a single region that use a specific runtime.
+
     Args:
-        region: AWS region to check
+        lambda_client: Lambda client for the region to check
+        old_runtime: Runtime to check for (e.g., 'python3.9')
+
+    Returns:
+        Names of the functions using old_runtime
+    """
+    # Get all Lambda functions in the region
+    paginator = lambda_client.get_paginator('list_functions')
+
+    function_names = []
+    for page in paginator.paginate():
+        for function in page['Functions']:
+            if function.get('Runtime', 'N/A') == old_runtime:
+                function_names.append(function['FunctionName'])
+    return function_names
+
+
+def find_functions(regions: List[str], old_runtime: str) -> Dict[str, List[str]]:
+    """
+    Find Lambda functions using a specific runtime in all regions in parallel.
+
+    Args:
+        regions: List of AWS regions to check
         old_runtime: Runtime to check for (e.g., 'python3.9')
+
+    Returns:
+        Dictionary mapping each region to the function names found there
+    """
+    # boto3.client() is not thread-safe on the default session, so create the clients here
+    clients = {region: boto3.client('lambda', region_name=region) for region in regions}
+    found = {}
+    with ThreadPoolExecutor(max_workers=max(1, len(regions))) as executor:
+        futures = {executor.submit(find_functions_single_region, clients[region], old_runtime): region
+                   for region in regions}
+        for future in as_completed(futures):
+            region = futures[future]
+            try:
+                found[region] = future.result()
+            except Exception as e:
+                print(f"Error accessing region {region}: {str(e)}")
+                found[region] = []
+    return {region: found[region] for region in regions}
+
+
+def select_functions(found: Dict[str, List[str]], new_runtime: str,
+                     selection: Optional[str] = None) -> List[Tuple[str, str]]:
+    """
+    Choose which of the found functions to update with a single prompt.
+
+    Args:
+        found: Dictionary mapping each region to function names
+        new_runtime: Runtime to upgrade to (shown in the prompt)
+        selection: 'all', 'none' or a glob pattern; prompts if not given.
+                   Patterns match the function name or 'region/name'.
+
+    Returns:
+        List of (region, function name) pairs to update
+    """
+    candidates = [(region, name) for region, names in found.items() for name in names]
+
+    print(f"\nFound {len(candidates)} functions to update:")
+    for region, name in candidates:
+        print(f"  {region:16} {name}")
+
+    while True:
+        if selection is None:
+            choice = input(f"\nUpdate to {new_runtime}? [a]ll, [n]one, or a pattern (e.g. 'prod-*', 'us-east-1/*'): ").strip()
+        else:
+            choice = selection
+
+        if choice.lower() in ['a', 'all']:
+            return candidates
+        if choice.lower() in ['', 'n', 'none']:
+            return []
+
+        selected = [
+            (region, name) for region, name in candidates
+            if fnmatch.fnmatch(name, choice) or fnmatch.fnmatch(f'{region}/{name}', choice)
+        ]
+        if selection is not None:
+            return selected
+
+        print(f"\nPattern '{choice}' matches {len(selected)} functions:")
+        for region, name in selected:
+            print(f"  {region:16} {name}")
+        if input("Update these? (y/N): ").lower() == 'y':
+            return selected
+
+
+def update_functions(selected: List[Tuple[str, str]], new_runtime: str, max_workers_per_region: int = 4):
+    """
+    Update the selected functions concurrently, limiting concurrency per region.
+
+    Args:
+        selected: List of (region, function name) pairs
         new_runtime: Runtime to upgrade to (e.g., 'python3.12')
+        max_workers_per_region: Maximum concurrent updates in any one region
     """
-    print(f"\n=== Checking region: {region} ===")
-    
-    try:
-        lambda_client = boto3.client('lambda', region_name=region)
-        
-        # Get all Lambda functions in the region
-        paginator = lambda_client.get_paginator('list_functions')
-        
-        functions_to_update = []
-        
-        for page in paginator.paginate():
-            for function in page['Functions']:
-                function_name = function['FunctionName']
-                runtime = function.get('Runtime', 'N/A')
-                
-                if runtime == old_runtime:
-                    functions_to_update.append(function_name)
-                    print(f"Found function '{function_name}' using {old_runtime}")
-        
-        if not functions_to_update:
-            print(f"No functions found using {old_runtime}")
-            return
-        
-        # Update functions with individual confirmation
-        print(f"\nFound {len(functions_to_update)} functions to update:")
-        
-        for function_name in functions_to_update:
-            confirm = input(f"Update '{function_name}' to {new_runtime}? (y/N): ")
-            if confirm.lower() != 'y':
-                print(f"⏭️  Skipped '{function_name}'")
-                continue
-            
+    regions = sorted({region for region, _ in selected})
+    clients = {region: boto3.client('lambda', region_name=region) for region in regions}
+    limits = {region: threading.Semaphore(max_workers_per_region) for region in regions}
+
+    def update(region, function_name):
+        with limits[region]:
+            clients[region].update_function_configuration(
+                FunctionName=function_name,
+                Runtime=new_runtime
+            )
+
+    with ThreadPoolExecutor(max_workers=max(1, len(regions) * max_workers_per_region)) as executor:
+        futures = {executor.submit(update, region, name): (region, name) for region, name in selected}
+        for future in as_completed(futures):
+            region, function_name = futures[future]
             try:
-                response = lambda_client.update_function_configuration(
-                    FunctionName=function_name,
-                    Runtime=new_runtime
-                )
-                print(f"✅ Updated '{function_name}' to {new_runtime}")
-                
+                future.result()
+                print(f"✅ Updated '{function_name}' ({region}) to {new_runtime}")
             except Exception as e:
-                print(f"❌ Failed to update '{function_name}': {str(e)}")
-                
-    except Exception as e:
-        print(f"Error accessing region {region}: {str(e)}")
+                print(f"❌ Failed to update '{function_name}' ({region}): {str(e)}")
 
 
-def check_and_update_lambda_runtimes(regions: List[str], old_runtime: str, new_runtime: str):
+def check_and_update_lambda_runtimes(regions: List[str], old_runtime: str, new_runtime: str,
+                                     selection: Optional[str] = None, max_workers_per_region: int = 4):
     """
     Check Lambda functions for specific runtime and update if needed.
-    
+
+    Discovery runs across all regions in parallel, then a single selection is
+    made and the approved updates are applied concurrently.
+
     Args:
         regions: List of AWS regions to check
         old_runtime: Runtime to check for (e.g., 'python3.9')
         new_runtime: Runtime to upgrade to (e.g., 'python3.12')
+        selection: 'all', 'none' or a glob pattern; prompts if not given
+        max_workers_per_region: Maximum concurrent updates in any one region
     """
-    for region in regions:
-        check_and_update_lambda_runtimes_single_region(region, old_runtime, new_runtime)
+    found = find_functions(regions, old_runtime)
+    for region, names in found.items():
+        print(f"{region:16} {len(names)} function(s) using {old_runtime}")
+
+    if not any(found.values()):
+        print(f"No functions found using {old_runtime}")
+        return
+
+    selected = select_functions(found, new_runtime, selection)
+    if not selected:
+        print("⏭️  No functions selected")
+        return
+
+    update_functions(selected, new_runtime, max_workers_per_region)
+
+
+def check_and_update_lambda_runtimes_single_region(region: str, old_runtime: str, new_runtime: str):
+    """
+    Check Lambda functions in a single region for specific runtime and update if needed.
+
+    Args:
+        region: AWS region to check
+        old_runtime: Runtime to check for (e.g., 'python3.9')
+        new_runtime: Runtime to upgrade to (e.g., 'python3.12')
+    """
+    check_and_update_lambda_runtimes([region], old_runtime, new_runtime)
 
 
 def main(args):
+    regions = args.regions
+    if args.all_regions:
+        regions = boto3.session.Session().get_available_regions('lambda')
+
     print(f"Checking Lambda functions for {args.old_runtime} runtime...")
     print(f"Will upgrade to {args.new_runtime} if confirmed")
-    print(f"Regions to check: {', '.join(args.regions)}")
-    
-    check_and_update_lambda_runtimes(args.regions, args.old_runtime, args.new_runtime)
+    print(f"Regions to check: {', '.join(regions)}")
+
+    check_and_update_lambda_runtimes(regions, args.old_runtime, args.new_runtime,
+                                     selection=args.select, max_workers_per_region=args.max_workers)
     print("\n=== Operation completed ===")
 
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='Update Lambda function Python runtimes')
-    parser.add_argument('--regions', '-r', nargs='+', 
+    parser.add_argument('--regions', '-r', nargs='+',
                        default=['ap-southeast-1', 'us-west-2', 'us-east-1'],
                        help='AWS regions to check (default: ap-southeast-1 us-west-2 us-east-1)')
+    parser.add_argument('--all-regions', action='store_true',
+                       help='Check every region where Lambda is available')
     parser.add_argument('--old-runtime', default='python3.9',
                        help='Runtime to check for (default: python3.9)')
     parser.add_argument('--new-runtime', default='python3.12',
                        help='Runtime to upgrade to (default: python3.12)')
-    args = parser.parse_args()    
+    parser.add_argument('--select', default=None,
+                       help="Skip the prompt: 'all', 'none', or a glob pattern on name or region/name")
+    parser.add_argument('--max-workers', type=int, default=4,
+                       help='Maximum concurrent updates per region (default: 4)')
+    args = parser.parse_args()
     main(args)
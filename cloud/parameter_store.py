@@ -1,16 +1,19 @@
 #!/usr/bin/env python
 
 import argparse
+import base64
 import boto3
 import dotenv
+import functools
 import getpass
+import json
 import logging
 import os
 import re
 import time
 import sys
 
-from encrypt_text import decrypt_text
+from encrypt_text import EncryptionSession, decrypt_text
 
 # Enhanced color palette
 RED = '\033[91m'
@@ -44,22 +47,33 @@ if DOT_ENV_PATH is None:
 else:
     config = dotenv.dotenv_values(DOT_ENV_PATH)
 
-aws_secret_access_key_encrypted = config.get('AWS_IAM_SECRET', None)
-if aws_secret_access_key_encrypted is None:
-    print(f"{RED}Error: AWS_IAM_SECRET is not set{RESET}")
-    sys.exit(1)
-aws_secret_access_key = decrypt_text(
-    aws_secret_access_key_encrypted,
-    getpass.getpass("Enter decryption password: ")
-)
-
-ssm = boto3.client(
-    service_name = 'ssm',
-    region_name = config.get('AWS_REGION'),
-    aws_access_key_id = config.get('AWS_ACCESS_KEY_ID'),
-    aws_secret_access_key = aws_secret_access_key,
-    aws_account_id = config.get('AWS_ACCOUNT_ID')
-)
+# Local cache of decrypted parameters, encrypted with the decryption password
+PARAMETER_CACHE_PATH = config.get('PARAMETER_CACHE_PATH') or os.path.expanduser('~/.cache/parameter_store.enc')
+PARAMETER_CACHE_TTL = int(config.get('PARAMETER_CACHE_TTL') or 3600)  # Seconds before versions are re-checked
+PARAMETER_CACHE_ENABLED = True
+GET_PARAMETERS_BATCH_SIZE = 10  # Maximum names per get_parameters call
+DESCRIBE_PARAMETERS_BATCH_SIZE = 50  # Maximum values per describe_parameters filter
+
+@functools.lru_cache(maxsize=None)
+def get_password():
+    """Prompt for the decryption password once."""
+    return getpass.getpass("Enter decryption password: ")
+
+@functools.lru_cache(maxsize=None)
+def get_ssm():
+    """Create the SSM client on first use, prompting for the decryption password."""
+    aws_secret_access_key_encrypted = config.get('AWS_IAM_SECRET', None)
+    if aws_secret_access_key_encrypted is None:
+        print(f"{RED}Error: AWS_IAM_SECRET is not set{RESET}")
+        sys.exit(1)
+    aws_secret_access_key = decrypt_text(aws_secret_access_key_encrypted, get_password())
+    return boto3.client(
+        service_name = 'ssm',
+        region_name = config.get('AWS_REGION'),
+        aws_access_key_id = config.get('AWS_ACCESS_KEY_ID'),
+        aws_secret_access_key = aws_secret_access_key,
+        aws_account_id = config.get('AWS_ACCOUNT_ID')
+    )
 
 # Configure boto3 to log resource-related operations at INFO level
 boto3.set_stream_logger('boto3.resources', logging.INFO)
@@ -70,11 +84,164 @@ def print_fancy_header(title, color=PINK, border_color=CYAN, width=60):
     print(f"{color}{BOLD}✧ {title} ✧{RESET}".center(width+15))
     print(f"{border_color}{'═'*width}{RESET}\n")
 
+class ParameterCache:
+    """
+    On-disk cache of decrypted parameters.
+
+    The file holds a JSON document encrypted with encrypt_text (AES-GCM with a
+    PBKDF2 key from the decryption password), so it is decrypted once when
+    loaded and lookups after that are served from memory. The key is derived
+    once per run: saves reuse the salt and key of the loaded file. Entries
+    older than the TTL are re-validated against their Parameter Store version.
+
+    If the file cannot be decrypted (e.g. a wrong password), the cache starts
+    empty and is never saved, so the existing file is not overwritten.
+    """
+
+    def __init__(self, path, password, ttl=PARAMETER_CACHE_TTL):
+        self.path = path
+        self.password = password
+        self.ttl = ttl
+        self.parameters = {}  # name -> {'value', 'version', 'checked_at'}
+        self.paths = {}  # path -> {'names', 'checked_at'}
+        self.session = None
+        self.load_failed = False
+        self.load()
+
+    def load(self):
+        if not os.path.isfile(self.path):
+            return
+        with open(self.path) as f:
+            encrypted = f.read()
+        try:
+            self.session = EncryptionSession(self.password, salt=base64.b64decode(encrypted)[:16])
+            data = json.loads(self.session.decrypt_text(encrypted))
+        except ValueError:
+            print(f"{YELLOW}Parameter cache could not be decrypted, ignoring it (it will not be overwritten){RESET}")
+            self.session = None
+            self.load_failed = True
+            return
+        self.parameters = data.get('parameters', {})
+        self.paths = data.get('paths', {})
+
+    def save(self):
+        if self.load_failed:
+            return
+        if self.session is None:
+            self.session = EncryptionSession(self.password)
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        data = json.dumps({'parameters': self.parameters, 'paths': self.paths})
+        tmp_path = f"{self.path}.tmp"
+        with open(os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), 'w') as f:
+            f.write(self.session.encrypt_text(data))
+        os.replace(tmp_path, self.path)
+
+    def is_fresh(self, entry):
+        return entry is not None and time.time() - entry['checked_at'] < self.ttl
+
+    def put(self, name, value, version):
+        self.parameters[name] = {'value': value, 'version': version, 'checked_at': time.time()}
+
+    def clear(self):
+        self.parameters = {}
+        self.paths = {}
+
+@functools.lru_cache(maxsize=None)
+def get_cache():
+    """Load the parameter cache on first use (None if caching is disabled)."""
+    if not PARAMETER_CACHE_ENABLED:
+        return None
+    return ParameterCache(PARAMETER_CACHE_PATH, get_password())
+
+def fetch_parameters(names):
+    """Fetch and decrypt parameters in batches. Returns {name: (value, version)}."""
+    fetched = {}
+    for i in range(0, len(names), GET_PARAMETERS_BATCH_SIZE):
+        response = get_ssm().get_parameters(Names=names[i:i + GET_PARAMETERS_BATCH_SIZE], WithDecryption=True)
+        for parameter in response['Parameters']:
+            fetched[parameter['Name']] = (parameter['Value'], parameter['Version'])
+        for name in response.get('InvalidParameters', []):
+            print(f"{RED}Parameter not found: {name}{RESET}")
+    return fetched
+
+def fetch_versions(names):
+    """Fetch the current versions of parameters without decrypting them. Returns {name: version}."""
+    versions = {}
+    paginator = get_ssm().get_paginator('describe_parameters')
+    for i in range(0, len(names), DESCRIBE_PARAMETERS_BATCH_SIZE):
+        filters = [{'Key': 'Name', 'Option': 'Equals', 'Values': names[i:i + DESCRIBE_PARAMETERS_BATCH_SIZE]}]
+        for page in paginator.paginate(ParameterFilters=filters):
+            for parameter in page['Parameters']:
+                versions[parameter['Name']] = parameter['Version']
+    return versions
+
+def get_parameters(names, refresh=False):
+    """
+    Return the decrypted values of several parameters as {name: value}.
+
+    Fresh cache entries are served locally. Expired entries are re-validated
+    with one describe_parameters call and only parameters whose version
+    changed are fetched again, in batches.
+    """
+    names = list(dict.fromkeys(n for n in names if n))
+    cache = get_cache()
+    if cache is None:
+        return {name: value for name, (value, _) in fetch_parameters(names).items()}
+
+    cached = {name: cache.parameters.get(name) for name in names}
+    expired = [name for name, entry in cached.items() if entry is not None and (refresh or not cache.is_fresh(entry))]
+    missing = [name for name, entry in cached.items() if entry is None]
+    if not expired and not missing:
+        return {name: entry['value'] for name, entry in cached.items()}
+
+    if expired:
+        versions = fetch_versions(expired)
+        for name in expired:
+            if versions.get(name) == cached[name]['version']:
+                cached[name]['checked_at'] = time.time()
+            else:
+                missing.append(name)
+
+    for name, (value, version) in fetch_parameters(missing).items():
+        cache.put(name, value, version)
+    cache.save()
+    return {name: cache.parameters[name]['value'] for name in names if name in cache.parameters}
+
+def get_parameters_by_path(path, recursive=True, refresh=False):
+    """Return the decrypted values of every parameter under a path as {name: value}."""
+    cache = get_cache()
+    if cache is not None and not refresh and cache.is_fresh(cache.paths.get(path)):
+        names = cache.paths[path]['names']
+        if all(cache.is_fresh(cache.parameters.get(name)) for name in names):
+            return {name: cache.parameters[name]['value'] for name in names}
+
+    values = {}
+    paginator = get_ssm().get_paginator('get_parameters_by_path')
+    for page in paginator.paginate(Path=path, Recursive=recursive, WithDecryption=True):
+        for parameter in page['Parameters']:
+            values[parameter['Name']] = parameter['Value']
+            if cache is not None:
+                cache.put(parameter['Name'], parameter['Value'], parameter['Version'])
+
+    if cache is not None:
+        cache.paths[path] = {'names': sorted(values), 'checked_at': time.time()}
+        cache.save()
+    return values
+
 def get_key_file(key_name):
-    return ssm.get_parameter(
-        Name=key_name,
-        WithDecryption=True
-    ).get('Parameter').get('Value')
+    values = get_parameters([key_name])
+    if key_name not in values:
+        print(f"{RED}Error: parameter {key_name} not found{RESET}")
+        sys.exit(1)
+    return values[key_name]
+
+def put_key_file(key_name, value):
+    """Save a parameter and update the cache with its new version."""
+    response = get_ssm().put_parameter(Name=key_name, Value=value, Type='SecureString', Overwrite=True)
+    cache = get_cache()
+    if cache is not None:
+        cache.put(key_name, value, response['Version'])
+        cache.save()
 
 def parse_line(env_var_string):
     pattern = r'(?:export\s+)?(\w+)=(?:"([^"]+)"|\'([^\']+)\'|([^\s]+))'
@@ -140,7 +307,7 @@ def append_new_keys(key_text, old_key, new_key, sort=False):
     
     print(f"\n{CYAN}Saving to parameter store...{RESET}")
     time.sleep(0.5)
-    ssm.put_parameter(Name=new_key, Value=key_list, Type='SecureString', Overwrite=True)
+    put_key_file(new_key, key_list)
     
     print(f"\n{BG_GREEN}{WHITE}{BOLD} SUCCESS {RESET}")
     print(f"\n{TEAL}{'✓'*20}{RESET}")
@@ -159,12 +326,7 @@ def add_new_key(key_text, new_key):
     print(f"\n{CYAN}Saving to parameter store...{RESET}")
     time.sleep(0.5)
     
-    ssm.put_parameter(
-        Name=new_key,
-        Value=entries,
-        Type='SecureString',
-        Overwrite=True
-    )
+    put_key_file(new_key, key_text)
     
     print(f"\n{BG_BLUE}{WHITE}{BOLD} COMPLETE {RESET}")
     print(f"\n{PURPLE}{'★'*20}{RESET}")
@@ -189,8 +351,27 @@ if __name__ == '__main__':
     parser.add_argument('--logins', action='store_true', help='Display login information')
     parser.add_argument('--sort', action='store_true', help='Sort keys and remove duplicates')
     parser.add_argument('--all', action='store_true')
+    parser.add_argument('--path', default='', help='Print the names of all parameters under a path')
+    parser.add_argument('--refresh', action='store_true', help='Re-check cached parameters against Parameter Store')
+    parser.add_argument('--no_cache', action='store_true', help='Do not use the local parameter cache')
     args = parser.parse_args()
 
+    PARAMETER_CACHE_ENABLED = not args.no_cache
+
+    # Fetch everything needed below in one batch
+    names = []
+    if args.key_text or args.all:
+        names.append(args.old_key)
+    if args.logins or args.all:
+        names.append(config.get('LOGIN_PARAMETER_PATH'))
+    if names:
+        get_parameters(names, refresh=args.refresh)
+
+    if args.path:
+        print_fancy_header("PARAMETERS", CYAN, BLUE)
+        for name in get_parameters_by_path(args.path, refresh=args.refresh):
+            print(f"  {BLUE}{name}{RESET}")
+
     if args.key_text:
         append_new_keys(args.key_text, args.old_key, args.new_key, args.sort)
 
@@ -3,10 +3,16 @@
 import argparse
 import boto3
 import datetime
+import functools
 import json
 import os
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
 
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from dotenv import load_dotenv
 
 
@@ -20,50 +26,220 @@ S3_BUCKET = os.getenv('S3_BUCKET', default=None)
 S3_BUCKET_PREFIX = os.getenv('S3_BUCKET_PREFIX', default=None)
 FILE_PREFIX = f'{S3_BUCKET_PREFIX}/{YEAR}/{MONTH:02d}/{DAY:02d}'
 DEFAULT_CSV_FILE = f'{S3_BUCKET}-{YEAR}-{MONTH:02d}-{DAY:02d}.csv'
+DEFAULT_PARQUET_DIR = f'{S3_BUCKET}-{YEAR}-{MONTH:02d}-{DAY:02d}'
+DEFAULT_MAX_WORKERS = 8
+DEFAULT_ROLLUP_DIR = f'{S3_BUCKET}-rollups'
 
-s3 = boto3.client('s3')
+# Per-day rollups are aggregated over these columns
+ROLLUP_KEYS = ['srcaddr', 'dstaddr', 'dstport', 'protocol', 'action']
+ROLLUP_COMBINE_ROWS = 1_000_000  # re-aggregate partial results beyond this many rows
+ROLLUP_GRACE_DAYS = 1  # flow logs keep arriving after midnight UTC, so recent days are not saved
+
+
+@functools.lru_cache(maxsize=None)
+def get_s3():
+    return boto3.client('s3')
 
 
 class S3Folder():
 
-    def __init__(self, bucket=S3_BUCKET, prefix=FILE_PREFIX):
+    def __init__(self, bucket=S3_BUCKET, prefix=FILE_PREFIX, max_workers=DEFAULT_MAX_WORKERS):
         self.bucket=bucket
         self.prefix=prefix
+        self.max_workers=max_workers
         self.keys=None
-        self.final_df=None
+        self.rows_written=0
 
 
     def list_objects(self):
-        r = s3.list_objects_v2(
-            Bucket=self.bucket,
-            Prefix=f'{self.prefix}/',
-        )
-        self.keys = [ obj['Key'] for obj in r['Contents']]
+        paginator = get_s3().get_paginator('list_objects_v2')
+        self.keys = [
+            obj['Key']
+            for page in paginator.paginate(Bucket=self.bucket, Prefix=f'{self.prefix}/')
+            for obj in page.get('Contents', [])
+        ]
         return self.keys
 
 
-    def consolidate_objects(self, csv_file):
+    def read_object(self, key):
+        """Download a Parquet object into memory and read it as an Arrow table"""
+        body = get_s3().get_object(Bucket=self.bucket, Key=key)['Body'].read()
+        return pq.read_table(pa.BufferReader(body))
+
+
+    def iter_tables(self):
+        """
+        Yield (key, table) for every object, downloading up to max_workers at a
+        time. At most 2 * max_workers tables are held in memory at once.
+        """
         if self.keys is None:
             self.keys = self.list_objects()
 
-        df_list = []
-        for key in self.keys:
+        keys = iter(self.keys)
+        pending = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for key in keys:
+                pending[executor.submit(self.read_object, key)] = key
+                if len(pending) >= 2 * self.max_workers:
+                    break
+
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    key = pending.pop(future)
+                    print(f'Downloaded: s3://{self.bucket}/{key}')
+                    yield key, future.result()
+                    next_key = next(keys, None)
+                    if next_key is not None:
+                        pending[executor.submit(self.read_object, next_key)] = next_key
+
+
+    def consolidate_objects(self, csv_file):
+        """Stream all objects into a single CSV file, one table at a time"""
+        writer = None
+        schema = None
+        try:
+            for key, table in self.iter_tables():
+                if writer is None:
+                    schema = table.schema
+                    writer = pa_csv.CSVWriter(csv_file, schema)
+                writer.write_table(table.select(schema.names).cast(schema))
+                self.rows_written += table.num_rows
+        finally:
+            if writer is not None:
+                writer.close()
+        print(f'Wrote {self.rows_written} rows to {csv_file}')
+
+
+    def consolidate_objects_to_parquet(self, output_dir, partition_cols=('hour',)):
+        """
+        Write all objects to a Parquet dataset partitioned by hour of the flow's
+        start time (or other columns), one table at a time.
+        """
+        for key, table in self.iter_tables():
+            if 'hour' in partition_cols and 'hour' not in table.column_names:
+                start = table['start'].cast(pa.int64()).cast(pa.timestamp('s'))
+                table = table.append_column('hour', pc.hour(start))
+            pq.write_to_dataset(
+                table,
+                root_path=output_dir,
+                partition_cols=list(partition_cols),
+                basename_template=os.path.basename(key).replace('.', '_') + '-{i}.parquet'
+            )
+            self.rows_written += table.num_rows
+        print(f'Wrote {self.rows_written} rows to {output_dir}/')
+
+
+def aggregate_flows(table):
+    """Aggregate raw flow records into rollup rows (bytes, packets, flows per ROLLUP_KEYS)"""
+    result = table.select(ROLLUP_KEYS + ['bytes', 'packets']).group_by(ROLLUP_KEYS).aggregate([
+        ('bytes', 'sum'), ('packets', 'sum'), ('bytes', 'count')
+    ])
+    return result.select(ROLLUP_KEYS + ['bytes_sum', 'packets_sum', 'bytes_count']).rename_columns(
+        ROLLUP_KEYS + ['bytes', 'packets', 'flows']
+    )
 
-            # Download Parquet File
-            print(f'Downloading: s3://{self.bucket}/{key}')
-            body = s3.get_object(Bucket=self.bucket, Key=f'{key}')['Body'].read()
-            pq_file = os.path.basename(key)
-            with open(pq_file, 'wb') as f:
-                f.write(body)
 
-            # Read Parquet File
-            df = pd.read_parquet(pq_file)
-            print(df)
-            df_list.append(df)
-            os.remove(pq_file)
+def combine_rollups(tables):
+    """Merge rollup tables, summing rows with the same keys"""
+    table = pa.concat_tables(tables)
+    result = table.group_by(ROLLUP_KEYS).aggregate([
+        ('bytes', 'sum'), ('packets', 'sum'), ('flows', 'sum')
+    ])
+    return result.select(ROLLUP_KEYS + ['bytes_sum', 'packets_sum', 'flows_sum']).rename_columns(
+        ROLLUP_KEYS + ['bytes', 'packets', 'flows']
+    )
 
-        self.final_df = pd.concat(df_list)
-        self.final_df.to_csv(csv_file)
+
+def compute_day_rollup(day, max_workers=DEFAULT_MAX_WORKERS):
+    """
+    Stream one day of raw logs and aggregate them record batch by record batch.
+    Partial results are combined whenever they grow past ROLLUP_COMBINE_ROWS.
+    """
+    s3f = S3Folder(
+        bucket=S3_BUCKET,
+        prefix=f'{S3_BUCKET_PREFIX}/{day:%Y/%m/%d}',
+        max_workers=max_workers
+        )
+    partials = []
+    partial_rows = 0
+    for key, table in s3f.iter_tables():
+        for batch in table.to_batches():
+            partial = aggregate_flows(pa.Table.from_batches([batch]))
+            partials.append(partial)
+            partial_rows += partial.num_rows
+            if partial_rows > ROLLUP_COMBINE_ROWS:
+                partials = [combine_rollups(partials)]
+                partial_rows = partials[0].num_rows
+    if not partials:
+        return None
+    return combine_rollups(partials)
+
+
+def is_complete_day(day):
+    """True once no more logs are expected for a day. S3 prefixes are UTC dates."""
+    today = datetime.datetime.now(datetime.timezone.utc).date()
+    return day < today - datetime.timedelta(days=ROLLUP_GRACE_DAYS)
+
+
+def load_or_compute_day_rollup(day, rollup_dir=DEFAULT_ROLLUP_DIR, max_workers=DEFAULT_MAX_WORKERS):
+    """
+    Return the rollup for a day, reading it from rollup_dir if it was saved by an
+    earlier run. Only complete days (older than yesterday, UTC) are saved.
+    """
+    rollup_file = os.path.join(rollup_dir, f'{day:%Y-%m-%d}.parquet')
+    if os.path.isfile(rollup_file):
+        print(f'Using rollup: {rollup_file}')
+        return pq.read_table(rollup_file)
+
+    print(f'Scanning raw logs for {day:%Y-%m-%d}')
+    rollup = compute_day_rollup(day, max_workers=max_workers)
+    if rollup is not None and is_complete_day(day):
+        os.makedirs(rollup_dir, exist_ok=True)
+        pq.write_table(rollup, rollup_file)
+    return rollup
+
+
+def summarize(rollup, by, top=10, sort_by='bytes'):
+    """Total bytes, packets and flows grouped by the given columns, largest first"""
+    result = rollup.group_by(by).aggregate([
+        ('bytes', 'sum'), ('packets', 'sum'), ('flows', 'sum')
+    ])
+    result = result.select(by + ['bytes_sum', 'packets_sum', 'flows_sum']).rename_columns(
+        by + ['bytes', 'packets', 'flows']
+    )
+    return result.sort_by([(sort_by, 'descending')]).slice(0, top)
+
+
+def analyze_date_range(start_date, end_date, rollup_dir=DEFAULT_ROLLUP_DIR, top=10,
+                       max_workers=DEFAULT_MAX_WORKERS):
+    """
+    Report top talkers, bytes by destination/port/protocol and rejected flows for
+    every day from start_date to end_date (inclusive). Only the S3 prefixes of
+    days in the range are listed.
+    """
+    days = [start_date + datetime.timedelta(days=i) for i in range((end_date - start_date).days + 1)]
+    rollups = [load_or_compute_day_rollup(day, rollup_dir, max_workers) for day in days]
+    rollups = [rollup for rollup in rollups if rollup is not None and rollup.num_rows]
+    if not rollups:
+        print(f'No flow logs found between {start_date} and {end_date}')
+        return
+    rollup = combine_rollups(rollups)
+
+    reports = [
+        ('Top talkers (source)', summarize(rollup, ['srcaddr'], top)),
+        ('Bytes by destination', summarize(rollup, ['dstaddr'], top)),
+        ('Bytes by destination port', summarize(rollup, ['dstport'], top)),
+        ('Bytes by protocol', summarize(rollup, ['protocol'], top)),
+        ('Rejected flows by source and port', summarize(
+            rollup.filter(pc.equal(rollup['action'], 'REJECT')), ['srcaddr', 'dstport'], top, sort_by='flows'
+        )),
+    ]
+    for title, table in reports:
+        df = table.to_pandas()
+        df['megabytes'] = df['bytes'] / 1.0e6
+        print(f'\n=== {title} ({start_date} to {end_date}) ===')
+        print(df.to_string(index=False))
 
 
 if __name__ == '__main__':
@@ -71,21 +247,45 @@ if __name__ == '__main__':
     parser.add_argument('--consolidate', action='store_true')
     parser.add_argument('--analyze', action='store_true')
     parser.add_argument('--csv_file', default=DEFAULT_CSV_FILE)
+    parser.add_argument('--parquet_dir', default=DEFAULT_PARQUET_DIR)
+    parser.add_argument('--format', choices=['parquet', 'csv'], default='parquet')
+    parser.add_argument('--max_workers', type=int, default=DEFAULT_MAX_WORKERS)
+    parser.add_argument('--analytics', action='store_true')
+    parser.add_argument('--start_date', type=datetime.date.fromisoformat, default=now.date())
+    parser.add_argument('--end_date', type=datetime.date.fromisoformat, default=None)
+    parser.add_argument('--rollup_dir', default=DEFAULT_ROLLUP_DIR)
+    parser.add_argument('--top', type=int, default=10)
     args = parser.parse_args()
 
     if args.consolidate:
         s3f = S3Folder(
             bucket=S3_BUCKET,
-            prefix=FILE_PREFIX
+            prefix=FILE_PREFIX,
+            max_workers=args.max_workers
             )
-        print(f"""Files: {','.join(s3f.list_objects())}""")
-        s3f.consolidate_objects(csv_file=DEFAULT_CSV_FILE)
+        print(f"""Files: {len(s3f.list_objects())} objects under s3://{S3_BUCKET}/{FILE_PREFIX}/""")
+        if args.format == 'csv':
+            s3f.consolidate_objects(csv_file=args.csv_file)
+        else:
+            s3f.consolidate_objects_to_parquet(output_dir=args.parquet_dir)
 
     elif args.analyze:
-        df = pd.read_csv(args.csv_file)
+        if args.format == 'csv':
+            df = pd.read_csv(args.csv_file)
+        else:
+            df = pq.read_table(args.parquet_dir).to_pandas()
         df.sort_values('bytes', ascending=False, inplace=True)
         df['utc-start'] = pd.to_datetime(df['start'],unit='s')
         df['utc-end'] = pd.to_datetime(df['end'],unit='s')
         df['megabytes'] = df['bytes'] / 1.0e6
         df['gigabytes'] = df['bytes'] / 1.0e9
         print(df.head().T)
+
+    elif args.analytics:
+        analyze_date_range(
+            start_date=args.start_date,
+            end_date=args.end_date or args.start_date,
+            rollup_dir=args.rollup_dir,
+            top=args.top,
+            max_workers=args.max_workers
+            )
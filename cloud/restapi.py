@@ -1,13 +1,64 @@
 #!/usr/bin/env python
 
+"""
+REST API Reader
+
+Fetches one or many URLs and prints the JSON responses.
+
+- A single --url is pretty-printed as before
+- Several URLs (--url a b c, or --file urls.txt) are fetched concurrently and
+  streamed as JSONL, one line per request with status, size and timings
+- --bench repeats the URLs as a quick load probe and reports requests/s and
+  p50/p90/p99 latency, optionally checked against targets
+
+Each worker thread keeps its own keep-alive session, so connections are
+reused across requests, and responses are requested with compression
+(gzip/deflate, plus br/zstd when the decoders are installed).
+
+Usage:
+    python restapi.py --url https://example.com/api/items
+    python restapi.py --file urls.txt --workers 32 > results.jsonl
+    python restapi.py --url https://example.com/health --bench --requests 2000 --workers 50
+    python restapi.py --url https://example.com/health --bench --duration 30 --target-rps 500 --target-p99 200
+"""
+
 import argparse
+import itertools
 import json
+import math
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.request import ACCEPT_ENCODING
+
+
+DEFAULT_WORKERS = 16
+DEFAULT_TIMEOUT = 10
 
-from urllib.request import urlopen
+_local = threading.local()
 
 
-def read_url(url):
-    return urlopen(url).read().decode('utf-8')
+def get_session():
+    """Return this thread's keep-alive session."""
+    session = getattr(_local, 'session', None)
+    if session is None:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=4, max_retries=0)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        session.headers.update({'Accept': 'application/json', 'Accept-Encoding': ACCEPT_ENCODING})
+        _local.session = session
+    return session
+
+
+def read_url(url, timeout=DEFAULT_TIMEOUT):
+    response = get_session().get(url, timeout=timeout)
+    response.raise_for_status()
+    return response.text
 
 
 def json_print(my_dict):
@@ -15,13 +66,176 @@ def json_print(my_dict):
     print(json.dumps(jobj, indent=4))
 
 
-def main(url):
-    data = read_url(url)
-    json_print(data)
+def fetch(url, timeout=DEFAULT_TIMEOUT, include_body=True):
+    """
+    Fetch a URL and return a result record.
+
+    Returns:
+        dict: url, status, content_encoding, bytes (decoded), ttfb_ms (time to
+              response headers), elapsed_ms (including the body), error, and
+              body (parsed JSON, or text) if include_body
+    """
+    result = {'url': url, 'status': None, 'content_encoding': None, 'bytes': 0,
+              'ttfb_ms': None, 'elapsed_ms': None, 'error': None}
+    start = time.perf_counter()
+    try:
+        response = get_session().get(url, timeout=timeout)
+        content = response.content
+        result['elapsed_ms'] = round((time.perf_counter() - start) * 1000, 3)
+        result['ttfb_ms'] = round(response.elapsed.total_seconds() * 1000, 3)
+        result['status'] = response.status_code
+        result['content_encoding'] = response.headers.get('Content-Encoding')
+        result['bytes'] = len(content)
+        if include_body:
+            try:
+                result['body'] = response.json()
+            except ValueError:
+                result['body'] = response.text
+    except requests.RequestException as e:
+        result['elapsed_ms'] = round((time.perf_counter() - start) * 1000, 3)
+        result['error'] = f'{type(e).__name__}: {e}'
+    return result
+
+
+def fetch_all(urls, workers=DEFAULT_WORKERS, timeout=DEFAULT_TIMEOUT, include_body=True):
+    """
+    Fetch URLs concurrently, yielding results as they complete.
+
+    At most 2 x workers requests are queued at a time, so `urls` can be a
+    long or endless iterator.
+    """
+    urls = iter(urls)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = {executor.submit(fetch, url, timeout, include_body)
+                   for url in itertools.islice(urls, workers * 2)}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+            for url in itertools.islice(urls, len(done)):
+                pending.add(executor.submit(fetch, url, timeout, include_body))
+
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    # The smallest value with at least p% of the values at or below it
+    index = max(0, min(len(sorted_values) - 1, math.ceil(p / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def bench(urls, requests_count=None, duration=None, workers=DEFAULT_WORKERS, timeout=DEFAULT_TIMEOUT):
+    """
+    Send requests to the URLs (in rotation) and measure throughput and latency.
+
+    Runs for `requests_count` requests or `duration` seconds, whichever is given.
+
+    Returns:
+        dict: requests, errors, statuses, seconds, rps, bytes and p50/p90/p99/max latency in ms
+    """
+    start = time.perf_counter()
+    cycled = itertools.cycle(urls)
+    if duration:
+        url_iter = itertools.takewhile(lambda _: time.perf_counter() - start < duration, cycled)
+    else:
+        url_iter = itertools.islice(cycled, requests_count)
+
+    latencies = []
+    statuses = {}
+    errors = 0
+    total_bytes = 0
+    for result in fetch_all(url_iter, workers, timeout, include_body=False):
+        latencies.append(result['elapsed_ms'])
+        total_bytes += result['bytes']
+        if result['error'] or result['status'] >= 400:
+            errors += 1
+        key = str(result['status']) if result['status'] else 'error'
+        statuses[key] = statuses.get(key, 0) + 1
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'statuses': statuses,
+        'seconds': round(elapsed, 3),
+        'rps': round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        'bytes': total_bytes,
+        'p50_ms': percentile(latencies, 50),
+        'p90_ms': percentile(latencies, 90),
+        'p99_ms': percentile(latencies, 99),
+        'max_ms': latencies[-1] if latencies else 0.0,
+    }
+
+
+def read_url_list(path):
+    f = sys.stdin if path == '-' else open(path)
+    try:
+        return [line.strip() for line in f if line.strip() and not line.startswith('#')]
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+
+def main(args):
+    urls = list(args.url or [])
+    if args.file:
+        urls += read_url_list(args.file)
+    if not urls:
+        print("No URLs given (use --url or --file)", file=sys.stderr)
+        return 2
+
+    if args.bench:
+        requests_count = args.requests if not args.duration else None
+        stats = bench(urls, requests_count, args.duration, args.workers, args.timeout)
+        print(f"Requests:  {stats['requests']} in {stats['seconds']:.2f}s with {args.workers} workers")
+        print(f"Throughput: {stats['rps']:.1f} requests/s, {stats['bytes'] / 1024 / 1024:.2f} MB")
+        print(f"Latency:   p50 {stats['p50_ms']:.1f} ms, p90 {stats['p90_ms']:.1f} ms, "
+              f"p99 {stats['p99_ms']:.1f} ms, max {stats['max_ms']:.1f} ms")
+        print(f"Errors:    {stats['errors']}  Statuses: {stats['statuses']}")
+
+        failed = []
+        if args.target_rps and stats['rps'] < args.target_rps:
+            failed.append(f"throughput {stats['rps']:.1f} < {args.target_rps} requests/s")
+        if args.target_p99 and stats['p99_ms'] > args.target_p99:
+            failed.append(f"p99 {stats['p99_ms']:.1f} > {args.target_p99} ms")
+        if stats['errors']:
+            failed.append(f"{stats['errors']} errors")
+        for reason in failed:
+            print(f"FAIL: {reason}")
+        return 1 if failed else 0
+
+    if len(urls) == 1 and not args.file and not args.jsonl:
+        json_print(read_url(urls[0], args.timeout))
+        return 0
+
+    out = open(args.output, 'w') if args.output else sys.stdout
+    errors = 0
+    try:
+        for result in fetch_all(urls, args.workers, args.timeout, include_body=not args.no_body):
+            errors += 1 if result['error'] or result['status'] >= 400 else 0
+            out.write(json.dumps(result) + '\n')
+            out.flush()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return 1 if errors else 0
 
 
 if __name__ == "__main__":
-    parser = argparse.ArgumentParser()
-    parser.add_argument('--url')
+    parser = argparse.ArgumentParser(description="Fetch JSON from one or many URLs")
+    parser.add_argument('--url', nargs='+', help='URL(s) to fetch')
+    parser.add_argument('--file', help="File with one URL per line ('-' for stdin)")
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help='Concurrent requests')
+    parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT, help='Seconds per request')
+    parser.add_argument('--output', help='Write JSONL here instead of stdout')
+    parser.add_argument('--jsonl', action='store_true', help='JSONL output even for a single URL')
+    parser.add_argument('--no-body', action='store_true', help='Leave response bodies out of the JSONL')
+    parser.add_argument('--bench', action='store_true', help='Load probe: report requests/s and latency')
+    parser.add_argument('--requests', type=int, default=1000, help='Requests to send with --bench')
+    parser.add_argument('--duration', type=float, help='Run --bench for this many seconds instead')
+    parser.add_argument('--target-rps', type=float, help='Fail --bench below this many requests/s')
+    parser.add_argument('--target-p99', type=float, help='Fail --bench above this p99 latency (ms)')
     args = parser.parse_args()
-    main(args.url)
+    sys.exit(main(args))
@@ -3,11 +3,31 @@
 # Example
 # aws ec2 describe-spot-price-history --instance-types p5en.48xlarge --product-descriptions "Linux/UNIX" --start-time 2025-07-16T00:00:00 --end-time 2025-07-17T00:00:00 --region ap-southeast-3
 
+import argparse
 import boto3
+import os
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
 import subprocess
 
-from datetime import datetime, timedelta
-from typing import Union
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Union
+
+
+DEFAULT_STORE_DIR = 'spot_prices'
+DEFAULT_LOOKBACK_DAYS = 1  # history fetched the first time a (region, instance type) is collected
+
+SPOT_PRICE_SCHEMA = pa.schema([
+    ('region', pa.string()),
+    ('instance_type', pa.string()),
+    ('availability_zone', pa.string()),
+    ('product_description', pa.string()),
+    ('price', pa.float64()),
+    ('timestamp', pa.timestamp('us', tz='UTC')),
+])
 
 
 def pricing_describe_services_awscli(region: str, service_code: Union[str, None] = None):
@@ -62,6 +82,141 @@ def get_spot_price_history_boto3(instance_type: str, region: str = 'us-east-1'):
     return '\n'.join(txt_list)
 
 
+def fetch_spot_price_history(instance_type: str, region: str, start_time: datetime,
+                             end_time: Optional[datetime] = None, ec2_client=None) -> List[Dict]:
+    """
+    Fetch every spot price change since start_time, following all pages.
+    """
+    ec2_client = ec2_client or boto3.client('ec2', region_name=region)
+    paginator = ec2_client.get_paginator('describe_spot_price_history')
+    kwargs = {
+        'InstanceTypes': [instance_type],
+        'ProductDescriptions': ['Linux/UNIX'],
+        'StartTime': start_time,
+        'EndTime': end_time or datetime.now(timezone.utc),
+    }
+    rows = []
+    for page in paginator.paginate(**kwargs):
+        for price in page['SpotPriceHistory']:
+            rows.append({
+                'region': region,
+                'instance_type': instance_type,
+                'availability_zone': price['AvailabilityZone'],
+                'product_description': price['ProductDescription'],
+                'price': float(price['SpotPrice']),
+                'timestamp': price['Timestamp'],
+            })
+    return rows
+
+
+def read_spot_prices(store_dir: str = DEFAULT_STORE_DIR, region: Optional[str] = None,
+                     instance_type: Optional[str] = None, start_time: Optional[datetime] = None,
+                     columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Read stored prices, pruning partitions by region and instance type.
+    """
+    if not os.path.isdir(store_dir):
+        return pd.DataFrame(columns=columns or SPOT_PRICE_SCHEMA.names)
+    dataset = ds.dataset(store_dir, schema=SPOT_PRICE_SCHEMA, partitioning='hive')
+    condition = None
+    for expression in [
+        ds.field('region') == region if region else None,
+        ds.field('instance_type') == instance_type if instance_type else None,
+        ds.field('timestamp') >= pa.scalar(start_time, type=SPOT_PRICE_SCHEMA.field('timestamp').type) if start_time else None,
+    ]:
+        if expression is not None:
+            condition = expression if condition is None else condition & expression
+    return dataset.to_table(columns=columns, filter=condition).to_pandas()
+
+
+def get_last_timestamps(store_dir: str, region: str, instance_type: str) -> Dict[str, datetime]:
+    """Latest stored timestamp for each availability zone"""
+    df = read_spot_prices(store_dir, region, instance_type, columns=['availability_zone', 'timestamp'])
+    if df.empty:
+        return {}
+    return df.groupby('availability_zone')['timestamp'].max().to_dict()
+
+
+def collect_spot_prices(instance_type: str, region: str, store_dir: str = DEFAULT_STORE_DIR,
+                        lookback_days: int = DEFAULT_LOOKBACK_DAYS, ec2_client=None) -> int:
+    """
+    Fetch only prices newer than the last stored timestamp per AZ and append
+    them to the local store. Returns the number of new rows.
+    """
+    last_timestamps = get_last_timestamps(store_dir, region, instance_type)
+    if last_timestamps:
+        start_time = min(last_timestamps.values()).to_pydatetime()
+    else:
+        start_time = datetime.now(timezone.utc) - timedelta(days=lookback_days)
+
+    rows = [
+        row for row in fetch_spot_price_history(instance_type, region, start_time, ec2_client=ec2_client)
+        if row['availability_zone'] not in last_timestamps
+        or row['timestamp'] > last_timestamps[row['availability_zone']]
+    ]
+    if rows:
+        table = pa.Table.from_pylist(rows, schema=SPOT_PRICE_SCHEMA)
+        pq.write_to_dataset(
+            table,
+            root_path=store_dir,
+            partition_cols=['region', 'instance_type'],
+            basename_template=f"{datetime.now(timezone.utc):%Y%m%dT%H%M%S%f}-{{i}}.parquet"
+        )
+    return len(rows)
+
+
+def collect_all_spot_prices(instance_types: List[str], regions: List[str], store_dir: str = DEFAULT_STORE_DIR,
+                            lookback_days: int = DEFAULT_LOOKBACK_DAYS, max_workers: int = 16):
+    """
+    Collect prices for every (region, instance type) pair concurrently.
+    """
+    pairs = [(instance_type, region) for region in regions for instance_type in instance_types]
+    # boto3.client() is not thread-safe on the default session, so create the clients here
+    clients = {region: boto3.client('ec2', region_name=region) for region in regions}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            pair: executor.submit(collect_spot_prices, pair[0], pair[1], store_dir, lookback_days, clients[pair[1]])
+            for pair in pairs
+        }
+    for (instance_type, region), future in futures.items():
+        try:
+            print(f"{region:16} {instance_type:16} {future.result()} new price(s)")
+        except Exception as e:
+            print(f"{region:16} {instance_type:16} failed: {e}")
+
+
+def get_cheapest_az(instance_type: str, hours: float = 24, store_dir: str = DEFAULT_STORE_DIR,
+                    top: int = 5) -> pd.DataFrame:
+    """
+    Rank availability zones by time-weighted average spot price over the last
+    `hours`, using only the local store. Each price holds until the next change.
+    """
+    now = pd.Timestamp.now(tz='UTC')
+    window_start = now - pd.Timedelta(hours=hours)
+    # Include earlier prices, since the price in effect at window_start may be older
+    df = read_spot_prices(store_dir, instance_type=instance_type)
+
+    results = []
+    for (region, az), group in df.groupby(['region', 'availability_zone']):
+        group = group.sort_values('timestamp').drop_duplicates('timestamp', keep='last')
+        starts = group['timestamp'].clip(lower=window_start)
+        ends = group['timestamp'].shift(-1).fillna(now).clip(lower=window_start)
+        seconds = (ends - starts).dt.total_seconds()
+        if seconds.sum() <= 0:
+            continue
+        results.append({
+            'region': region,
+            'availability_zone': az,
+            'avg_price': (group['price'] * seconds).sum() / seconds.sum(),
+            'min_price': group.loc[seconds > 0, 'price'].min(),
+            'last_price': group['price'].iloc[-1],
+        })
+    if not results:
+        # No prices in the window (or the instance type is not offered there)
+        return pd.DataFrame(columns=['region', 'availability_zone', 'avg_price', 'min_price', 'last_price'])
+    return pd.DataFrame(results).sort_values('avg_price').head(top).reset_index(drop=True)
+
+
 instance_types = [
     'p5.48xlarge',
     'p5en.48xlarge'
@@ -77,8 +232,27 @@ regions = [
 
 
 if __name__ == "__main__":
-    for region in regions:
-        print(f'***** Region: {region} *****')
-        for instance_type in instance_types:
-            txt = get_spot_price_history_boto3(instance_type, region)
-            print(txt)
+    parser = argparse.ArgumentParser(description='Collect and query spot price history')
+    parser.add_argument('--regions', nargs='+', default=regions)
+    parser.add_argument('--instance-types', nargs='+', default=instance_types)
+    parser.add_argument('--store', default=DEFAULT_STORE_DIR, help='Local Parquet store directory')
+    parser.add_argument('--days', type=int, default=DEFAULT_LOOKBACK_DAYS,
+                        help='History to fetch on the first collection')
+    parser.add_argument('--hours', type=float, default=24, help='Window for the cheapest AZ query')
+    parser.add_argument('--max-workers', type=int, default=16)
+    parser.add_argument('--no-collect', action='store_true', help='Only query the local store')
+    parser.add_argument('--text', action='store_true', help='Print the last 24 hours as text (original output)')
+    args = parser.parse_args()
+
+    if args.text:
+        for region in args.regions:
+            print(f'***** Region: {region} *****')
+            for instance_type in args.instance_types:
+                txt = get_spot_price_history_boto3(instance_type, region)
+                print(txt)
+    else:
+        if not args.no_collect:
+            collect_all_spot_prices(args.instance_types, args.regions, args.store, args.days, args.max_workers)
+        for instance_type in args.instance_types:
+            print(f'\n***** Cheapest AZs for {instance_type} (last {args.hours:g} hours) *****')
+            print(get_cheapest_az(instance_type, args.hours, args.store).to_string(index=False))
@@ -0,0 +1,127 @@
+#!/usr/bin/env python
+
+"""
+Cold Start Benchmark for Cloud Scripts
+
+Measures how long the cloud scripts take to start up, so that work at import
+time (e.g. creating boto3 clients or calling STS) does not creep back in.
+
+For each script this runs:
+- `python -X importtime -c "import <module>"` and reports the cumulative
+  import time of the module itself
+- `python <script> --help` and reports the wall clock time
+
+Any script whose `--help` wall clock exceeds the target is reported as a
+failure and the exit code is non-zero.
+
+Usage:
+    python startup_benchmark.py
+    python startup_benchmark.py --target 1.5 --repeat 5
+    python startup_benchmark.py --scripts aws_monitor2.py parse_vpc_flow_logs.py
+"""
+
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+
+DEFAULT_SCRIPTS = [
+    'aws_cleanup_multiaccount2.py',
+    'aws_monitor2.py',
+    'parse_vpc_flow_logs.py',
+    'parameter_store.py',
+]
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def get_import_time(module, cwd=SCRIPT_DIR):
+    """
+    Return the cumulative import time of a module in seconds.
+
+    Args:
+        module (str): Module name to import
+        cwd (str): Directory to run the import from
+
+    Returns:
+        float: Cumulative import time in seconds, or None if the import failed
+    """
+    r = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=cwd, capture_output=True, text=True, stdin=subprocess.DEVNULL
+    )
+    if r.returncode != 0:
+        return None
+
+    # Lines look like: "import time:   self [us] | cumulative | imported package"
+    pattern = re.compile(r'import time:\s+\d+\s+\|\s+(\d+)\s+\|\s*' + re.escape(module) + r'$')
+    for line in r.stderr.splitlines():
+        match = pattern.search(line)
+        if match:
+            return int(match.group(1)) / 1.0e6
+    return None
+
+
+def get_help_time(script, repeat=3, cwd=SCRIPT_DIR):
+    """
+    Return the median wall clock time of `python <script> --help` in seconds.
+
+    Args:
+        script (str): Script file name
+        repeat (int): Number of runs to take the median over
+        cwd (str): Directory to run the script from
+
+    Returns:
+        float: Median wall clock time in seconds, or None if the script failed
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        r = subprocess.run(
+            [sys.executable, script, '--help'],
+            cwd=cwd, capture_output=True, stdin=subprocess.DEVNULL
+        )
+        timings.append(time.perf_counter() - start)
+        if r.returncode != 0:
+            return None
+    return statistics.median(timings)
+
+
+def main(args):
+    print(f"{'SCRIPT':34} {'IMPORT (s)':>12} {'--help (s)':>12} {'STATUS':>8}")
+    print("-" * 70)
+
+    failures = 0
+    for script in args.scripts:
+        module = os.path.splitext(os.path.basename(script))[0]
+        import_time = get_import_time(module)
+        help_time = get_help_time(script, repeat=args.repeat)
+
+        if help_time is None:
+            status = 'ERROR'
+            failures += 1
+        elif help_time > args.target:
+            status = 'SLOW'
+            failures += 1
+        else:
+            status = 'OK'
+
+        import_txt = f'{import_time:.3f}' if import_time is not None else 'n/a'
+        help_txt = f'{help_time:.3f}' if help_time is not None else 'n/a'
+        print(f"{script:34} {import_txt:>12} {help_txt:>12} {status:>8}")
+
+    print(f"\nTarget: {args.target:.2f}s wall clock for --help")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Cold start benchmark for cloud scripts')
+    parser.add_argument('--scripts', nargs='+', default=DEFAULT_SCRIPTS)
+    parser.add_argument('--target', type=float, default=2.0, help='Maximum --help wall clock time in seconds')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    sys.exit(main(args))
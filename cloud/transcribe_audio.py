@@ -14,17 +14,38 @@
 
 import argparse
 import boto3
+import collections
 import json
+import re
 import requests
 import time
 import os
 
+from boto3.s3.transfer import TransferConfig
+from botocore.exceptions import ClientError
+from concurrent.futures import ThreadPoolExecutor
+
 
 REGION = 'ap-southeast-1'
 S3_BUCKET = 'sagemaker-ap-southeast-1-278313627171'
 s3_client = boto3.client('s3', region_name = REGION)
 transcribe_client = boto3.client('transcribe', region_name = REGION)
 
+MB = 1024 * 1024
+TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold = 8 * MB,
+    multipart_chunksize = 16 * MB,
+    max_concurrency = 10,
+    use_threads = True
+)
+MEDIA_FORMATS = {
+    '.amr': 'amr', '.flac': 'flac', '.m4a': 'm4a', '.mp3': 'mp3',
+    '.mp4': 'mp4', '.ogg': 'ogg', '.wav': 'wav', '.webm': 'webm'
+}
+MAX_CONCURRENT_JOBS = 25  # keep below the account's concurrent transcription job quota
+POLL_INTERVAL_MIN = 5  # seconds
+POLL_INTERVAL_MAX = 60  # seconds
+
 
 def transcribe_file(job_name, file_uri):
     transcribe_client.start_transcription_job(
@@ -63,8 +84,7 @@ def transcribe_file(job_name, file_uri):
 
 
 def upload_transcribe_download(file):
-    with open(file, 'rb') as f:
-        s3_client.upload_fileobj(f, S3_BUCKET, file)
+    s3_client.upload_file(file, S3_BUCKET, file, Config = TRANSFER_CONFIG)
 
     file_uri = f's3://{S3_BUCKET}/{file}'
     basename, _ = os.path.splitext(file)
@@ -73,13 +93,152 @@ def upload_transcribe_download(file):
 
 
 
+def make_job_name(file, batch_id):
+    # Keep the extension, so talk.mp3 and talk.wav get different jobs, and
+    # shorten the file name rather than the batch ID used to list the jobs
+    name = re.sub(r'[^0-9a-zA-Z_-]', '-', os.path.basename(file))
+    return f'{name[:200 - len(batch_id) - 1]}-{batch_id}'
+
+
+def save_transcript(job_name, output_dir):
+    job = transcribe_client.get_transcription_job(TranscriptionJobName = job_name)
+    uri = job['TranscriptionJob']['Transcript']['TranscriptFileUri']
+    response = requests.get(uri, allow_redirects=True)
+    with open(os.path.join(output_dir, f"{job_name}.json"), 'wb') as f:
+        f.write(response.content)
+
+    r = json.loads(response.content)
+    transcript = r['results']['transcripts'][0]['transcript']
+    with open(os.path.join(output_dir, f"{job_name}.txt"), 'w') as f:
+        f.write(transcript)
+    print(f"Transcript saved to {os.path.join(output_dir, job_name)}.txt")
+    return transcript
+
+
+def get_job_statuses(batch_id):
+    """Status of every job in a batch, from list calls rather than one call per job"""
+    statuses = {}
+    kwargs = {'JobNameContains': batch_id, 'MaxResults': 100}
+    while True:
+        r = transcribe_client.list_transcription_jobs(**kwargs)
+        for job in r['TranscriptionJobSummaries']:
+            statuses[job['TranscriptionJobName']] = (job['TranscriptionJobStatus'], job.get('FailureReason', ''))
+        if 'NextToken' not in r:
+            return statuses
+        kwargs['NextToken'] = r['NextToken']
+
+
+def batch_transcribe(folder, output_dir = None, max_concurrent_jobs = MAX_CONCURRENT_JOBS, upload_workers = 4):
+    """
+    Transcribe every media file in a folder.
+
+    Files are uploaded concurrently (multipart for large files), and each job
+    starts as soon as its upload finishes, keeping at most max_concurrent_jobs
+    running. All jobs are polled together with one list call per round. The
+    interval backs off while nothing changes. Transcripts are downloaded as
+    soon as their job completes.
+    """
+    output_dir = output_dir or folder
+    os.makedirs(output_dir, exist_ok=True)
+    files = sorted(
+        os.path.join(folder, name) for name in os.listdir(folder)
+        if os.path.splitext(name)[1].lower() in MEDIA_FORMATS
+    )
+    if not files:
+        print(f"No media files found in {folder}")
+        return {}
+
+    batch_id = time.strftime('%Y%m%d%H%M%S')
+    start_time = time.time()
+    ready = collections.deque()  # (file, key) uploaded but not yet started
+    active = {}  # job name -> file
+    results = {}  # file -> job status
+    downloads = []
+    interval = POLL_INTERVAL_MIN
+
+    with ThreadPoolExecutor(max_workers = upload_workers) as upload_executor, \
+         ThreadPoolExecutor(max_workers = 4) as download_executor:
+
+        uploads = {}
+        for file in files:
+            key = f'transcribe/{batch_id}/{os.path.basename(file)}'
+            future = upload_executor.submit(s3_client.upload_file, file, S3_BUCKET, key, Config = TRANSFER_CONFIG)
+            uploads[future] = (file, key)
+        print(f"Uploading {len(files)} files to s3://{S3_BUCKET}/transcribe/{batch_id}/")
+
+        while uploads or ready or active:
+            for future in [future for future in uploads if future.done()]:
+                file, key = uploads.pop(future)
+                if future.exception():
+                    print(f"Upload failed for {file}: {future.exception()}")
+                    results[file] = 'UPLOAD_FAILED'
+                else:
+                    ready.append((file, key))
+
+            while ready and len(active) < max_concurrent_jobs:
+                file, key = ready.popleft()
+                job_name = make_job_name(file, batch_id)
+                try:
+                    transcribe_client.start_transcription_job(
+                        TranscriptionJobName = job_name,
+                        Media = {'MediaFileUri': f's3://{S3_BUCKET}/{key}'},
+                        MediaFormat = MEDIA_FORMATS[os.path.splitext(file)[1].lower()],
+                        LanguageCode = 'en-US'
+                    )
+                except ClientError as e:
+                    if e.response['Error']['Code'] == 'LimitExceededException':
+                        # Concurrent job quota reached, try again next round
+                        ready.appendleft((file, key))
+                        break
+                    print(f"Failed to start job for {file}: {e}")
+                    results[file] = 'START_FAILED'
+                    continue
+                active[job_name] = file
+                print(f"Started job {job_name}")
+
+            finished = 0
+            if active:
+                statuses = get_job_statuses(batch_id)
+                for job_name in list(active):
+                    status, reason = statuses.get(job_name, ('QUEUED', ''))
+                    if status in ['COMPLETED', 'FAILED']:
+                        file = active.pop(job_name)
+                        results[file] = status
+                        finished += 1
+                        print(f"Job {job_name} is {status}. {reason}".strip())
+                        if status == 'COMPLETED':
+                            downloads.append(download_executor.submit(save_transcript, job_name, output_dir))
+
+            if not (uploads or ready or active):
+                break
+            interval = POLL_INTERVAL_MIN if finished else min(interval * 1.5, POLL_INTERVAL_MAX)
+            time.sleep(interval if active else 1)
+
+        for future in downloads:
+            try:
+                future.result()
+            except Exception as e:
+                print(f"Transcript download failed: {e}")
+
+    completed = sum(1 for status in results.values() if status == 'COMPLETED')
+    print(f"{completed}/{len(files)} files transcribed in {time.time() - start_time:.0f}s")
+    return results
+
+
 if __name__ == '__main__':
     parser = argparse.ArgumentParser()
     parser.add_argument('--file', type=str, default='')
+    parser.add_argument('--folder', type=str, default='')
+    parser.add_argument('--output-dir', type=str, default=None)
+    parser.add_argument('--max-concurrent-jobs', type=int, default=MAX_CONCURRENT_JOBS)
     args = parser.parse_args()
 
     if args.file:
         transcript = upload_transcribe_download(args.file)
 
+    if args.folder:
+        batch_transcribe(args.folder, args.output_dir, args.max_concurrent_jobs)
+
     # Usage:
     # python transcribe_audio.py --file transcribe_ab3.mp4
+    # python transcribe_audio.py --folder recordings/ --max-concurrent-jobs 50
@@ -13,6 +13,10 @@ Features:
 - Multi-runtime support (Node.js and Python)
 - AI-powered code compatibility analysis
 - Parallel processing across regions and functions
+- Pipelined code downloads and AI analysis on separately sized thread pools
+- Content-addressed cache (by CodeSha256) of extracted code and AI analysis
+- Concurrent runtime updates with per-region rate limiting and backoff
+- Token-budgeted Bedrock requests: small functions batched, large ones chunked
 - Multiple execution modes (dry-run, interactive, force)
 - Comprehensive JSON and text reporting
 - Security-focused code handling
@@ -77,11 +81,14 @@ Lambda_Runtime_Update_Tool_with_Multi_Runtime_Support_2025_12_14T08_49_19.py
 # Standard library imports
 import argparse
 import asyncio
-import io
+import hashlib
 import json
 import logging
 import os
+import random
 import re
+import tempfile
+import threading
 import time
 import urllib.error
 import urllib.request
@@ -94,13 +101,33 @@ from typing import Dict, List, Tuple, Optional
 
 # Third-party imports
 import boto3
-from botocore.exceptions import ClientError
+from botocore.exceptions import ClientError, WaiterError
 
 # Constants
 DEFAULT_REGIONS = ['us-east-1', 'us-west-2', 'ap-southeast-1']
-MAX_DOWNLOAD_SIZE = 50 * 1024 * 1024  # 50MB
+MAX_DOWNLOAD_SIZE = 250 * 1024 * 1024  # 250MB, larger packages are skipped (not truncated)
+DOWNLOAD_SPOOL_SIZE = 8 * 1024 * 1024  # packages up to 8MB stay in memory, larger ones go to disk
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024  # 1MB
 DOWNLOAD_TIMEOUT = 30  # seconds
 MAX_FILE_SIZE_FOR_ANALYSIS = 1024 * 1024  # 1MB per file
+PIPELINE_QUEUE_SIZE = 10  # downloaded functions waiting for analysis
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'lambda_updater')  # per user, holds function source
+DEFAULT_UPDATE_RATE = 5.0  # update_function_configuration calls per second per region
+UPDATE_MAX_RETRIES = 6
+UPDATE_BACKOFF_BASE = 1.0  # seconds
+UPDATE_BACKOFF_MAX = 30.0  # seconds
+UPDATE_WAITER_DELAY = 2  # seconds between function_updated waiter polls
+UPDATE_WAITER_MAX_ATTEMPTS = 90
+RETRYABLE_UPDATE_ERRORS = ('ResourceConflictException', 'TooManyRequestsException')
+
+# Token budgets for Bedrock analysis (estimated locally, see estimate_tokens)
+CHARS_PER_TOKEN = 4
+CHUNK_TOKEN_BUDGET = 60000  # code tokens per request before a function is split into chunks
+SMALL_FUNCTION_TOKENS = 4000  # functions below this are batched with others
+BATCH_TOKEN_BUDGET = 24000  # code tokens per batched request
+DEFAULT_MAX_BATCH_FUNCTIONS = 8
+ANALYSIS_MAX_TOKENS = 4000  # response tokens for a single function
+BATCH_ANALYSIS_MAX_TOKENS = 8000  # response tokens for a batch
 
 # Setup logging
 logging.basicConfig(
@@ -169,6 +196,48 @@ Provide your analysis in the following JSON format:
 }}
 """
 
+BEDROCK_BATCH_ANALYSIS_PROMPT_TEMPLATE = """You are an expert AWS Lambda developer analyzing {runtime_type} code for runtime migration compatibility.
+
+Target Runtime: {target_runtime}
+
+Below is the code of {function_count} separate Lambda functions. Analyze each function independently.
+
+{functions_context}
+
+For each function, identify:
+
+1. **Critical Issues**: Problems that will cause the function to fail (e.g., deprecated APIs, breaking changes)
+2. **Warnings**: Potential issues that may cause problems (e.g., deprecated features, performance concerns)
+3. **Recommendations**: Best practices and improvements for the new runtime
+4. **Dependencies**: Any package dependencies that may need updates
+
+{runtime_specific_guidance}
+
+Provide your analysis as one JSON object with a section for every Function ID, in the following format:
+{{
+  "functions": {{
+    "<Function ID>": {{
+      "critical_issues": [
+        {{"issue": "description", "location": "file:line", "fix": "suggested fix"}}
+      ],
+      "warnings": [
+        {{"issue": "description", "location": "file:line", "recommendation": "suggestion"}}
+      ],
+      "recommendations": ["recommendation1", "recommendation2"],
+      "dependencies_to_check": ["package1", "package2"],
+      "overall_assessment": "SAFE_TO_UPGRADE | NEEDS_CHANGES | REQUIRES_TESTING",
+      "summary": "brief summary of findings"
+    }}
+  }}
+}}
+"""
+
+# Changes whenever the prompts change, so cached analyses from older prompts are not reused
+ANALYSIS_PROMPT_VERSION = hashlib.sha256(
+    (BEDROCK_ANALYSIS_PROMPT_TEMPLATE + BEDROCK_BATCH_ANALYSIS_PROMPT_TEMPLATE +
+     NODEJS_ANALYSIS_GUIDANCE + PYTHON_ANALYSIS_GUIDANCE).encode('utf-8')
+).hexdigest()[:12]
+
 CLI_HELP_EXAMPLES = """
 Examples:
   # Update Node.js functions from 20.x to 22.x with AI review
@@ -235,6 +304,7 @@ class FunctionInfo:
         arn: The full ARN (Amazon Resource Name) of the function
         region: AWS region where the function is deployed
         runtime: Current runtime version (e.g., 'nodejs20.x', 'python3.9')
+        code_sha256: CodeSha256 of the deployment package, used as the analysis cache key
         code_files: Dictionary mapping file names to their source code content
         ai_analysis: Results from Bedrock AI analysis of the function code
         assessment: AI's overall assessment of upgrade safety
@@ -247,6 +317,7 @@ class FunctionInfo:
     arn: str
     region: str
     runtime: str
+    code_sha256: Optional[str] = None
     code_files: Optional[Dict[str, str]] = None
     ai_analysis: Optional[Dict] = None
     assessment: AIAssessment = AIAssessment.NOT_ANALYZED
@@ -255,12 +326,223 @@ class FunctionInfo:
     failed: bool = False
     error_message: Optional[str] = None
 
+@dataclass
+class StageStats:
+    """
+    Throughput counters for one stage of the download/analysis pipeline.
+    
+    Attributes:
+        name: Stage name used in the report
+        items: Number of items the stage has completed
+        busy_seconds: Sum of the time spent on each item
+        started: perf_counter() value when the first item completed
+        finished: perf_counter() value when the last item completed
+    """
+    name: str
+    items: int = 0
+    busy_seconds: float = 0.0
+    started: Optional[float] = None
+    finished: Optional[float] = None
+    
+    def record(self, elapsed: float) -> None:
+        now = time.perf_counter()
+        if self.started is None:
+            self.started = now - elapsed
+        self.finished = now
+        self.items += 1
+        self.busy_seconds += elapsed
+    
+    def summary(self) -> str:
+        if not self.items:
+            return f"{self.name}: no items"
+        wall = max(self.finished - self.started, 1e-9)
+        return (f"{self.name}: {self.items} item(s) in {wall:.1f}s "
+                f"({self.items / wall:.2f}/s, avg {self.busy_seconds / self.items:.2f}s per item)")
+
+class TokenBucket:
+    """
+    Asyncio token bucket limiting the rate of calls to an API.
+    
+    Tokens refill continuously at `rate` per second up to `capacity`; each
+    acquire() takes one token, waiting for a refill if none is left.
+    """
+    
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+    
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+class AnalysisCache:
+    """
+    Persistent, content-addressed cache of extracted code and AI analysis results.
+    
+    Entries are keyed by (CodeSha256, source runtime, target runtime, model,
+    prompt version) and stored as one JSON file per key. An entry may hold only
+    the extracted code (if analysis failed), so a re-run skips the download and
+    only pays for the Bedrock call.
+    """
+    
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.hits = 0
+        self.misses = 0
+        # Entries hold plaintext function source, so keep the directory private
+        os.makedirs(cache_dir, mode=0o700, exist_ok=True)
+    
+    @staticmethod
+    def make_key(code_sha256: str, source_runtime: str, target_runtime: str,
+                 model: str, prompt_version: str) -> str:
+        key_text = '|'.join([code_sha256, source_runtime, target_runtime, model, prompt_version])
+        return hashlib.sha256(key_text.encode('utf-8')).hexdigest()
+    
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f'{key}.json')
+    
+    def get(self, key: str) -> Optional[Dict]:
+        """Return the cached entry for a key, or None if absent or unreadable"""
+        try:
+            with open(self._path(key), 'r') as f:
+                entry = json.load(f)
+            self.hits += 1
+            return entry
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Ignoring unreadable cache entry {key}: {e}")
+            self.misses += 1
+            return None
+    
+    def put(self, key: str, code_files: Dict[str, str], ai_analysis: Optional[Dict] = None) -> None:
+        """Write an entry atomically, so an interrupted run never leaves a partial file"""
+        tmp_path = self._path(key) + '.tmp'
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump({'code_files': code_files, 'ai_analysis': ai_analysis}, f)
+            os.replace(tmp_path, self._path(key))
+        except OSError as e:
+            logger.warning(f"Failed to write cache entry {key}: {e}")
+
+# ============================================================================
+# TOKEN BUDGETING
+# ============================================================================
+
+ASSESSMENT_SEVERITY = ['SAFE_TO_UPGRADE', 'REQUIRES_TESTING', 'NEEDS_CHANGES']
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the token count of a text locally (about 4 characters per token)"""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+def estimate_code_tokens(code_files: Dict[str, str]) -> int:
+    """Estimate the tokens needed to send a set of code files, including file headers"""
+    return sum(estimate_tokens(filename) + estimate_tokens(content) + 10
+               for filename, content in code_files.items())
+
+def plan_code_chunks(code_files: Dict[str, str], token_budget: int = CHUNK_TOKEN_BUDGET) -> List[Dict[str, str]]:
+    """
+    Split code files into chunks that each fit within a token budget.
+    
+    Files are packed in order; a file larger than the budget on its own is
+    split on line boundaries into parts named "<file> (part N)". Lines that
+    are larger than the budget themselves (minified or bundled code) are
+    split by characters.
+    """
+    part_chars = max(1, (token_budget - 20) * CHARS_PER_TOKEN)
+    pieces = []
+    for filename, content in code_files.items():
+        if estimate_code_tokens({filename: content}) <= token_budget:
+            pieces.append((filename, content))
+            continue
+        lines = [line[i:i + part_chars]
+                 for line in content.splitlines(keepends=True)
+                 for i in range(0, len(line), part_chars)]
+        part, part_lines, part_tokens = 1, [], 0
+        for line in lines:
+            line_tokens = estimate_tokens(line)
+            if part_lines and part_tokens + line_tokens > token_budget - 20:
+                pieces.append((f"{filename} (part {part})", ''.join(part_lines)))
+                part, part_lines, part_tokens = part + 1, [], 0
+            part_lines.append(line)
+            part_tokens += line_tokens
+        if part_lines:
+            pieces.append((f"{filename} (part {part})", ''.join(part_lines)))
+    
+    chunks, current, current_tokens = [], {}, 0
+    for filename, content in pieces:
+        tokens = estimate_code_tokens({filename: content})
+        if current and current_tokens + tokens > token_budget:
+            chunks.append(current)
+            current, current_tokens = {}, 0
+        current[filename] = content
+        current_tokens += tokens
+    if current:
+        chunks.append(current)
+    return chunks
+
+def merge_analyses(analyses: List[Dict]) -> Dict:
+    """
+    Reduce the analyses of a function's chunks into a single analysis.
+    
+    Issues are concatenated, recommendations and dependencies de-duplicated,
+    and the overall assessment is the most severe one. If any chunk failed,
+    the error is returned, since part of the code was not reviewed.
+    """
+    for analysis in analyses:
+        if 'error' in analysis:
+            return analysis
+    
+    merged = {
+        "critical_issues": [],
+        "warnings": [],
+        "recommendations": [],
+        "dependencies_to_check": [],
+        "overall_assessment": 'SAFE_TO_UPGRADE',
+        "summary": ''
+    }
+    summaries = []
+    for analysis in analyses:
+        merged["critical_issues"].extend(analysis.get('critical_issues', []))
+        merged["warnings"].extend(analysis.get('warnings', []))
+        for field in ("recommendations", "dependencies_to_check"):
+            for item in analysis.get(field, []):
+                if item not in merged[field]:
+                    merged[field].append(item)
+        assessment = analysis.get('overall_assessment')
+        if assessment not in ASSESSMENT_SEVERITY:
+            merged["overall_assessment"] = assessment
+        elif (merged["overall_assessment"] in ASSESSMENT_SEVERITY and
+              ASSESSMENT_SEVERITY.index(assessment) > ASSESSMENT_SEVERITY.index(merged["overall_assessment"])):
+            merged["overall_assessment"] = assessment
+        if analysis.get('summary'):
+            summaries.append(analysis['summary'])
+    merged["summary"] = ' '.join(summaries)
+    return merged
+
 class LambdaRuntimeUpdater:
     def __init__(self, regions: List[str], target_runtime: str, mode: str, 
                  source_runtimes: Optional[List[str]] = None,
                  ai_review: bool = False, 
                  bedrock_model: str = 'anthropic.claude-3-5-sonnet-20241022-v2:0',
-                 max_workers: int = 5):
+                 max_workers: int = 5,
+                 download_workers: Optional[int] = None,
+                 analysis_workers: Optional[int] = None,
+                 queue_size: int = PIPELINE_QUEUE_SIZE,
+                 cache_dir: Optional[str] = DEFAULT_CACHE_DIR,
+                 update_rate: float = DEFAULT_UPDATE_RATE,
+                 max_batch_functions: int = DEFAULT_MAX_BATCH_FUNCTIONS):
         self.regions = regions
         self.target_runtime = target_runtime
         self.mode = mode
@@ -268,7 +550,17 @@ class LambdaRuntimeUpdater:
         self.ai_review = ai_review
         self.bedrock_model = bedrock_model
         self.max_workers = max_workers
+        self.download_workers = download_workers or max_workers
+        self.analysis_workers = analysis_workers or max_workers
+        self.queue_size = queue_size
+        self.update_rate = update_rate
+        self.max_batch_functions = max_batch_functions
+        self.bedrock_calls = 0
+        self.bedrock_input_tokens = 0
+        self._bedrock_stats_lock = threading.Lock()
         self.bedrock_client = None
+        self._lambda_clients = {}
+        self.cache = AnalysisCache(cache_dir) if (ai_review and cache_dir) else None
         
         # Validate runtime upgrade path
         self._validate_runtime_upgrade()
@@ -346,36 +638,64 @@ class LambdaRuntimeUpdater:
         return functions
     
     def get_function_code(self, lambda_client, function_name: str) -> Optional[Dict[str, str]]:
-        """Download and extract Lambda function code with security measures"""
+        """
+        Download and extract Lambda function code with security measures.
+        
+        The package is streamed into a spooled temporary file, so memory use per
+        download stays bounded however large the package is. Only members that
+        match the runtime's file extensions and size limit are decompressed.
+        """
         try:
             response = lambda_client.get_function(FunctionName=function_name)
-            code_location = response['Code']['Location']
-            
-            # Download with timeout and size limits
-            request = urllib.request.Request(code_location)
-            with urllib.request.urlopen(request, timeout=DOWNLOAD_TIMEOUT) as response:
-                # Read with size limit to prevent memory issues
-                zip_data = response.read(MAX_DOWNLOAD_SIZE)
+            code_location = response['Code'].get('Location')
+            if not code_location:
+                logger.warning(f"No downloadable code package for {function_name} "
+                               f"(package type: {response['Code'].get('RepositoryType', 'unknown')})")
+                return None
             
+            file_extensions = tuple(RUNTIME_MAPPINGS[self.runtime_type]['file_extensions'])
             code_files = {}
-            file_extensions = RUNTIME_MAPPINGS[self.runtime_type]['file_extensions']
             
-            with zipfile.ZipFile(io.BytesIO(zip_data)) as zip_ref:
-                for file_info in zip_ref.filelist:
-                    # Security check: prevent path traversal
-                    if '..' in file_info.filename or file_info.filename.startswith('/'):
-                        logger.warning(f"Skipping suspicious file path: {file_info.filename}")
-                        continue
-                    
-                    # Check file size
-                    if file_info.file_size > MAX_FILE_SIZE_FOR_ANALYSIS:
-                        logger.warning(f"Skipping large file: {file_info.filename} ({file_info.file_size} bytes)")
-                        continue
-                    
-                    if any(file_info.filename.endswith(ext) for ext in file_extensions):
+            with tempfile.SpooledTemporaryFile(max_size=DOWNLOAD_SPOOL_SIZE) as package:
+                # Download with timeout, streaming in chunks up to the size limit
+                request = urllib.request.Request(code_location)
+                with urllib.request.urlopen(request, timeout=DOWNLOAD_TIMEOUT) as response:
+                    content_length = int(response.headers.get('Content-Length') or 0)
+                    if content_length > MAX_DOWNLOAD_SIZE:
+                        logger.warning(f"Skipping {function_name}: package is {content_length} bytes "
+                                       f"(limit {MAX_DOWNLOAD_SIZE})")
+                        return None
+                    while chunk := response.read(DOWNLOAD_CHUNK_SIZE):
+                        package.write(chunk)
+                        if package.tell() > MAX_DOWNLOAD_SIZE:
+                            logger.warning(f"Skipping {function_name}: package exceeds {MAX_DOWNLOAD_SIZE} bytes")
+                            return None
+                
+                package.seek(0)
+                # ZipFile only parses the central directory here; members are read on demand
+                with zipfile.ZipFile(package) as zip_ref:
+                    for file_info in zip_ref.infolist():
+                        if file_info.is_dir() or not file_info.filename.endswith(file_extensions):
+                            continue
+                        
+                        # Security check: prevent path traversal
+                        if '..' in file_info.filename or file_info.filename.startswith('/'):
+                            logger.warning(f"Skipping suspicious file path: {file_info.filename}")
+                            continue
+                        
+                        # Check file size
+                        if file_info.file_size > MAX_FILE_SIZE_FOR_ANALYSIS:
+                            logger.warning(f"Skipping large file: {file_info.filename} ({file_info.file_size} bytes)")
+                            continue
+                        
                         try:
-                            content = zip_ref.read(file_info.filename).decode('utf-8')
-                            code_files[file_info.filename] = content
+                            # Never decompress more than the limit, whatever the header claims
+                            with zip_ref.open(file_info) as member:
+                                data = member.read(MAX_FILE_SIZE_FOR_ANALYSIS + 1)
+                            if len(data) > MAX_FILE_SIZE_FOR_ANALYSIS:
+                                logger.warning(f"Skipping large file: {file_info.filename} (size mismatch)")
+                                continue
+                            code_files[file_info.filename] = data.decode('utf-8')
                         except UnicodeDecodeError:
                             logger.warning(f"Skipping binary file: {file_info.filename}")
                             continue
@@ -388,6 +708,9 @@ class LambdaRuntimeUpdater:
         except urllib.error.URLError as e:
             logger.warning(f"Network error downloading code for {function_name}: {e}")
             return None
+        except zipfile.BadZipFile as e:
+            logger.warning(f"Invalid code package for {function_name}: {e}")
+            return None
         except ClientError as e:
             logger.warning(f"AWS error getting function code for {function_name}: {e}")
             return None
@@ -395,29 +718,65 @@ class LambdaRuntimeUpdater:
             logger.error(f"Unexpected error retrieving code for {function_name}: {e}")
             return None
     
-    def analyze_code_with_bedrock(self, function_name: str, code_files: Dict[str, str], 
-                                   current_runtime: str, target_runtime: str) -> Dict:
-        """Use Bedrock to analyze code for compatibility issues"""
-        if not self.bedrock_client or not code_files:
-            return {"error": "No code available or Bedrock not initialized"}
-        
-        # Sanitize code content for logging (remove potential sensitive data)
+    def _sanitize_code_files(self, code_files: Dict[str, str]) -> Dict[str, str]:
+        """Redact likely secrets before code is sent for analysis"""
         sanitized_files = {}
         for filename, content in code_files.items():
             # Basic sanitization - remove potential secrets
             sanitized_content = re.sub(r'(password|secret|key|token)\s*[:=]\s*["\'][^"\']+["\']', 
                                      r'\1: "[REDACTED]"', content, flags=re.IGNORECASE)
             sanitized_files[filename] = sanitized_content
-        
-        code_context = "\n\n".join([
+        return sanitized_files
+    
+    def _build_code_context(self, code_files: Dict[str, str]) -> str:
+        return "\n\n".join([
             f"File: {filename}\n```{self.runtime_type}\n{content}\n```"
-            for filename, content in sanitized_files.items()
+            for filename, content in code_files.items()
         ])
-        
+    
+    def _get_runtime_specific_guidance(self) -> str:
         if self.runtime_type == 'nodejs':
-            runtime_specific_guidance = NODEJS_ANALYSIS_GUIDANCE
+            return NODEJS_ANALYSIS_GUIDANCE
         else:  # python
-            runtime_specific_guidance = PYTHON_ANALYSIS_GUIDANCE
+            return PYTHON_ANALYSIS_GUIDANCE
+    
+    def _invoke_bedrock(self, prompt: str, max_tokens: int) -> Dict:
+        """Send a prompt to Bedrock and return the first JSON object in the reply"""
+        with self._bedrock_stats_lock:
+            self.bedrock_calls += 1
+            self.bedrock_input_tokens += estimate_tokens(prompt)
+        
+        response = self.bedrock_client.invoke_model(
+            modelId=self.bedrock_model,
+            contentType="application/json",
+            accept="application/json",
+            body=json.dumps({
+                "anthropic_version": "bedrock-2023-05-31",
+                "max_tokens": max_tokens,
+                "messages": [
+                    {
+                        "role": "user",
+                        "content": prompt
+                    }
+                ],
+                "temperature": 0.1
+            })
+        )
+        
+        response_body = json.loads(response['body'].read())
+        analysis_text = response_body['content'][0]['text']
+        
+        json_match = re.search(r'\{.*\}', analysis_text, re.DOTALL)
+        if json_match:
+            return json.loads(json_match.group())
+        return {"error": "Could not parse AI response", "raw_response": analysis_text}
+    
+    def _analyze_chunk(self, function_name: str, code_files: Dict[str, str],
+                       current_runtime: str, target_runtime: str, scope_note: str = '') -> Dict:
+        """Analyze one chunk of a function's code with a single Bedrock call"""
+        code_context = self._build_code_context(code_files)
+        if scope_note:
+            code_context = f"{scope_note}\n\n{code_context}"
         
         prompt = BEDROCK_ANALYSIS_PROMPT_TEMPLATE.format(
             runtime_type=self.runtime_type.upper(),
@@ -425,38 +784,11 @@ class LambdaRuntimeUpdater:
             current_runtime=current_runtime,
             target_runtime=target_runtime,
             code_context=code_context,
-            runtime_specific_guidance=runtime_specific_guidance
+            runtime_specific_guidance=self._get_runtime_specific_guidance()
         )
 
         try:
-            response = self.bedrock_client.invoke_model(
-                modelId=self.bedrock_model,
-                contentType="application/json",
-                accept="application/json",
-                body=json.dumps({
-                    "anthropic_version": "bedrock-2023-05-31",
-                    "max_tokens": 4000,
-                    "messages": [
-                        {
-                            "role": "user",
-                            "content": prompt
-                        }
-                    ],
-                    "temperature": 0.1
-                })
-            )
-            
-            response_body = json.loads(response['body'].read())
-            analysis_text = response_body['content'][0]['text']
-            
-            json_match = re.search(r'\{.*\}', analysis_text, re.DOTALL)
-            if json_match:
-                analysis = json.loads(json_match.group())
-            else:
-                analysis = {"error": "Could not parse AI response", "raw_response": analysis_text}
-            
-            return analysis
-            
+            return self._invoke_bedrock(prompt, ANALYSIS_MAX_TOKENS)
         except ClientError as e:
             logger.error(f"Bedrock client error for {function_name}: {e}")
             return {"error": f"Bedrock client error: {str(e)}"}
@@ -467,92 +799,391 @@ class LambdaRuntimeUpdater:
             logger.error(f"Bedrock analysis failed for {function_name}: {e}")
             return {"error": f"Bedrock analysis failed: {str(e)}"}
     
-    def update_function_runtime(self, lambda_client, function_name: str) -> Tuple[bool, str]:
-        """Update a single function's runtime with retry logic"""
-        max_retries = 3
-        for attempt in range(max_retries):
+    def analyze_code_with_bedrock(self, function_name: str, code_files: Dict[str, str], 
+                                   current_runtime: str, target_runtime: str) -> Dict:
+        """
+        Use Bedrock to analyze code for compatibility issues.
+        
+        Code that exceeds CHUNK_TOKEN_BUDGET is split into chunks that are
+        analyzed separately and merged (map-reduce), so large functions never
+        exceed the model's context window.
+        """
+        if not self.bedrock_client or not code_files:
+            return {"error": "No code available or Bedrock not initialized"}
+        
+        chunks = plan_code_chunks(self._sanitize_code_files(code_files))
+        if len(chunks) == 1:
+            return self._analyze_chunk(function_name, chunks[0], current_runtime, target_runtime)
+        
+        logger.info(f"    {function_name}: splitting code into {len(chunks)} chunks for analysis")
+        analyses = [
+            self._analyze_chunk(
+                function_name, chunk, current_runtime, target_runtime,
+                scope_note=(f"Note: this is part {i} of {len(chunks)} of the function's code. "
+                            f"The other parts are analyzed separately; only report issues in this part.")
+            )
+            for i, chunk in enumerate(chunks, 1)
+        ]
+        return merge_analyses(analyses)
+    
+    def analyze_batch_with_bedrock(self, functions: List[FunctionInfo]) -> Dict[str, Dict]:
+        """
+        Analyze several small functions with a single Bedrock call.
+        
+        Returns a dict mapping each function's ARN to its analysis. Functions
+        missing from the model's reply are analyzed individually instead.
+        """
+        function_ids = {f"fn{i}": func_info for i, func_info in enumerate(functions, 1)}
+        functions_context = "\n\n".join([
+            f"### Function ID: {function_id}\n"
+            f"Function Name: {func_info.name}\n"
+            f"Current Runtime: {func_info.runtime}\n\n"
+            f"{self._build_code_context(self._sanitize_code_files(func_info.code_files))}"
+            for function_id, func_info in function_ids.items()
+        ])
+        prompt = BEDROCK_BATCH_ANALYSIS_PROMPT_TEMPLATE.format(
+            runtime_type=self.runtime_type.upper(),
+            target_runtime=self.target_runtime,
+            function_count=len(functions),
+            functions_context=functions_context,
+            runtime_specific_guidance=self._get_runtime_specific_guidance()
+        )
+        
+        try:
+            sections = self._invoke_bedrock(prompt, BATCH_ANALYSIS_MAX_TOKENS).get('functions', {})
+        except Exception as e:
+            logger.warning(f"Batch analysis failed, falling back to individual analysis: {e}")
+            sections = {}
+        
+        results = {}
+        for function_id, func_info in function_ids.items():
+            analysis = sections.get(function_id)
+            if not isinstance(analysis, dict) or 'overall_assessment' not in analysis:
+                analysis = self.analyze_code_with_bedrock(
+                    func_info.name, func_info.code_files, func_info.runtime, self.target_runtime
+                )
+            results[func_info.arn] = analysis
+        return results
+    
+    def wait_for_function_updated(self, lambda_client, function_name: str) -> Tuple[bool, str]:
+        """Block until a configuration update finishes, using LastUpdateStatus on failure"""
+        try:
+            waiter = lambda_client.get_waiter('function_updated')
+            waiter.wait(
+                FunctionName=function_name,
+                WaiterConfig={'Delay': UPDATE_WAITER_DELAY, 'MaxAttempts': UPDATE_WAITER_MAX_ATTEMPTS}
+            )
+            return True, "Success"
+        except WaiterError as e:
+            try:
+                config = lambda_client.get_function_configuration(FunctionName=function_name)
+            except ClientError:
+                return False, f"Update did not complete: {e}"
+            status = config.get('LastUpdateStatus', 'Unknown')
+            reason = config.get('LastUpdateStatusReason', str(e))
+            return False, f"LastUpdateStatus {status}: {reason}"
+    
+    async def update_function_runtime_async(self, executor: ThreadPoolExecutor, bucket: TokenBucket,
+                                            func_info: FunctionInfo) -> Tuple[bool, str]:
+        """
+        Update a single function's runtime under the region's rate limit.
+        
+        ResourceConflictException (an update already in progress) and throttling
+        are retried with full-jitter exponential backoff. Each attempt takes a
+        token from the region's bucket. On success, waits for the update to
+        finish before returning.
+        """
+        loop = asyncio.get_running_loop()
+        lambda_client = self._get_lambda_client(func_info.region)
+        
+        for attempt in range(UPDATE_MAX_RETRIES):
+            await bucket.acquire()
             try:
-                response = lambda_client.update_function_configuration(
-                    FunctionName=function_name,
-                    Runtime=self.target_runtime
+                await loop.run_in_executor(
+                    executor,
+                    lambda: lambda_client.update_function_configuration(
+                        FunctionName=func_info.name,
+                        Runtime=self.target_runtime
+                    )
                 )
-                logger.info(f"Successfully updated {function_name} to {self.target_runtime}")
-                return True, "Success"
             except ClientError as e:
                 error_code = e.response['Error']['Code']
-                if error_code == 'ResourceConflictException' and attempt < max_retries - 1:
-                    logger.warning(f"Resource conflict for {function_name}, retrying in 2 seconds...")
-                    time.sleep(2)
+                if error_code in RETRYABLE_UPDATE_ERRORS and attempt < UPDATE_MAX_RETRIES - 1:
+                    delay = random.uniform(0, min(UPDATE_BACKOFF_MAX, UPDATE_BACKOFF_BASE * 2 ** attempt))
+                    logger.warning(f"{error_code} for {func_info.name}, retrying in {delay:.1f} seconds...")
+                    await asyncio.sleep(delay)
                     continue
-                else:
-                    logger.error(f"Failed to update {function_name}: {e}")
-                    return False, str(e)
+                logger.error(f"Failed to update {func_info.name}: {e}")
+                return False, str(e)
             except Exception as e:
-                logger.error(f"Unexpected error updating {function_name}: {e}")
+                logger.error(f"Unexpected error updating {func_info.name}: {e}")
                 return False, str(e)
+            
+            success, result = await loop.run_in_executor(
+                executor, self.wait_for_function_updated, lambda_client, func_info.name
+            )
+            if success:
+                logger.info(f"Successfully updated {func_info.name} to {self.target_runtime}")
+            return success, result
         
         return False, "Max retries exceeded"
     
-    async def process_function_async(self, lambda_client, function: Dict, region: str, 
-                                    index: int, total: int) -> FunctionInfo:
-        """Process a single function asynchronously"""
-        func_info = FunctionInfo(
-            name=function['FunctionName'],
-            arn=function['FunctionArn'],
-            region=region,
-            runtime=function['Runtime']
+    async def apply_update_async(self, executor: ThreadPoolExecutor, bucket: TokenBucket,
+                                 func_info: FunctionInfo) -> None:
+        """Update a function and record the outcome on its FunctionInfo"""
+        logger.info(f"    ⟳ Updating {func_info.name} ({func_info.region}) to {self.target_runtime}...")
+        success, result = await self.update_function_runtime_async(executor, bucket, func_info)
+        
+        if success:
+            logger.info(f"    ✓ {func_info.name}: Successfully updated")
+            func_info.updated = True
+        else:
+            logger.error(f"    ✗ {func_info.name}: Failed: {result}")
+            func_info.failed = True
+            func_info.error_message = result
+    
+    async def decide_update_async(self, func_info: FunctionInfo) -> Optional[bool]:
+        """
+        Decide whether a function should be updated, prompting if the mode requires it.
+        
+        Prompts run in a worker thread so updates already scheduled keep going
+        while the user answers. Returns True to update, False to skip, or None
+        if the user asked to quit.
+        """
+        loop = asyncio.get_running_loop()
+        logger.info(f"\nProcessing: {func_info.name} ({func_info.region})")
+        
+        needs_prompt = self.mode == 'interactive'
+        if self.mode == 'force' and self.ai_review:
+            should_update, reason = self.should_update_in_force_mode(func_info)
+            if should_update is None:
+                logger.info(f"    ⚠ {reason}")
+                needs_prompt = True
+            elif not should_update:
+                logger.info(f"    ⊘ {reason}")
+                func_info.skipped = True
+                return False
+            else:
+                logger.info(f"    ✓ {reason}")
+        
+        if needs_prompt:
+            user_choice = await loop.run_in_executor(None, self.prompt_user_interactive, func_info)
+            if user_choice == 'quit':
+                logger.warning("\n⚠ User requested quit. Stopping execution.")
+                return None
+            elif user_choice == 'no':
+                logger.info(f"    ⊘ Skipped by user")
+                func_info.skipped = True
+                return False
+        
+        return True
+    
+    def _get_lambda_client(self, region: str):
+        """Get a Lambda client for a region, reusing one client per region"""
+        if region not in self._lambda_clients:
+            self._lambda_clients[region] = boto3.client('lambda', region_name=region)
+        return self._lambda_clients[region]
+    
+    def _apply_ai_analysis(self, func_info: FunctionInfo) -> None:
+        """Set the function's assessment from its AI analysis and log the outcome"""
+        if not func_info.code_files:
+            logger.warning(f"    ⚠ Could not retrieve code for analysis: {func_info.name}")
+            func_info.assessment = AIAssessment.NOT_ANALYZED
+            return
+        
+        if 'error' not in func_info.ai_analysis:
+            assessment_str = func_info.ai_analysis.get('overall_assessment', 'NOT_ANALYZED')
+            try:
+                func_info.assessment = AIAssessment(assessment_str)
+            except ValueError:
+                logger.warning(f"Invalid assessment value: {assessment_str}")
+                func_info.assessment = AIAssessment.ERROR
+            
+            logger.info(f"    {func_info.name}: Assessment: {func_info.assessment.value}")
+            
+            if func_info.assessment == AIAssessment.NEEDS_CHANGES:
+                logger.warning(f"    ⚠ {func_info.name}: Critical issues found - review required")
+            elif func_info.assessment == AIAssessment.REQUIRES_TESTING:
+                logger.warning(f"    ⚠ {func_info.name}: Testing recommended before upgrade")
+        else:
+            func_info.assessment = AIAssessment.ERROR
+            logger.error(f"    ⚠ {func_info.name}: AI analysis error: {func_info.ai_analysis.get('error', 'Unknown')}")
+    
+    def _cache_key(self, func_info: FunctionInfo) -> Optional[str]:
+        """Content-addressed cache key for a function, or None if its CodeSha256 is unknown"""
+        if not func_info.code_sha256:
+            return None
+        return AnalysisCache.make_key(func_info.code_sha256, func_info.runtime, self.target_runtime,
+                                      self.bedrock_model, ANALYSIS_PROMPT_VERSION)
+    
+    async def download_function_async(self, executor: ThreadPoolExecutor, func_info: FunctionInfo,
+                                      index: int, total: int, stats: 'StageStats') -> None:
+        """Pipeline stage 1: download and extract a function's code on the download pool"""
+        logger.info(f"[{index}/{total}] Downloading {func_info.name} ({func_info.region}, {func_info.runtime})")
+        
+        loop = asyncio.get_running_loop()
+        lambda_client = self._get_lambda_client(func_info.region)
+        start = time.perf_counter()
+        func_info.code_files = await loop.run_in_executor(
+            executor,
+            self.get_function_code,
+            lambda_client,
+            func_info.name
         )
+        stats.record(time.perf_counter() - start)
+    
+    def _store_analysis(self, func_info: FunctionInfo) -> None:
+        """Cache a successful analysis and apply it to the function"""
+        key = self._cache_key(func_info)
+        if self.cache and key and 'error' not in func_info.ai_analysis:
+            self.cache.put(key, func_info.code_files, func_info.ai_analysis)
+        self._apply_ai_analysis(func_info)
+    
+    async def analyze_function_async(self, executor: ThreadPoolExecutor, func_info: FunctionInfo,
+                                     stats: 'StageStats') -> None:
+        """Pipeline stage 2: run the Bedrock analysis for a function on the analysis pool"""
+        if not func_info.code_files:
+            self._apply_ai_analysis(func_info)
+            return
         
-        logger.info(f"[{index}/{total}] Processing {func_info.name}")
-        logger.info(f"    ARN: {func_info.arn}")
-        logger.info(f"    Current Runtime: {func_info.runtime}")
+        logger.info(f"    🤖 Running AI code review for {func_info.name}...")
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        func_info.ai_analysis = await loop.run_in_executor(
+            executor,
+            self.analyze_code_with_bedrock,
+            func_info.name,
+            func_info.code_files,
+            func_info.runtime,
+            self.target_runtime
+        )
+        stats.record(time.perf_counter() - start)
+        self._store_analysis(func_info)
+    
+    async def analyze_batch_async(self, executor: ThreadPoolExecutor, functions: List[FunctionInfo],
+                                  stats: 'StageStats') -> None:
+        """Pipeline stage 2: analyze a batch of small functions with one Bedrock call"""
+        if len(functions) == 1:
+            await self.analyze_function_async(executor, functions[0], stats)
+            return
         
-        # AI Review if enabled
-        if self.ai_review:
-            logger.info(f"    🤖 Running AI code review...")
-            
-            loop = asyncio.get_event_loop()
-            with ThreadPoolExecutor(max_workers=1) as executor:
-                func_info.code_files = await loop.run_in_executor(
-                    executor, 
-                    self.get_function_code, 
-                    lambda_client, 
-                    func_info.name
-                )
+        logger.info(f"    🤖 Running AI code review for a batch of {len(functions)} functions: "
+                    f"{', '.join(func_info.name for func_info in functions)}")
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        results = await loop.run_in_executor(executor, self.analyze_batch_with_bedrock, functions)
+        elapsed = time.perf_counter() - start
+        for func_info in functions:
+            stats.record(elapsed / len(functions))
+            func_info.ai_analysis = results[func_info.arn]
+            self._store_analysis(func_info)
+    
+    async def review_functions_async(self, functions: List[FunctionInfo]) -> None:
+        """
+        Download and analyze functions as a two-stage pipeline.
+        
+        Downloads run on one thread pool and Bedrock calls on another, connected
+        by a bounded queue, so the code for later functions is fetched while
+        earlier functions are being analyzed. The queue bound stops downloads
+        from running far ahead of analysis and holding too much code in memory.
+        
+        Functions sharing a deployment package (same cache key) are analyzed
+        once, and results already in the analysis cache are reused.
+        """
+        # Group identical deployment packages so each is analyzed only once
+        groups = {}
+        for func_info in functions:
+            key = self._cache_key(func_info) or func_info.arn
+            groups.setdefault(key, []).append(func_info)
+        leaders = [group[0] for group in groups.values()]
+        
+        total = len(leaders)
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        download_stats = StageStats('Download')
+        analysis_stats = StageStats('Analysis')
+        download_semaphore = asyncio.Semaphore(self.download_workers)
+        
+        with ThreadPoolExecutor(max_workers=self.download_workers, thread_name_prefix='download') as download_executor, \
+             ThreadPoolExecutor(max_workers=self.analysis_workers, thread_name_prefix='analysis') as analysis_executor:
             
-            if func_info.code_files:
-                with ThreadPoolExecutor(max_workers=1) as executor:
-                    func_info.ai_analysis = await loop.run_in_executor(
-                        executor,
-                        self.analyze_code_with_bedrock,
-                        func_info.name,
-                        func_info.code_files,
-                        func_info.runtime,
-                        self.target_runtime
-                    )
+            async def produce(func_info, idx):
+                key = self._cache_key(func_info)
+                cached = self.cache.get(key) if (self.cache and key) else None
+                if cached and cached.get('ai_analysis'):
+                    logger.info(f"[{idx}/{total}] Using cached analysis for {func_info.name}")
+                    func_info.code_files = cached['code_files']
+                    func_info.ai_analysis = cached['ai_analysis']
+                    self._apply_ai_analysis(func_info)
+                    return
                 
-                if 'error' not in func_info.ai_analysis:
-                    assessment_str = func_info.ai_analysis.get('overall_assessment', 'NOT_ANALYZED')
-                    try:
-                        func_info.assessment = AIAssessment(assessment_str)
-                    except ValueError:
-                        logger.warning(f"Invalid assessment value: {assessment_str}")
+                # Hold the download slot until the queue accepts the result (backpressure)
+                async with download_semaphore:
+                    if cached and cached.get('code_files'):
+                        logger.info(f"[{idx}/{total}] Using cached code for {func_info.name}")
+                        func_info.code_files = cached['code_files']
+                    else:
+                        await self.download_function_async(download_executor, func_info, idx, total, download_stats)
+                        if self.cache and key and func_info.code_files:
+                            self.cache.put(key, func_info.code_files)
+                    await queue.put(func_info)
+            
+            async def analyze(batch):
+                try:
+                    await self.analyze_batch_async(analysis_executor, batch, analysis_stats)
+                except Exception as e:
+                    for func_info in batch:
+                        logger.error(f"    ✗ Analysis failed for {func_info.name}: {e}")
                         func_info.assessment = AIAssessment.ERROR
+            
+            async def consume():
+                # Small functions are packed into batches within BATCH_TOKEN_BUDGET;
+                # a batch is sent as soon as no more downloads are waiting
+                batch, batch_tokens = [], 0
+                while True:
+                    func_info = await queue.get()
+                    if func_info is None:
+                        if batch:
+                            await analyze(batch)
+                        return
                     
-                    logger.info(f"    Assessment: {func_info.assessment.value}")
+                    tokens = estimate_code_tokens(func_info.code_files) if func_info.code_files else 0
+                    if not func_info.code_files or tokens > SMALL_FUNCTION_TOKENS or self.max_batch_functions <= 1:
+                        await analyze([func_info])
+                        continue
                     
-                    if func_info.assessment == AIAssessment.NEEDS_CHANGES:
-                        logger.warning(f"    ⚠ Critical issues found - review required")
-                    elif func_info.assessment == AIAssessment.REQUIRES_TESTING:
-                        logger.warning(f"    ⚠ Testing recommended before upgrade")
-                else:
-                    func_info.assessment = AIAssessment.ERROR
-                    logger.error(f"    ⚠ AI analysis error: {func_info.ai_analysis.get('error', 'Unknown')}")
-            else:
-                logger.warning(f"    ⚠ Could not retrieve code for analysis")
-                func_info.assessment = AIAssessment.NOT_ANALYZED
+                    if batch and (batch_tokens + tokens > BATCH_TOKEN_BUDGET or
+                                  len(batch) >= self.max_batch_functions):
+                        await analyze(batch)
+                        batch, batch_tokens = [], 0
+                    batch.append(func_info)
+                    batch_tokens += tokens
+                    if queue.empty():
+                        await analyze(batch)
+                        batch, batch_tokens = [], 0
+            
+            consumers = [asyncio.create_task(consume()) for _ in range(self.analysis_workers)]
+            await asyncio.gather(*[produce(func_info, i+1) for i, func_info in enumerate(leaders)])
+            for _ in consumers:
+                await queue.put(None)
+            await asyncio.gather(*consumers)
+        
+        # Copy results to functions deployed from the same package
+        duplicates = 0
+        for group in groups.values():
+            leader = group[0]
+            for func_info in group[1:]:
+                func_info.code_files = leader.code_files
+                func_info.ai_analysis = leader.ai_analysis
+                func_info.assessment = leader.assessment
+                duplicates += 1
         
-        return func_info
+        logger.info(f"\nPipeline throughput:")
+        logger.info(f"  {download_stats.summary()}")
+        logger.info(f"  {analysis_stats.summary()}")
+        logger.info(f"  Duplicate packages reused: {duplicates}")
+        logger.info(f"  Bedrock calls: {self.bedrock_calls} (~{self.bedrock_input_tokens:,} input tokens)")
+        if self.cache:
+            logger.info(f"  Cache: {self.cache.hits} hit(s), {self.cache.misses} miss(es) in {self.cache.cache_dir}")
     
     def get_mode_behavior(self) -> Dict[str, str]:
         """Get mode behavior description based on AI review status"""
@@ -751,31 +1382,32 @@ class LambdaRuntimeUpdater:
         return output_file, summary_file
     
     async def process_region_async(self, region: str) -> Tuple[str, List[FunctionInfo]]:
-        """Process all functions in a region asynchronously"""
+        """List all functions in a region that use a source runtime"""
         logger.info(f"\n{'='*70}")
         logger.info(f"Processing region: {region}")
         logger.info(f"{'='*70}")
         
         try:
-            lambda_client = boto3.client('lambda', region_name=region)
-            functions = self.list_deprecated_functions(lambda_client)
+            lambda_client = self._get_lambda_client(region)
+            loop = asyncio.get_running_loop()
+            functions = await loop.run_in_executor(None, self.list_deprecated_functions, lambda_client)
             
             if not functions:
                 logger.info(f"✓ No functions found using {', '.join(self.source_runtimes)} in {region}")
                 return region, []
             
-            region_total = len(functions)
-            logger.info(f"Found {region_total} function(s) using deprecated runtimes\n")
-            
-            semaphore = asyncio.Semaphore(self.max_workers)
-            
-            async def process_with_semaphore(func, idx):
-                async with semaphore:
-                    return await self.process_function_async(lambda_client, func, region, idx, region_total)
-            
-            tasks = [process_with_semaphore(func, i+1) for i, func in enumerate(functions)]
-            function_infos = await asyncio.gather(*tasks)
+            logger.info(f"Found {len(functions)} function(s) using deprecated runtimes in {region}\n")
             
+            function_infos = [
+                FunctionInfo(
+                    name=function['FunctionName'],
+                    arn=function['FunctionArn'],
+                    region=region,
+                    runtime=function['Runtime'],
+                    code_sha256=function.get('CodeSha256')
+                )
+                for function in functions
+            ]
             return region, function_infos
             
         except Exception as e:
@@ -796,6 +1428,8 @@ class LambdaRuntimeUpdater:
             logger.info(f"Bedrock Model: {self.bedrock_model}")
         logger.info(f"Regions: {', '.join(self.regions)}")
         logger.info(f"Max Parallel Workers: {self.max_workers}")
+        if self.ai_review:
+            logger.info(f"Download Workers: {self.download_workers}, Analysis Workers: {self.analysis_workers}")
         logger.info("\nMode Behavior:")
         for mode, behavior in self.get_mode_behavior().items():
             marker = "→" if mode == self.mode else " "
@@ -818,6 +1452,9 @@ class LambdaRuntimeUpdater:
             logger.info(f"\n✓ No functions found using {', '.join(self.source_runtimes)} in any region")
             return
         
+        if self.ai_review:
+            await self.review_functions_async(all_functions)
+        
         logger.info(f"\n{'='*70}")
         logger.info(f"ANALYSIS COMPLETE: Found {len(all_functions)} function(s) total")
         logger.info(f"{'='*70}")
@@ -830,59 +1467,27 @@ class LambdaRuntimeUpdater:
             logger.info("PHASE 2: RUNTIME UPDATES")
             logger.info("="*70 + "\n")
             
-            quit_requested = False
+            # Updates that need no confirmation start right away; prompts continue
+            # in the meantime. Each region has its own token bucket.
+            buckets = {}
+            update_tasks = []
             
-            for func_info in all_functions:
-                if quit_requested:
-                    break
-                
-                logger.info(f"\nProcessing: {func_info.name} ({func_info.region})")
-                
-                if self.mode == 'interactive':
-                    user_choice = self.prompt_user_interactive(func_info)
-                    if user_choice == 'quit':
-                        logger.warning("\n⚠ User requested quit. Stopping execution.")
-                        quit_requested = True
+            with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='update') as update_executor:
+                for func_info in all_functions:
+                    approved = await self.decide_update_async(func_info)
+                    if approved is None:
                         break
-                    elif user_choice == 'no':
-                        logger.info(f"    ⊘ Skipped by user")
-                        func_info.skipped = True
-                        continue
+                    if approved:
+                        if func_info.region not in buckets:
+                            buckets[func_info.region] = TokenBucket(self.update_rate)
+                        bucket = buckets[func_info.region]
+                        update_tasks.append(asyncio.create_task(
+                            self.apply_update_async(update_executor, bucket, func_info)
+                        ))
                 
-                elif self.mode == 'force' and self.ai_review:
-                    should_update, reason = self.should_update_in_force_mode(func_info)
-                    
-                    if should_update is None:
-                        logger.info(f"    ⚠ {reason}")
-                        user_choice = self.prompt_user_interactive(func_info)
-                        if user_choice == 'quit':
-                            logger.warning("\n⚠ User requested quit. Stopping execution.")
-                            quit_requested = True
-                            break
-                        elif user_choice == 'no':
-                            logger.info(f"    ⊘ Skipped by user")
-                            func_info.skipped = True
-                            continue
-                    elif not should_update:
-                        logger.info(f"    ⊘ {reason}")
-                        func_info.skipped = True
-                        continue
-                    else:
-                        logger.info(f"    ✓ {reason}")
-                
-                logger.info(f"    ⟳ Updating to {self.target_runtime}...")
-                lambda_client = boto3.client('lambda', region_name=func_info.region)
-                success, result = self.update_function_runtime(lambda_client, func_info.name)
-                
-                if success:
-                    logger.info(f"    ✓ Successfully updated")
-                    func_info.updated = True
-                else:
-                    logger.error(f"    ✗ Failed: {result}")
-                    func_info.failed = True
-                    func_info.error_message = result
-                
-                time.sleep(0.5)
+                if update_tasks:
+                    logger.info(f"\nWaiting for {len(update_tasks)} update(s) to complete...")
+                await asyncio.gather(*update_tasks)
         
         # Generate report
         if self.ai_review or self.mode != 'dry-run':
@@ -934,6 +1539,13 @@ class LambdaRuntimeUpdater:
             raise
 
 
+def positive_float(value: str) -> float:
+    """argparse type for rates, which must be greater than zero"""
+    rate = float(value)
+    if rate <= 0:
+        raise argparse.ArgumentTypeError(f"must be greater than 0, got {value}")
+    return rate
+
 def main():
     parser = argparse.ArgumentParser(
         description='Update Lambda functions with AI review and parallel processing',
@@ -956,6 +1568,19 @@ def main():
                        help='Bedrock model for AI analysis')
     parser.add_argument('--max-workers', type=int, default=5,
                        help='Maximum parallel workers (default: 5)')
+    parser.add_argument('--download-workers', type=int,
+                       help='Parallel code downloads (default: --max-workers)')
+    parser.add_argument('--analysis-workers', type=int,
+                       help='Parallel Bedrock analysis calls (default: --max-workers)')
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR,
+                       help=f'Directory for the code/analysis cache; it stores the extracted function '
+                            f'source in plaintext (default: {DEFAULT_CACHE_DIR})')
+    parser.add_argument('--no-cache', action='store_true',
+                       help='Disable the code/analysis cache')
+    parser.add_argument('--update-rate', type=positive_float, default=DEFAULT_UPDATE_RATE,
+                       help=f'Runtime update calls per second per region (default: {DEFAULT_UPDATE_RATE})')
+    parser.add_argument('--max-batch-functions', type=int, default=DEFAULT_MAX_BATCH_FUNCTIONS,
+                       help=f'Small functions analyzed per Bedrock call, 1 to disable batching (default: {DEFAULT_MAX_BATCH_FUNCTIONS})')
     parser.add_argument('--config', 
                        help='Load configuration from JSON file')
     parser.add_argument('--log-level', choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'],
@@ -987,13 +1612,21 @@ def main():
             'source_runtimes': args.source_runtimes,
             'ai_review': args.ai_review,
             'bedrock_model': args.bedrock_model,
-            'max_workers': args.max_workers
+            'max_workers': args.max_workers,
+            'download_workers': args.download_workers,
+            'analysis_workers': args.analysis_workers,
+            'cache_dir': None if args.no_cache else args.cache_dir,
+            'update_rate': args.update_rate,
+            'max_batch_functions': args.max_batch_functions
         }
         
         # Apply config file settings (command line args take precedence)
         for key, value in config.items():
             if key in updater_args and updater_args[key] is None:
                 updater_args[key] = value
+        if args.no_cache:
+            # After the config file, so a cache_dir there cannot re-enable the cache
+            updater_args['cache_dir'] = None
         
         updater = LambdaRuntimeUpdater(**updater_args)
         updater.run()
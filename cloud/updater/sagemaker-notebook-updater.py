@@ -13,6 +13,7 @@ Features:
 - Data backup verification
 - Multi-region support
 - Parallel processing capabilities
+- Concurrent stop → update → start migration with a live progress table
 - Multiple execution modes (dry-run, interactive, force)
 - Comprehensive reporting
 
@@ -54,6 +55,9 @@ Quickstart Guide:
    - dry-run: Lists notebook instances without making changes
    - interactive: Reviews each instance with you before updating
    - force: Auto-updates all instances without prompting
+   In both update modes, approved instances are migrated concurrently (up to
+   --max-concurrent-updates at a time). Instances that were InService are
+   started again after the update; stopped instances stay stopped.
 
 5. Output:
    - Console output shows progress and decisions
@@ -82,6 +86,7 @@ import asyncio
 import json
 import logging
 import os
+import sys
 import time
 from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
@@ -96,6 +101,12 @@ from botocore.exceptions import ClientError
 DEFAULT_REGIONS = ['us-east-1']
 DEPRECATED_PLATFORMS = ['notebook-al2-v1', 'notebook-al2-v2']
 TARGET_PLATFORMS = ['notebook-al2-v3', 'notebook-al2023-v1']
+DEFAULT_MAX_CONCURRENT_UPDATES = 10
+POLL_INTERVAL = 15  # seconds between status checks during a migration
+TRANSITION_TIMEOUT = 30 * 40  # seconds allowed for each stop/update/start step
+RESOURCE_IN_USE_RETRIES = 3
+RESOURCE_IN_USE_DELAY = 30  # seconds
+PROGRESS_INTERVAL = 10  # seconds between progress table refreshes
 
 # Setup logging
 logging.basicConfig(
@@ -168,6 +179,15 @@ class NotebookStatus(Enum):
     DELETING = "Deleting"
     UPDATING = "Updating"
 
+class MigrationState(Enum):
+    PENDING = "Pending"
+    STOPPING = "Stopping"
+    UPDATING = "Updating"
+    STARTING = "Starting"
+    DONE = "Done"
+    FAILED = "Failed"
+    SKIPPED = "Skipped"
+
 @dataclass
 class NotebookInstanceInfo:
     """
@@ -185,6 +205,9 @@ class NotebookInstanceInfo:
         skipped: Whether the instance was skipped during processing
         failed: Whether the update attempt failed
         error_message: Error details if the update failed
+        state: Current step of the stop → update → start migration
+        state_since: time.monotonic() when the current state was entered
+        started_at: time.monotonic() when the migration started
     """
     name: str
     arn: str
@@ -197,16 +220,27 @@ class NotebookInstanceInfo:
     skipped: bool = False
     failed: bool = False
     error_message: Optional[str] = None
+    state: MigrationState = MigrationState.PENDING
+    state_since: Optional[float] = None
+    started_at: Optional[float] = None
+    
+    def set_state(self, state: MigrationState) -> None:
+        self.state = state
+        self.state_since = time.monotonic()
+        logger.debug(f"{self.name} ({self.region}): {state.value}")
 
 class SageMakerNotebookUpdater:
     def __init__(self, regions: List[str], target_platform: str, mode: str,
                  source_platforms: Optional[List[str]] = None,
-                 max_workers: int = 5):
+                 max_workers: int = 5,
+                 max_concurrent_updates: int = DEFAULT_MAX_CONCURRENT_UPDATES):
         self.regions = regions
         self.target_platform = target_platform
         self.mode = mode
         self.source_platforms = source_platforms or DEPRECATED_PLATFORMS
         self.max_workers = max_workers
+        self.max_concurrent_updates = max_concurrent_updates
+        self._sagemaker_clients = {}
         
         # Validate platform upgrade path
         self._validate_platform_upgrade()
@@ -232,123 +266,186 @@ class SageMakerNotebookUpdater:
                 logger.warning(f"Failed to load config file {config_file}: {e}")
         return {}
     
+    def _get_sagemaker_client(self, region: str):
+        """Get a SageMaker client for a region, reusing one client per region"""
+        if region not in self._sagemaker_clients:
+            self._sagemaker_clients[region] = boto3.client('sagemaker', region_name=region)
+        return self._sagemaker_clients[region]
+    
+    def _describe_notebook_instance(self, sagemaker_client, instance_name: str) -> Optional[Dict]:
+        try:
+            return sagemaker_client.describe_notebook_instance(NotebookInstanceName=instance_name)
+        except ClientError as e:
+            logger.warning(f"Failed to describe {instance_name}: {e}")
+            return None
+    
     def list_deprecated_notebook_instances(self, sagemaker_client) -> List[Dict]:
         """List all notebook instances using deprecated platforms"""
-        instances = []
         try:
             paginator = sagemaker_client.get_paginator('list_notebook_instances')
-            
-            for page in paginator.paginate():
-                for instance in page['NotebookInstances']:
-                    # Get detailed info to check platform
-                    try:
-                        details = sagemaker_client.describe_notebook_instance(
-                            NotebookInstanceName=instance['NotebookInstanceName']
-                        )
-                        
-                        platform = details.get('PlatformIdentifier', 'unknown')
-                        if platform in self.source_platforms:
-                            instances.append(details)
-                    except ClientError as e:
-                        logger.warning(f"Failed to describe {instance['NotebookInstanceName']}: {e}")
-                        continue
-                        
+            names = [
+                instance['NotebookInstanceName']
+                for page in paginator.paginate()
+                for instance in page['NotebookInstances']
+            ]
         except ClientError as e:
             logger.error(f"Failed to list notebook instances: {e}")
             raise
         
-        return instances
-
+        # Get detailed info to check platform, describing instances in parallel
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            details_list = list(executor.map(
+                lambda name: self._describe_notebook_instance(sagemaker_client, name), names
+            ))
+        
+        return [
+            details for details in details_list
+            if details and details.get('PlatformIdentifier', 'unknown') in self.source_platforms
+        ]
+    
+    async def _call_async(self, func, **kwargs):
+        """Run a blocking boto3 call in the default executor"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, lambda: func(**kwargs))
     
-    def stop_notebook_instance(self, sagemaker_client, instance_name: str) -> Tuple[bool, str]:
-        """Stop a notebook instance if it's running"""
+    async def _wait_for_status_async(self, sagemaker_client, instance_name: str,
+                                     target_status: str) -> Tuple[bool, str]:
+        """Poll an instance without blocking the event loop until it reaches a status"""
+        deadline = time.monotonic() + TRANSITION_TIMEOUT
+        while time.monotonic() < deadline:
+            details = await self._call_async(
+                sagemaker_client.describe_notebook_instance, NotebookInstanceName=instance_name
+            )
+            status = details['NotebookInstanceStatus']
+            if status == target_status:
+                return True, status
+            if status in ['Failed', 'Deleting']:
+                return False, f"Instance entered {status} state: {details.get('FailureReason', '')}".strip()
+            await asyncio.sleep(POLL_INTERVAL)
+        return False, f"Timed out after {TRANSITION_TIMEOUT}s waiting for {target_status}"
+    
+    async def migrate_instance_async(self, instance_info: NotebookInstanceInfo) -> None:
+        """
+        Move one instance through stop → update → start.
+        
+        Each step is a non-blocking poll, so many instances can be migrated at
+        the same time. Instances that were InService are started again after the
+        update; instances that were already stopped are left stopped.
+        """
+        sagemaker_client = self._get_sagemaker_client(instance_info.region)
+        instance_info.started_at = time.monotonic()
+        
         try:
-            details = sagemaker_client.describe_notebook_instance(
-                NotebookInstanceName=instance_name
+            details = await self._call_async(
+                sagemaker_client.describe_notebook_instance, NotebookInstanceName=instance_info.name
             )
-            
             status = details['NotebookInstanceStatus']
+            was_running = status in ['InService', 'Pending']
             
-            if status == 'InService':
-                logger.info(f"    Stopping notebook instance {instance_name}...")
-                sagemaker_client.stop_notebook_instance(
-                    NotebookInstanceName=instance_name
-                )
-                
-                # Wait for instance to stop
-                waiter = sagemaker_client.get_waiter('notebook_instance_stopped')
-                waiter.wait(
-                    NotebookInstanceName=instance_name,
-                    WaiterConfig={'Delay': 30, 'MaxAttempts': 40}
+            # Stop
+            if status != 'Stopped':
+                instance_info.set_state(MigrationState.STOPPING)
+                if status == 'InService':
+                    await self._call_async(
+                        sagemaker_client.stop_notebook_instance, NotebookInstanceName=instance_info.name
+                    )
+                elif status not in ['Stopping', 'Pending']:
+                    raise RuntimeError(f"Instance in {status} state, cannot stop")
+                if status == 'Pending':
+                    ok, message = await self._wait_for_status_async(sagemaker_client, instance_info.name, 'InService')
+                    if not ok:
+                        raise RuntimeError(f"Failed to stop instance: {message}")
+                    await self._call_async(
+                        sagemaker_client.stop_notebook_instance, NotebookInstanceName=instance_info.name
+                    )
+                ok, message = await self._wait_for_status_async(sagemaker_client, instance_info.name, 'Stopped')
+                if not ok:
+                    raise RuntimeError(f"Failed to stop instance: {message}")
+            
+            # Update the platform
+            instance_info.set_state(MigrationState.UPDATING)
+            for attempt in range(RESOURCE_IN_USE_RETRIES):
+                try:
+                    await self._call_async(
+                        sagemaker_client.update_notebook_instance,
+                        NotebookInstanceName=instance_info.name,
+                        PlatformIdentifier=self.target_platform
+                    )
+                    break
+                except ClientError as e:
+                    if e.response['Error']['Code'] == 'ResourceInUse' and attempt < RESOURCE_IN_USE_RETRIES - 1:
+                        logger.warning(f"Resource in use for {instance_info.name}, retrying in {RESOURCE_IN_USE_DELAY} seconds...")
+                        await asyncio.sleep(RESOURCE_IN_USE_DELAY)
+                        continue
+                    raise
+            # The instance goes Stopped → Updating → Stopped; give it a moment to leave Stopped
+            await asyncio.sleep(5)
+            ok, message = await self._wait_for_status_async(sagemaker_client, instance_info.name, 'Stopped')
+            if not ok:
+                raise RuntimeError(f"Update failed: {message}")
+            instance_info.platform = self.target_platform
+            instance_info.updated = True
+            
+            # Start again if it was running before the migration
+            if was_running:
+                instance_info.set_state(MigrationState.STARTING)
+                await self._call_async(
+                    sagemaker_client.start_notebook_instance, NotebookInstanceName=instance_info.name
                 )
-                logger.info(f"    ✓ Instance stopped successfully")
-                return True, "Stopped"
-            elif status == 'Stopped':
-                logger.info(f"    Instance already stopped")
-                return True, "Already stopped"
-            else:
-                return False, f"Instance in {status} state, cannot stop"
-                
-        except ClientError as e:
-            logger.error(f"Failed to stop {instance_name}: {e}")
-            return False, str(e)
+                ok, message = await self._wait_for_status_async(sagemaker_client, instance_info.name, 'InService')
+                if not ok:
+                    raise RuntimeError(f"Updated, but failed to start: {message}")
+            
+            instance_info.set_state(MigrationState.DONE)
+            logger.info(f"    ✓ {instance_info.name} ({instance_info.region}): Successfully updated")
+            
         except Exception as e:
-            logger.error(f"Unexpected error stopping {instance_name}: {e}")
-            return False, str(e)
+            instance_info.failed = True
+            instance_info.error_message = str(e)
+            instance_info.set_state(MigrationState.FAILED)
+            logger.error(f"    ✗ {instance_info.name} ({instance_info.region}): Failed: {e}")
     
-    def update_notebook_instance(self, sagemaker_client, instance_name: str) -> Tuple[bool, str]:
-        """Update a notebook instance's platform with retry logic"""
-        max_retries = 3
-        for attempt in range(max_retries):
-            try:
-                # First, ensure instance is stopped
-                stop_success, stop_message = self.stop_notebook_instance(sagemaker_client, instance_name)
-                if not stop_success:
-                    return False, f"Failed to stop instance: {stop_message}"
-                
-                # Update the platform
-                logger.info(f"    Updating platform to {self.target_platform}...")
-                response = sagemaker_client.update_notebook_instance(
-                    NotebookInstanceName=instance_name,
-                    PlatformIdentifier=self.target_platform
-                )
-                
-                # Wait for update to complete
-                logger.info(f"    Waiting for update to complete...")
-                time.sleep(5)  # Initial delay
-                
-                # Check status
-                max_checks = 60
-                for check in range(max_checks):
-                    details = sagemaker_client.describe_notebook_instance(
-                        NotebookInstanceName=instance_name
-                    )
-                    status = details['NotebookInstanceStatus']
-                    
-                    if status == 'Stopped':
-                        logger.info(f"    ✓ Update completed successfully")
-                        return True, "Success"
-                    elif status in ['Failed', 'Deleting']:
-                        return False, f"Update failed with status: {status}"
-                    
-                    time.sleep(10)
-                
-                return False, "Update timeout - status check exceeded max attempts"
-                
-            except ClientError as e:
-                error_code = e.response['Error']['Code']
-                if error_code == 'ResourceInUse' and attempt < max_retries - 1:
-                    logger.warning(f"Resource in use for {instance_name}, retrying in 30 seconds...")
-                    time.sleep(30)
-                    continue
-                else:
-                    logger.error(f"Failed to update {instance_name}: {e}")
-                    return False, str(e)
-            except Exception as e:
-                logger.error(f"Unexpected error updating {instance_name}: {e}")
-                return False, str(e)
+    def render_progress_table(self, instances: List[NotebookInstanceInfo]) -> str:
+        """Render the current migration state of each instance as a text table"""
+        now = time.monotonic()
+        lines = [
+            f"{'INSTANCE':40} {'REGION':15} {'STATE':10} {'IN STATE':>9} {'TOTAL':>9}",
+            "-" * 87
+        ]
+        for instance_info in instances:
+            in_state = f"{now - instance_info.state_since:.0f}s" if instance_info.state_since else '-'
+            total = f"{now - instance_info.started_at:.0f}s" if instance_info.started_at else '-'
+            lines.append(f"{instance_info.name[:40]:40} {instance_info.region:15} "
+                         f"{instance_info.state.value:10} {in_state:>9} {total:>9}")
         
-        return False, "Max retries exceeded"
+        counts = {}
+        for instance_info in instances:
+            counts[instance_info.state.value] = counts.get(instance_info.state.value, 0) + 1
+        lines.append("-" * 87)
+        lines.append("  ".join(f"{state}: {count}" for state, count in counts.items()))
+        return "\n".join(lines)
+    
+    async def report_progress_async(self, instances: List[NotebookInstanceInfo]) -> None:
+        """Redraw the progress table periodically until cancelled"""
+        clear = "\033[H\033[J" if sys.stdout.isatty() else ""
+        while True:
+            print(f"{clear}{self.render_progress_table(instances)}\n", flush=True)
+            await asyncio.sleep(PROGRESS_INTERVAL)
+    
+    async def migrate_instances_async(self, instances: List[NotebookInstanceInfo]) -> None:
+        """Migrate instances concurrently, at most max_concurrent_updates at a time"""
+        semaphore = asyncio.Semaphore(self.max_concurrent_updates)
+        
+        async def migrate_with_semaphore(instance_info):
+            async with semaphore:
+                await self.migrate_instance_async(instance_info)
+        
+        progress = asyncio.create_task(self.report_progress_async(instances))
+        try:
+            await asyncio.gather(*[migrate_with_semaphore(instance_info) for instance_info in instances])
+        finally:
+            progress.cancel()
+        print(self.render_progress_table(instances), flush=True)
     
     async def process_instance_async(self, sagemaker_client, instance: Dict, region: str,
                                      index: int, total: int) -> NotebookInstanceInfo:
@@ -431,7 +528,8 @@ class SageMakerNotebookUpdater:
                 "volume_size_gb": instance_info.volume_size_gb,
                 "updated": instance_info.updated,
                 "skipped": instance_info.skipped,
-                "failed": instance_info.failed
+                "failed": instance_info.failed,
+                "migration_state": instance_info.state.value
             }
             
             if instance_info.error_message:
@@ -490,8 +588,9 @@ class SageMakerNotebookUpdater:
         logger.info(f"{'='*70}")
         
         try:
-            sagemaker_client = boto3.client('sagemaker', region_name=region)
-            instances = self.list_deprecated_notebook_instances(sagemaker_client)
+            sagemaker_client = self._get_sagemaker_client(region)
+            loop = asyncio.get_running_loop()
+            instances = await loop.run_in_executor(None, self.list_deprecated_notebook_instances, sagemaker_client)
             
             if not instances:
                 logger.info(f"✓ No notebook instances found using {', '.join(self.source_platforms)} in {region}")
@@ -525,6 +624,7 @@ class SageMakerNotebookUpdater:
         logger.info(f"Mode: {self.mode}")
         logger.info(f"Regions: {', '.join(self.regions)}")
         logger.info(f"Max Parallel Workers: {self.max_workers}")
+        logger.info(f"Max Concurrent Updates: {self.max_concurrent_updates}")
         logger.info("\nMode Behavior:")
         for mode, behavior in self.get_mode_behavior().items():
             marker = "→" if mode == self.mode else " "
@@ -568,38 +668,26 @@ class SageMakerNotebookUpdater:
             logger.info("PHASE 2: PLATFORM UPDATES")
             logger.info("="*70 + "\n")
             
-            quit_requested = False
-            
+            # Confirm every instance first, then migrate the approved ones concurrently
+            approved = []
             for instance_info in all_instances:
-                if quit_requested:
-                    break
-                
-                logger.info(f"\nProcessing: {instance_info.name} ({instance_info.region})")
-                
                 if self.mode == 'interactive':
+                    logger.info(f"\nProcessing: {instance_info.name} ({instance_info.region})")
                     user_choice = self.prompt_user_interactive(instance_info)
                     if user_choice == 'quit':
                         logger.warning("\n⚠ User requested quit. Stopping execution.")
-                        quit_requested = True
                         break
                     elif user_choice == 'no':
                         logger.info(f"    ⊘ Skipped by user")
                         instance_info.skipped = True
+                        instance_info.set_state(MigrationState.SKIPPED)
                         continue
-                
-                logger.info(f"    ⟳ Updating to {self.target_platform}...")
-                sagemaker_client = boto3.client('sagemaker', region_name=instance_info.region)
-                success, result = self.update_notebook_instance(sagemaker_client, instance_info.name)
-                
-                if success:
-                    logger.info(f"    ✓ Successfully updated")
-                    instance_info.updated = True
-                else:
-                    logger.error(f"    ✗ Failed: {result}")
-                    instance_info.failed = True
-                    instance_info.error_message = result
-                
-                time.sleep(1)
+                approved.append(instance_info)
+            
+            if approved:
+                logger.info(f"\n⟳ Updating {len(approved)} instance(s) to {self.target_platform} "
+                            f"({self.max_concurrent_updates} at a time)...")
+                await self.migrate_instances_async(approved)
         
         # Generate report
         logger.info(f"\n{'='*70}")
@@ -659,6 +747,8 @@ def main():
                        default='interactive', help='Execution mode (default: interactive)')
     parser.add_argument('--max-workers', type=int, default=5,
                        help='Maximum parallel workers (default: 5)')
+    parser.add_argument('--max-concurrent-updates', type=int, default=DEFAULT_MAX_CONCURRENT_UPDATES,
+                       help=f'Maximum instances migrated at the same time (default: {DEFAULT_MAX_CONCURRENT_UPDATES})')
     parser.add_argument('--config',
                        help='Load configuration from JSON file')
     parser.add_argument('--log-level', choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'],
@@ -688,7 +778,8 @@ def main():
             'target_platform': args.target_platform,
             'mode': args.mode,
             'source_platforms': args.source_platforms,
-            'max_workers': args.max_workers
+            'max_workers': args.max_workers,
+            'max_concurrent_updates': args.max_concurrent_updates
         }
         
         # Apply config file settings (command line args take precedence)
@@ -6,13 +6,20 @@
 import argparse
 import base64
 import boto3
+import functools
 import io
 import json
+import lib_embedding_cache
 import logging
+import numpy as np
 import os
+import random
+import threading
+import time
 
 from botocore.config import Config
-from botocore.exceptions import ClientError
+from botocore.exceptions import ClientError, ConnectionError, HTTPClientError
+from concurrent.futures import ThreadPoolExecutor
 
 from typing import List
 
@@ -175,11 +182,16 @@ def invoke_titan_text_express(prompt, **kwargs):
 
 
 def invoke_titan_text_embeddings(prompt, **kwargs):
-    body = {
-        "inputText": prompt
-    }
+    """
+    Returns (embedding, token_count). Embeddings are cached on disk (see
+    lib_embedding_cache.py); token_count is 0 when no request was made.
+    """
+    token_counts = []
 
-    try:
+    def embed(texts):
+        body = {
+            "inputText": texts[0]
+        }
         response = bedrock_runtime.invoke_model(
             body=json.dumps(body),
             modelId='amazon.titan-embed-text-v1',
@@ -187,8 +199,12 @@ def invoke_titan_text_embeddings(prompt, **kwargs):
             contentType='application/json'
         )
         response_body = json.loads(response.get('body').read())
-        embedding = response_body.get('embedding')
-        token_count = response_body.get('inputTextTokenCount')
+        token_counts.append(response_body.get('inputTextTokenCount'))
+        return [response_body.get('embedding')]
+
+    try:
+        embedding = lib_embedding_cache.cached_embed('amazon.titan-embed-text-v1', [prompt], embed)[0].tolist()
+        token_count = token_counts[0] if token_counts else 0
         return embedding, token_count
     except Exception as e:
         print(e)
@@ -432,38 +448,201 @@ def invoke_cohere_command_light(prompt, **kwargs):
     return response_body['generations'][0]['text']
 
 
+def invoke_cohere_embed(prompts: List[str], model_id):
+    # Split into batches of at most 96 texts and cached (see embed_many)
+    return embed_many(prompts, model_id).tolist()
+
+
 def invoke_cohere_embed_english(prompts: List[str]):
-    body = {
-        "texts": prompts,
-        "input_type": 'search_document',
-        "truncate": 'NONE'
-    }
+    return invoke_cohere_embed(prompts, "cohere.embed-english-v3")
 
-    response = bedrock_runtime.invoke_model(
-        modelId = "cohere.embed-english-v3",
-        contentType = "application/json",
-        accept = "application/json",
-        body = json.dumps(body)
+
+def invoke_cohere_embed_multilingual(prompts: List[str]):
+    return invoke_cohere_embed(prompts, "cohere.embed-multilingual-v3")
+
+
+
+# ----- Batch Embeddings -----
+EMBEDDING_MODELS = {
+    # model_id: request format and maximum texts per request
+    'amazon.titan-embed-text-v1': {'format': 'titan', 'batch_size': 1},
+    'amazon.titan-embed-text-v2:0': {'format': 'titan', 'batch_size': 1},
+    'cohere.embed-english-v3': {'format': 'cohere', 'batch_size': 96},
+    'cohere.embed-multilingual-v3': {'format': 'cohere', 'batch_size': 96},
+}
+EMBED_MAX_WORKERS = 16
+EMBED_MAX_RPS = 200.0       # Ceiling and starting rate; throttling brings it down to the account quota
+EMBED_MIN_RPS = 1.0
+EMBED_MAX_ATTEMPTS = 8
+EMBED_BACKOFF_BASE = 0.5    # Seconds, doubled per attempt, with full jitter
+EMBED_BACKOFF_CAP = 20.0
+EMBED_SEGMENT_SIZE = 5000   # Texts per embedding cache write
+RETRYABLE_ERRORS = {
+    'ThrottlingException',
+    'ServiceQuotaExceededException',
+    'TooManyRequestsException',
+    'ModelNotReadyException',
+    'ServiceUnavailableException',
+    'InternalServerException',
+}
+
+
+def get_embedding_model(model_id):
+    if model_id in EMBEDDING_MODELS:
+        return EMBEDDING_MODELS[model_id]
+    if model_id.startswith('cohere.embed'):
+        return {'format': 'cohere', 'batch_size': 96}
+    if model_id.startswith('amazon.titan-embed'):
+        return {'format': 'titan', 'batch_size': 1}
+    raise ValueError(f'Unsupported embedding model: {model_id}')
+
+
+@functools.lru_cache(maxsize=None)
+def get_embed_client(max_workers=EMBED_MAX_WORKERS):
+    """bedrock-runtime client for embed_many: one connection per worker, retries done by embed_many."""
+    return boto3.client(
+        service_name='bedrock-runtime',
+        region_name=REGION,
+        config=Config(
+            read_timeout=120,
+            max_pool_connections=max(10, max_workers),
+            retries={'mode': 'standard', 'max_attempts': 1}
+        )
     )
-    response_body = json.loads(response.get('body').read())
-    return response_body['embeddings']
 
 
-def invoke_cohere_embed_multilingual(prompts: List[str]):
-    body = {
-        "texts": prompts,
-        "input_type": 'search_document',
-        "truncate": 'NONE'
-    }
+class RateLimiter:
+    """
+    Request pacing shared by threads (AIMD). Throttling cuts the rate by a
+    quarter, at most twice a second; each success adds 0.05 requests/s, so the
+    rate grows back by about 5% a second at any rate.
+    """
 
-    response = bedrock_runtime.invoke_model(
-        modelId = "cohere.embed-multilingual-v3",
+    def __init__(self, max_rate, min_rate=EMBED_MIN_RPS):
+        self.max_rate = max_rate
+        self.min_rate = min(min_rate, max_rate)
+        self.rate = max_rate
+        self.throttles = 0
+        self._next = time.monotonic()
+        self._last_decrease = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            now = time.monotonic()
+            wait = self._next - now
+            self._next = max(now, self._next) + 1 / self.rate
+        if wait > 0:
+            time.sleep(wait)
+
+    def throttled(self):
+        with self._lock:
+            self.throttles += 1
+            now = time.monotonic()
+            if now - self._last_decrease >= 0.5:
+                self.rate = max(self.min_rate, self.rate * 0.75)
+                self._last_decrease = now
+
+    def succeeded(self):
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + 0.05)
+
+
+def invoke_embedding_model(client, model_id, texts, input_type='search_document'):
+    """Embed one batch of texts in a single request. Returns a float32 array."""
+    if get_embedding_model(model_id)['format'] == 'cohere':
+        body = {
+            "texts": texts,
+            "input_type": input_type,
+            "truncate": 'NONE'
+        }
+    else:
+        body = {
+            "inputText": texts[0]
+        }
+
+    response = client.invoke_model(
+        modelId = model_id,
         contentType = "application/json",
-        accept = "*/*",
+        accept = "application/json",
         body = json.dumps(body)
     )
     response_body = json.loads(response.get('body').read())
-    return response_body['embeddings']
+    if 'embedding' in response_body:
+        return np.asarray([response_body['embedding']], dtype=np.float32)
+    embeddings = response_body['embeddings']
+    if isinstance(embeddings, dict):
+        embeddings = embeddings['float']
+    return np.asarray(embeddings, dtype=np.float32)
+
+
+def embed_many(texts: List[str], model='amazon.titan-embed-text-v1', input_type='search_document',
+               max_workers=EMBED_MAX_WORKERS, max_rps=EMBED_MAX_RPS, use_cache=True):
+    """
+    Embed any number of texts with a Bedrock embedding model.
+
+    Texts are split into batches the model accepts (96 for Cohere, 1 for
+    Titan) and sent by max_workers threads, paced by a shared rate limiter.
+    Throttled requests are retried with exponential backoff and slow the
+    limiter down. Texts found in the embedding cache are not sent, and results
+    are cached every EMBED_SEGMENT_SIZE texts, so an interrupted run resumes
+    where it stopped.
+
+    Returns:
+        np.ndarray: float32 array of shape (len(texts), dim), in input order
+    """
+    texts = list(texts)
+    spec = get_embedding_model(model)
+    client = get_embed_client(max_workers)
+    limiter = RateLimiter(max_rps)
+    cache_key = model if spec['format'] != 'cohere' or input_type == 'search_document' else f'{model}:{input_type}'
+
+    def embed_batch(batch):
+        for attempt in range(EMBED_MAX_ATTEMPTS):
+            limiter.acquire()
+            try:
+                embeddings = invoke_embedding_model(client, model, batch, input_type)
+                limiter.succeeded()
+                return embeddings
+            except ClientError as e:
+                code = e.response['Error']['Code']
+                status = e.response.get('ResponseMetadata', {}).get('HTTPStatusCode', 0)
+                if code not in RETRYABLE_ERRORS and status != 429 and status < 500:
+                    raise
+                if code != 'InternalServerException' and status < 500:
+                    limiter.throttled()
+                if attempt == EMBED_MAX_ATTEMPTS - 1:
+                    raise
+            except (ConnectionError, HTTPClientError):
+                if attempt == EMBED_MAX_ATTEMPTS - 1:
+                    raise
+            time.sleep(random.uniform(0, min(EMBED_BACKOFF_CAP, EMBED_BACKOFF_BASE * 2 ** attempt)))
+
+    t_start = time.perf_counter()
+    result = None
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+
+        def embed_all(segment):
+            batch_size = spec['batch_size']
+            batches = [segment[i:i + batch_size] for i in range(0, len(segment), batch_size)]
+            return np.concatenate(list(executor.map(embed_batch, batches)))
+
+        for start in range(0, len(texts), EMBED_SEGMENT_SIZE):
+            segment = texts[start:start + EMBED_SEGMENT_SIZE]
+            if use_cache:
+                vectors = lib_embedding_cache.cached_embed(cache_key, segment, embed_all)
+            else:
+                vectors = embed_all(segment)
+            if result is None:
+                result = np.empty((len(texts), vectors.shape[1]), dtype=np.float32)
+            result[start:start + len(segment)] = vectors
+            done = start + len(segment)
+            logger.info(f'{model}: {done}/{len(texts)} texts, {done / (time.perf_counter() - t_start):.1f} texts/s, '
+                        f'{limiter.rate:.1f} requests/s, {limiter.throttles} throttled')
+
+    if result is None:
+        return np.empty((0, 0), dtype=np.float32)
+    return result
 
 
 
@@ -637,6 +816,11 @@ if __name__ == '__main__':
     parser.add_argument('--model', default='claude-instant')
     parser.add_argument('--get-model-ids', action='store_true')
     parser.add_argument('--get-fm', default='')
+    parser.add_argument('--embed-file', default='', help='Embed each line of a file with embed_many')
+    parser.add_argument('--embed-model', default='amazon.titan-embed-text-v1')
+    parser.add_argument('--workers', type=int, default=EMBED_MAX_WORKERS)
+    parser.add_argument('--max-rps', type=float, default=EMBED_MAX_RPS, help='Maximum requests per second')
+    parser.add_argument('--output', default='', help='Save the embeddings from --embed-file as .npy')
     args = parser.parse_args()
 
     if args.get_model_ids:
@@ -647,6 +831,18 @@ if __name__ == '__main__':
         print(get_foundational_model(args.get_fm))
         exit(0)
 
+    if args.embed_file:
+        with open(args.embed_file, 'r') as f:
+            lines = [line.strip() for line in f if line.strip()]
+        t_start = time.perf_counter()
+        embeddings = embed_many(lines, args.embed_model, max_workers=args.workers, max_rps=args.max_rps)
+        elapsed = time.perf_counter() - t_start
+        print(f'Embedded {len(lines)} texts into {embeddings.shape} in {elapsed:.1f}s '
+              f'({len(lines) / elapsed:.1f} texts/s)')
+        if args.output:
+            np.save(args.output, embeddings)
+        exit(0)
+
     prompt = args.prompt
     if prompt:
         if args.model == 'titan-express':
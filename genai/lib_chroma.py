@@ -0,0 +1,215 @@
+#!/usr/bin/env python
+
+# Batched ingestion of text files into a Chroma collection, with Ollama embeddings.
+# - files are read concurrently
+# - chunks are embedded in batches (ollama.embed with a list input), a few batches at a time
+# - chunks are upserted into Chroma in large batches
+# - chunk IDs are content hashes of (file path, chunk text), so IDs are stable
+#   across runs and chunks from different files never overwrite each other
+# - embeddings go through the on-disk embedding cache (lib_embedding_cache.py)
+#
+# pip install chromadb ollama langchain-text-splitters
+#
+# Usage:
+#   python lib_chroma.py --docs "txt/*.txt"
+#   python lib_chroma.py --docs "md/**/*.md" --path chromadb_data/ --collection docs --batch-size 128
+#   python lib_chroma.py --docs "txt/*.txt" --rebuild   # re-embed everything
+#
+# With a manifest (the default from the command line, <path>/<collection>.manifest.json,
+# see lib_manifest.py), only new or changed files are read and chunked, only
+# chunks with new IDs are embedded, and chunks of changed or removed files are
+# deleted. The manifest tracks the whole set of files given, so files that
+# were ingested before but are not given again are removed from the collection.
+# Without a manifest, or when the model or chunking settings change, the
+# collection is dropped and rebuilt, so chunks the manifest does not know about
+# (e.g. from older versions using "0", "1", ... IDs) or with another embedding
+# dimension never stay behind.
+
+import argparse
+import chromadb
+import glob
+import hashlib
+import lib_embedding_cache
+import lib_manifest
+import ollama
+import os
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+
+
+EMBEDDING_MODEL = "mxbai-embed-large"
+CHROMADB_PATH = "chromadb_data/"
+COLLECTION_NAME = "docs"
+CHUNK_SIZE = 1000
+CHUNK_OVERLAP = 100
+
+READ_WORKERS = 16
+EMBED_BATCH_SIZE = 64   # chunks per ollama.embed request
+EMBED_WORKERS = 4       # concurrent embed requests (see OLLAMA_NUM_PARALLEL on the server)
+ADD_BATCH_SIZE = 5000   # chunks per Chroma upsert/delete (Chroma's limit is ~5461 with SQLite)
+
+
+
+def chunk_id(source, text):
+    """Stable ID for a chunk: sha256 of its file path and text."""
+    return hashlib.sha256(f'{source}\0{text}'.encode('utf-8')).hexdigest()
+
+
+def read_file(file):
+    with open(file, "r") as f:
+        return f.read()
+
+
+def read_files(files, workers=READ_WORKERS):
+    """Read files concurrently. Returns [(file, text)] in the order given."""
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(zip(files, executor.map(read_file, files)))
+
+
+def split_file(file, text, text_splitter):
+    """
+    Split a file's content into chunks.
+
+    Returns:
+        list: (id, text, metadata) per chunk; repeated chunks are dropped
+    """
+    chunks = []
+    seen = set()
+    for document in text_splitter.create_documents([text]):
+        chunk_text = document.page_content
+        id = chunk_id(file, chunk_text)
+        if id not in seen:
+            seen.add(id)
+            chunks.append((id, chunk_text, {'source': file}))
+    return chunks
+
+
+def split_files(file_texts, text_splitter):
+    return [chunk for file, text in file_texts for chunk in split_file(file, text, text_splitter)]
+
+
+def manifest_path(chromadb_path, collection_name):
+    return os.path.join(chromadb_path, f'{collection_name}.manifest.json')
+
+
+def embed_texts(texts, model=EMBEDDING_MODEL):
+    """Embed a list of texts with one Ollama request for the ones not in the embedding cache."""
+    return lib_embedding_cache.cached_embed(
+        f'ollama/{model}', texts,
+        lambda missing: ollama.embed(model=model, input=missing)["embeddings"]
+    ).tolist()
+
+
+def embed_batches(texts, model=EMBEDDING_MODEL, batch_size=EMBED_BATCH_SIZE, workers=EMBED_WORKERS):
+    """Embed texts in batches, `workers` requests at a time. Yields one list of embeddings per batch, in order."""
+    batches = [texts[i:i + batch_size] for i in range(0, len(texts), batch_size)]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(lambda batch: embed_texts(batch, model), batches)
+
+
+def add_chunks(collection, chunks, embeddings):
+    collection.upsert(
+        ids=[id for id, _, _ in chunks],
+        embeddings=embeddings,
+        documents=[text for _, text, _ in chunks],
+        metadatas=[metadata for _, _, metadata in chunks]
+    )
+
+
+def add_all(collection, chunks, model=EMBEDDING_MODEL, batch_size=EMBED_BATCH_SIZE,
+            add_batch_size=ADD_BATCH_SIZE, workers=EMBED_WORKERS):
+    """Embed chunks in batches and upsert them as the embeddings come back."""
+    t_start = time.perf_counter()
+    added, pending = 0, []
+    for embeddings in embed_batches([text for _, text, _ in chunks], model, batch_size, workers):
+        pending.extend(embeddings)
+        if len(pending) >= add_batch_size or added + len(pending) == len(chunks):
+            for i in range(0, len(pending), add_batch_size):
+                start = added + i
+                batch = pending[i:i + add_batch_size]
+                add_chunks(collection, chunks[start:start + len(batch)], batch)
+            added += len(pending)
+            pending = []
+            print(f'Added {added}/{len(chunks)} chunks ({time.perf_counter() - t_start:.1f}s)')
+
+
+def delete_all(collection, ids, batch_size=ADD_BATCH_SIZE):
+    for i in range(0, len(ids), batch_size):
+        collection.delete(ids=ids[i:i + batch_size])
+
+
+def recreate_collection(client, collection_name):
+    """Drop a collection and create it again, empty, with the same metadata."""
+    metadata = client.get_or_create_collection(name=collection_name).metadata
+    client.delete_collection(name=collection_name)
+    return client.create_collection(name=collection_name, metadata=metadata or None)
+
+
+def ingest_files(client, collection_name, files, text_splitter, model=EMBEDDING_MODEL,
+                 batch_size=EMBED_BATCH_SIZE, add_batch_size=ADD_BATCH_SIZE, workers=EMBED_WORKERS,
+                 manifest_path=None, rebuild=False):
+    """
+    Read, split, embed and upsert files into a Chroma collection.
+
+    With a manifest_path, only the changes since the last run are applied
+    (see lib_manifest.py). When the manifest calls for a rebuild (no manifest
+    yet, other settings, or rebuild=True) the collection is recreated first.
+
+    Returns:
+        tuple: the collection (a new object if it was recreated), and a dict of
+               files, chunks (embedded), deleted (chunks) and seconds taken
+    """
+    t_start = time.perf_counter()
+    if manifest_path is None:
+        collection = client.get_or_create_collection(name=collection_name)
+        chunks = split_files(read_files(files), text_splitter)
+        print(f'Read {len(files)} files, {len(chunks)} chunks')
+        add_all(collection, chunks, model, batch_size, add_batch_size, workers)
+        return collection, {'files': len(files), 'chunks': len(chunks), 'deleted': 0,
+                            'seconds': time.perf_counter() - t_start}
+
+    settings = {
+        'model': model,
+        'chunk_size': text_splitter._chunk_size,
+        'chunk_overlap': text_splitter._chunk_overlap,
+    }
+    manifest = lib_manifest.IndexManifest(manifest_path, settings, rebuild=rebuild)
+    changes = manifest.diff(files, lambda file: split_file(file, read_file(file), text_splitter))
+    print(lib_manifest.summarize(changes))
+
+    if manifest.rebuild:
+        print(f'Recreating collection {collection_name}')
+        collection = recreate_collection(client, collection_name)
+    else:
+        collection = client.get_or_create_collection(name=collection_name)
+        delete_all(collection, changes['delete_ids'], add_batch_size)
+    add_all(collection, changes['new_chunks'], model, batch_size, add_batch_size, workers)
+    manifest.apply(changes)
+    manifest.save()
+    return collection, {'files': len(changes['entries']), 'chunks': len(changes['new_chunks']),
+                        'deleted': len(changes['delete_ids']), 'seconds': time.perf_counter() - t_start}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--docs', default='txt/*.txt', help='Glob of files to ingest')
+    parser.add_argument('--path', default=CHROMADB_PATH, help='ChromaDB folder')
+    parser.add_argument('--collection', default=COLLECTION_NAME)
+    parser.add_argument('--model', default=EMBEDDING_MODEL, help='Ollama embedding model')
+    parser.add_argument('--batch-size', type=int, default=EMBED_BATCH_SIZE, help='Chunks per embed request')
+    parser.add_argument('--workers', type=int, default=EMBED_WORKERS, help='Concurrent embed requests')
+    parser.add_argument('--rebuild', action='store_true', help='Re-embed all files, ignoring the manifest')
+    parser.add_argument('--no-manifest', action='store_true', help='Upsert all files without tracking changes')
+    args = parser.parse_args()
+
+    client = chromadb.PersistentClient(path=args.path)
+    text_splitter = RecursiveCharacterTextSplitter(chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP)
+    _, stats = ingest_files(client, args.collection, glob.glob(args.docs, recursive=True), text_splitter,
+                         args.model, args.batch_size, workers=args.workers,
+                         manifest_path=None if args.no_manifest else manifest_path(args.path, args.collection),
+                         rebuild=args.rebuild)
+    print(f"Embedded {stats['chunks']} chunks from {stats['files']} files, deleted {stats['deleted']} "
+          f"in {stats['seconds']:.1f}s")
@@ -0,0 +1,256 @@
+#!/usr/bin/env python
+
+# On-disk embedding cache shared by the RAG tools (lib_bedrock, lib_faiss, lib_chroma/streamlit_bedrock).
+#
+# Embeddings are keyed by (model ID, hash of the normalized text): whitespace
+# is collapsed and the text NFC-normalized before hashing, so re-chunking or
+# re-indexing the same text never pays for the same embedding twice.
+#
+# Layout, one set of files per model in EMBEDDING_CACHE_DIR (~/.cache/embedding_cache):
+#   <model>.f16   float16 matrix, one row per embedding, read with np.memmap
+#   <model>.keys  16-byte text hash per row, in the same order (the ID index)
+#   <model>.json  model ID and dimension
+# Both data files are append-only. Appends take an exclusive file lock and
+# write the vectors before their keys, so several processes can share a cache
+# and a crash never leaves a key pointing at a missing row. float16 halves the
+# size of float32 with no practical effect on retrieval.
+#
+# Set EMBEDDING_CACHE=0 to bypass the cache.
+#
+# Usage:
+#   import lib_embedding_cache
+#   vectors = lib_embedding_cache.cached_embed('amazon.titan-embed-text-v1', texts, embed_fn)
+#
+#   python lib_embedding_cache.py --stats
+#   python lib_embedding_cache.py --clear amazon.titan-embed-text-v1
+
+import argparse
+import functools
+import glob
+import hashlib
+import json
+import numpy as np
+import os
+import re
+import threading
+import unicodedata
+
+try:
+    import fcntl
+except ImportError:  # Windows: single process only
+    fcntl = None
+
+
+
+CACHE_DIR = os.getenv('EMBEDDING_CACHE_DIR') or os.path.expanduser('~/.cache/embedding_cache')
+CACHE_ENABLED = os.getenv('EMBEDDING_CACHE', '1') != '0'
+KEY_BYTES = 16
+DTYPE = np.float16
+
+
+
+def normalize_text(text):
+    return unicodedata.normalize('NFC', ' '.join(text.split()))
+
+
+def text_key(text):
+    return hashlib.blake2b(normalize_text(text).encode('utf-8'), digest_size=KEY_BYTES).digest()
+
+
+def model_filename(model):
+    """File name prefix for a model ID, readable but collision-free."""
+    safe = re.sub(r'[^A-Za-z0-9._-]+', '_', model)
+    return f"{safe}-{hashlib.sha1(model.encode('utf-8')).hexdigest()[:8]}"
+
+
+class ModelCache:
+    """Embeddings of one model: an append-only float16 matrix and its key index."""
+
+    def __init__(self, directory, model):
+        prefix = os.path.join(directory, model_filename(model))
+        self.model = model
+        self.data_path = f'{prefix}.f16'
+        self.keys_path = f'{prefix}.keys'
+        self.meta_path = f'{prefix}.json'
+        self.dim = None
+        self.rows = 0
+        self.index = {}
+        self._matrix = None
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._load()
+
+    def _stored_rows(self):
+        if self.dim is None:
+            return 0
+        keys_size = os.path.getsize(self.keys_path) if os.path.exists(self.keys_path) else 0
+        data_size = os.path.getsize(self.data_path) if os.path.exists(self.data_path) else 0
+        return min(keys_size // KEY_BYTES, data_size // (self.dim * np.dtype(DTYPE).itemsize))
+
+    def _load(self):
+        """Index rows appended since the last load, including by other processes."""
+        if self.dim is None and os.path.exists(self.meta_path):
+            with open(self.meta_path, 'r') as f:
+                self.dim = json.load(f)['dim']
+        rows = self._stored_rows()
+        if rows <= self.rows:
+            return
+        with open(self.keys_path, 'rb') as f:
+            f.seek(self.rows * KEY_BYTES)
+            keys = f.read((rows - self.rows) * KEY_BYTES)
+        for i in range(rows - self.rows):
+            self.index.setdefault(keys[i * KEY_BYTES:(i + 1) * KEY_BYTES], self.rows + i)
+        self.rows = rows
+        self._matrix = None
+
+    def _matrix_view(self):
+        if self._matrix is None:
+            self._matrix = np.memmap(self.data_path, dtype=DTYPE, mode='r', shape=(self.rows, self.dim))
+        return self._matrix
+
+    def lookup(self, keys):
+        """Return {key: float32 vector} for the keys that are cached."""
+        with self._lock:
+            if any(key not in self.index for key in keys):
+                self._load()
+            found = [(key, self.index[key]) for key in dict.fromkeys(keys) if key in self.index]
+            if not found:
+                return {}
+            vectors = self._matrix_view()[[row for _, row in found]].astype(np.float32)
+        return {key: vector for (key, _), vector in zip(found, vectors)}
+
+    def put_many(self, keys, vectors):
+        """Append vectors for keys that are not cached yet."""
+        vectors = np.asarray(vectors, dtype=DTYPE)
+        with self._lock, open(self.keys_path, 'ab') as keys_file:
+            if fcntl:
+                fcntl.flock(keys_file, fcntl.LOCK_EX)
+            try:
+                self._load()
+                if self.dim is None:
+                    self.dim = vectors.shape[1]
+                    with open(self.meta_path, 'w') as f:
+                        json.dump({'model': self.model, 'dim': self.dim}, f)
+                elif vectors.shape[1] != self.dim:
+                    raise ValueError(f'{self.model}: expected dimension {self.dim}, got {vectors.shape[1]}')
+
+                new = {}
+                for key, vector in zip(keys, vectors):
+                    if key not in self.index:
+                        new.setdefault(key, vector)
+                if not new:
+                    return
+
+                # Drop any partial row left by an interrupted write, then vectors before keys
+                with open(self.data_path, 'ab') as data_file:
+                    data_file.truncate(self.rows * self.dim * np.dtype(DTYPE).itemsize)
+                    data_file.write(np.stack(list(new.values())).tobytes())
+                    data_file.flush()
+                    os.fsync(data_file.fileno())
+                keys_file.truncate(self.rows * KEY_BYTES)
+                keys_file.write(b''.join(new))
+                keys_file.flush()
+                for i, key in enumerate(new):
+                    self.index[key] = self.rows + i
+                self.rows += len(new)
+                self._matrix = None
+            finally:
+                if fcntl:
+                    fcntl.flock(keys_file, fcntl.LOCK_UN)
+
+
+class EmbeddingCache:
+    """Embedding cache for any number of models, stored in one directory."""
+
+    def __init__(self, directory=CACHE_DIR):
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+        self._models = {}
+        self._lock = threading.Lock()
+
+    def model(self, model):
+        with self._lock:
+            if model not in self._models:
+                self._models[model] = ModelCache(self.directory, model)
+            return self._models[model]
+
+    def embed(self, model, texts, embed_fn):
+        """
+        Embed texts, calling embed_fn only for the ones that are not cached.
+
+        Args:
+            model: model ID, including anything else that changes the vectors
+                   (e.g. an input type)
+            texts: list of strings
+            embed_fn: function(list of texts) -> list of vectors, in order
+
+        Returns:
+            np.ndarray: float32 array of shape (len(texts), dim), in input order
+        """
+        texts = list(texts)
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+        model_cache = self.model(model)
+        keys = [text_key(text) for text in texts]
+        vectors = model_cache.lookup(keys)
+
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in vectors:
+                missing.setdefault(key, text)
+        self.hits += len(texts) - sum(1 for key in keys if key in missing)
+        self.misses += len(missing)
+        if missing:
+            embedded = np.asarray(embed_fn(list(missing.values())), dtype=np.float32)
+            model_cache.put_many(list(missing), embedded)
+            # Round like the stored copies, so hits and misses return the same values
+            vectors.update(zip(missing, embedded.astype(DTYPE).astype(np.float32)))
+        return np.stack([vectors[key] for key in keys])
+
+
+@functools.lru_cache(maxsize=None)
+def get_cache():
+    return EmbeddingCache()
+
+
+def cached_embed(model, texts, embed_fn):
+    """Embed texts through the shared cache. Returns a float32 array in input order."""
+    if not CACHE_ENABLED:
+        return np.asarray(embed_fn(list(texts)), dtype=np.float32)
+    return get_cache().embed(model, texts, embed_fn)
+
+
+def cache_stats(directory=CACHE_DIR):
+    stats = []
+    for meta_path in sorted(glob.glob(os.path.join(directory, '*.json'))):
+        with open(meta_path, 'r') as f:
+            meta = json.load(f)
+        model_cache = ModelCache(directory, meta['model'])
+        size = os.path.getsize(model_cache.data_path) + os.path.getsize(model_cache.keys_path)
+        stats.append({'model': meta['model'], 'dim': meta['dim'], 'rows': model_cache.rows, 'bytes': size})
+    return stats
+
+
+def clear_model(model, directory=CACHE_DIR):
+    model_cache = ModelCache(directory, model)
+    for path in [model_cache.data_path, model_cache.keys_path, model_cache.meta_path]:
+        if os.path.exists(path):
+            os.remove(path)
+
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--dir', default=CACHE_DIR, help='Cache directory')
+    parser.add_argument('--stats', action='store_true', help='List cached models')
+    parser.add_argument('--clear', metavar='MODEL_ID', help='Delete the cache of one model')
+    args = parser.parse_args()
+
+    if args.clear:
+        clear_model(args.clear, args.dir)
+        print(f'Cleared {args.clear}')
+    else:
+        print(f"{'MODEL':50} {'DIM':>6} {'ROWS':>10} {'SIZE (MB)':>10}")
+        for s in cache_stats(args.dir):
+            print(f"{s['model']:50} {s['dim']:6d} {s['rows']:10d} {s['bytes'] / 1024 / 1024:10.1f}")
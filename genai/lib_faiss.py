@@ -5,19 +5,24 @@
 import argparse
 import boto3
 import glob
+import hashlib
 import html2text
 import json
+import lib_embedding_cache
+import lib_manifest
 import os
 import re
 import requests
 import tiktoken
 import time
 
+from langchain.docstore.document import Document
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 
 from langchain_community.document_loaders import DirectoryLoader, TextLoader, UnstructuredMarkdownLoader
 from langchain_community.embeddings import BedrockEmbeddings, SagemakerEndpointEmbeddings
 from langchain_community.vectorstores import FAISS
+from langchain_core.embeddings import Embeddings
 
 from langchain.embeddings.openai import OpenAIEmbeddings
 from langchain.embeddings.sagemaker_endpoint import EmbeddingsContentHandler
@@ -30,6 +35,9 @@ from tqdm.contrib.concurrent import process_map
 
 
 BEDROCK_REGION = 'us-west-2'
+CHUNK_SIZE = 1000
+CHUNK_OVERLAP = 300
+MANIFEST_FILE = 'manifest.json'  # kept in the vector store folder
 
 # ----- Setup Bedrock -----
 bedrock = boto3.client(
@@ -110,8 +118,8 @@ def load_folder_as_doc(folder, extension='md'):
     documents = loader.load()
 
     text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size = 1000,
-        chunk_overlap  = 300,
+        chunk_size = CHUNK_SIZE,
+        chunk_overlap  = CHUNK_OVERLAP,
     )
     docs = text_splitter.split_documents(documents)
 
@@ -127,6 +135,100 @@ def load_folder_as_doc(folder, extension='md'):
     return docs
 
 
+# ----- Cached Embeddings -----
+class CachedEmbeddings(Embeddings):
+    """
+    Wraps a LangChain embeddings model so every text goes through the
+    on-disk embedding cache (see lib_embedding_cache.py). Queries are cached
+    separately, as some models embed queries and documents differently.
+    """
+
+    def __init__(self, embeddings, model_id):
+        self.embeddings = embeddings
+        self.model_id = model_id
+
+    def embed_documents(self, texts):
+        return lib_embedding_cache.cached_embed(self.model_id, texts, self.embeddings.embed_documents).tolist()
+
+    def embed_query(self, text):
+        return lib_embedding_cache.cached_embed(
+            f'{self.model_id}:query', [text],
+            lambda texts: [self.embeddings.embed_query(texts[0])]
+        )[0].tolist()
+
+
+
+# ----- Incremental Vector Store -----
+def load_file_chunks(file):
+    """Load and split one markdown file. Returns [(id, text, metadata)] with content-hash IDs."""
+    text_splitter = RecursiveCharacterTextSplitter(
+        chunk_size = CHUNK_SIZE,
+        chunk_overlap  = CHUNK_OVERLAP,
+    )
+    chunks = {}
+    for doc in text_splitter.split_documents(UnstructuredMarkdownLoader(file).load()):
+        id = hashlib.sha256(f'{file}\0{doc.page_content}'.encode('utf-8')).hexdigest()
+        chunks.setdefault(id, (id, doc.page_content, doc.metadata))
+    return list(chunks.values())
+
+
+def update_vector_store(folder, vector_store, embeddings, embeddings_name, extension='md', rebuild=False):
+    """
+    Bring a FAISS vector store in line with the files in a folder.
+
+    A manifest in the vector store folder records the files, their content
+    hashes and chunk IDs (see lib_manifest.py), so only chunks of new or
+    changed files are embedded, and chunks of changed or removed files are
+    deleted from the index. The whole store is rebuilt if there is no
+    manifest, the embeddings or chunking settings changed, or rebuild=True.
+    """
+    settings = {'embeddings': embeddings_name, 'chunk_size': CHUNK_SIZE, 'chunk_overlap': CHUNK_OVERLAP}
+    index_exists = os.path.isfile(os.path.join(vector_store, 'index.faiss'))
+    manifest = lib_manifest.IndexManifest(
+        os.path.join(vector_store, MANIFEST_FILE), settings, rebuild=rebuild or not index_exists)
+    changes = manifest.diff(glob.glob(f'{folder}/*.{extension}'), load_file_chunks)
+    print(lib_manifest.summarize(changes))
+
+    vectorstore = None
+    if not changes['new_chunks'] and not changes['delete_ids'] and not manifest.rebuild:
+        # Nothing to embed or delete, at most some mtimes changed
+        manifest.apply(changes)
+        manifest.save()
+        return vectorstore
+
+    if not manifest.rebuild:
+        vectorstore = FAISS.load_local(vector_store, embeddings, allow_dangerous_deserialization=True)
+        # A previous run may have stopped after saving the index but before the manifest
+        stored_ids = set(vectorstore.index_to_docstore_id.values())
+        delete_ids = set(changes['delete_ids']) | {id for id, _, _ in changes['new_chunks']}
+        delete_ids &= stored_ids
+        if delete_ids:
+            vectorstore.delete(ids=list(delete_ids))
+
+    new_chunks = changes['new_chunks']
+    if new_chunks:
+        t_start = time.perf_counter()
+        docs = [Document(page_content=text, metadata=metadata) for _, text, metadata in new_chunks]
+        ids = [id for id, _, _ in new_chunks]
+        if vectorstore is None:
+            vectorstore = FAISS.from_documents(docs, embeddings, ids=ids)
+        else:
+            vectorstore.add_documents(docs, ids=ids)
+        print(f'Embedded {len(new_chunks)} chunks in {time.perf_counter() - t_start:.1f}s')
+
+    if vectorstore is not None:
+        os.makedirs(vector_store, exist_ok=True)
+        vectorstore.save_local(vector_store)
+    elif index_exists:
+        # Rebuilt from no documents at all
+        for name in ['index.faiss', 'index.pkl']:
+            os.remove(os.path.join(vector_store, name))
+    manifest.apply(changes)
+    manifest.save()
+    return vectorstore
+
+
+
 # ----- Count Tokens -----
 def count_tokens(folder):
     """
@@ -151,36 +253,32 @@ if __name__ == '__main__':
     parser.add_argument('-e', '--embeddings', default='titan', help='Embeddings')
     parser.add_argument('--count_tokens', action='store_true')
     parser.add_argument('--html2markdown', action='store_true')
+    parser.add_argument('--rebuild', action='store_true', help='Re-embed all documents instead of only the changed ones')
     args = parser.parse_args()
 
     if args.embeddings == 'openai':
         embeddings = OpenAIEmbeddings()
+        model_id = f'openai/{embeddings.model}'
     elif args.embeddings == 'titan':
+        model_id = "amazon.titan-embed-text-v1"
         embeddings = BedrockEmbeddings(
-            model_id="amazon.titan-embed-text-v1",
+            model_id=model_id,
             client=bedrock
         )
     elif args.embeddings == 'cohere':
+        model_id = "cohere.embed-english-v3"
         embeddings = BedrockEmbeddings(
-            model_id="cohere.embed-english-v3",
+            model_id=model_id,
             client=bedrock
         )
     else:
         embeddings = OpenAIEmbeddings()
+        model_id = f'openai/{embeddings.model}'
+    embeddings = CachedEmbeddings(embeddings, model_id)
 
     if args.vector_store:
-        print(f'Loading docs from folder {args.folder}.....')
-        docs = load_folder_as_doc(args.folder)
-
-        print(f'\nGenerating embeddings for vector store.....')
-        t_start = time.process_time()
-        vectorstore = FAISS.from_documents(docs, embeddings)
-        print(f'Time elapsed: {time.process_time() - t_start}')
-
-        print(f'\nSaving vector store..... (folder = {args.vector_store})')
-        if not os.path.isdir(args.vector_store):
-            os.mkdir(args.vector_store)
-        vectorstore.save_local(args.vector_store)
+        print(f'Updating vector store {args.vector_store} from folder {args.folder}.....')
+        update_vector_store(args.folder, args.vector_store, embeddings, args.embeddings, rebuild=args.rebuild)
 
     if args.count_tokens:
         count_tokens(args.folder)
@@ -191,3 +289,4 @@ if __name__ == '__main__':
     # python lib_faiss.py --f md -e openai -v faiss_index_openai  # Requires OPEN_API_KEY
     # python lib_faiss.py --f md -e titan -v faiss_index_titan
     # python lib_faiss.py --f md -e cohere -v faiss_index_cohere
+    # python lib_faiss.py --f md -e titan -v faiss_index_titan --rebuild  # re-embed everything
@@ -0,0 +1,161 @@
+#!/usr/bin/env python
+
+# Content manifest for incremental vector index updates.
+#
+# The manifest is a JSON file kept next to an index. It records, per source
+# file, the mtime/size, the sha256 of its content and the IDs of the chunks
+# it produced, plus the settings the index was built with (embedding model,
+# chunk size, ...). Comparing it with the files on disk gives:
+# - files whose mtime/size are unchanged: skipped without reading them
+# - files that were touched but have the same content: only the mtime is updated
+# - new or changed files: re-chunked; only chunks with new IDs need embedding,
+#   and chunk IDs that disappeared need deleting
+# - files that are gone: all their chunk IDs need deleting
+# If the settings differ from the ones in the manifest, everything is rebuilt.
+#
+# Used by lib_chroma.py and lib_faiss.py.
+#
+# Usage:
+#   python lib_manifest.py chromadb_data/docs.manifest.json   # summary of a manifest
+
+import argparse
+import hashlib
+import json
+import os
+
+from concurrent.futures import ThreadPoolExecutor
+
+
+
+MANIFEST_VERSION = 1
+READ_WORKERS = 16
+
+
+
+def file_sha256(path):
+    sha256 = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            sha256.update(block)
+    return sha256.hexdigest()
+
+
+class IndexManifest:
+    """
+    Files, content hashes and chunk IDs of a vector index.
+
+    If there is no manifest yet, or it was written with different settings
+    (or rebuild=True), it starts empty and `rebuild` is set. The index may then
+    hold entries the manifest never tracked, or vectors of another dimension,
+    so callers should rebuild it from scratch rather than update it; the IDs
+    the manifest used to track are still kept in `previous_ids`.
+    """
+
+    def __init__(self, path, settings=None, rebuild=False):
+        self.path = path
+        self.settings = settings or {}
+        self.files = {}
+        self.previous_ids = set()
+        self.rebuild = rebuild
+
+        if os.path.isfile(path):
+            with open(path, 'r') as f:
+                data = json.load(f)
+            if data.get('version') != MANIFEST_VERSION or data.get('settings') != self.settings:
+                self.rebuild = True
+            if self.rebuild:
+                self.previous_ids = {id for entry in data['files'].values() for id in entry['chunk_ids']}
+            else:
+                self.files = data['files']
+        else:
+            self.rebuild = True
+
+    def diff(self, files, load_chunks, workers=READ_WORKERS):
+        """
+        Compare files on disk with the manifest.
+
+        Args:
+            files: paths of all the files the index should contain
+            load_chunks: function(path) -> [(id, text, metadata)] for one file
+
+        Returns:
+            dict: new_chunks (to embed and add), delete_ids, entries (manifest
+                  entries to update), removed (files gone), unchanged (count)
+        """
+        files = sorted(set(files))
+
+        def check(file):
+            stat = os.stat(file)
+            entry = self.files.get(file)
+            if entry and entry['mtime_ns'] == stat.st_mtime_ns and entry['size'] == stat.st_size:
+                return file, None, None
+            sha256 = file_sha256(file)
+            new_entry = {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size, 'sha256': sha256}
+            if entry and entry['sha256'] == sha256:
+                return file, dict(entry, **new_entry), None
+            chunks = load_chunks(file)
+            new_entry['chunk_ids'] = [id for id, _, _ in chunks]
+            return file, new_entry, chunks
+
+        changes = {'new_chunks': [], 'delete_ids': set(self.previous_ids), 'entries': {}, 'removed': [], 'unchanged': 0}
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for file, entry, chunks in executor.map(check, files):
+                if entry is None:
+                    changes['unchanged'] += 1
+                    continue
+                changes['entries'][file] = entry
+                if chunks is None:
+                    continue
+                old_ids = set(self.files.get(file, {}).get('chunk_ids', []))
+                changes['new_chunks'].extend(chunk for chunk in chunks if chunk[0] not in old_ids)
+                changes['delete_ids'].update(old_ids - set(entry['chunk_ids']))
+
+        present = set(files)
+        for file, entry in self.files.items():
+            if file not in present:
+                changes['removed'].append(file)
+                changes['delete_ids'].update(entry['chunk_ids'])
+
+        # Chunk IDs include the file path, so deletes and adds never overlap,
+        # except on a rebuild: callers delete before adding
+        changes['delete_ids'] = sorted(changes['delete_ids'])
+        return changes
+
+    def apply(self, changes):
+        """Record changes once they have been written to the index."""
+        self.files.update(changes['entries'])
+        for file in changes['removed']:
+            self.files.pop(file, None)
+        self.previous_ids = set()
+        self.rebuild = False
+
+    def save(self):
+        """Write the manifest atomically."""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f'{self.path}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'version': MANIFEST_VERSION, 'settings': self.settings, 'files': self.files}, f)
+        os.replace(tmp_path, self.path)
+
+    def chunk_count(self):
+        return sum(len(entry['chunk_ids']) for entry in self.files.values())
+
+
+def summarize(changes):
+    return (f"{len(changes['entries'])} new/changed files, {len(changes['removed'])} removed, "
+            f"{changes['unchanged']} unchanged; {len(changes['new_chunks'])} chunks to embed, "
+            f"{len(changes['delete_ids'])} to delete")
+
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('manifest', help='Manifest JSON file')
+    args = parser.parse_args()
+
+    with open(args.manifest, 'r') as f:
+        data = json.load(f)
+    print(f"Settings: {data['settings']}")
+    print(f"Files: {len(data['files'])}, chunks: {sum(len(e['chunk_ids']) for e in data['files'].values())}")
@@ -9,7 +9,7 @@
 #   streamlit run streamlit_bedrock.py --server.port 8080 --server.runOnSave true
 
 # Dependencies
-#   pip install chromadb ollama
+#   pip install chromadb ollama langchain-text-splitters
 #   export HNSWLIB_NO_NATIVE=1; pip install chromadb  # for Mac OS
 #   ollama pull mxbai-embed-large
 #   ollama pull llava
@@ -20,6 +20,7 @@ import argparse
 import chromadb
 import glob
 import json
+import lib_chroma
 import ollama
 import os
 import streamlit as st
@@ -152,35 +153,23 @@ except Exception as e:
 
 
 
-def init_vectordb(doc_list="txt/*.txt"):
+def init_vectordb(doc_list="txt/*.txt", rebuild=False):
     global collection
-
-    for file in glob.glob(doc_list):
-        with open(file, "r") as f:
-            doc = f.read()
-
-        # Use Langchain to split into chunks
-        documents = text_splitter.create_documents([doc])
-        for i, chunk in enumerate(documents):
-            chunk_text = chunk.page_content
-            print(f'\n----- {i} -----\n{chunk_text}\n')
-            response = ollama.embeddings(
-                model=EMBEDDING_MODEL,
-                prompt=chunk_text
-            )
-            collection.add(
-                ids=[str(i)],
-                embeddings=[
-                    response["embedding"]
-                ],
-                documents=[chunk_text]
-            )
+    # Files are read concurrently, chunks embedded in batches and upserted
+    # with content-hash IDs. Only changes since the last run are embedded,
+    # using the manifest next to the collection (see lib_chroma.py)
+    # The collection is recreated on a rebuild, so keep the one returned
+    collection, stats = lib_chroma.ingest_files(
+        client, COLLECTION_NAME, glob.glob(doc_list), text_splitter, model=EMBEDDING_MODEL,
+        manifest_path=lib_chroma.manifest_path(CHROMADB_PATH, COLLECTION_NAME),
+        rebuild=rebuild
+    )
+    print(f"Embedded {stats['chunks']} chunks from {stats['files']} files, deleted {stats['deleted']} "
+          f"in {stats['seconds']:.1f}s")
 
 def query_collection(query, n_results=5):
-    embedding = ollama.embeddings(
-        prompt=query,
-        model=EMBEDDING_MODEL
-    )["embedding"]
+    # Same endpoint as the documents (ollama.embed), and cached for repeated queries
+    embedding = lib_chroma.embed_texts([query], EMBEDDING_MODEL)[0]
     results = collection.query(
         query_embeddings=[embedding],
         n_results=n_results
@@ -453,11 +442,12 @@ def main():
 if __name__ == '__main__':
     parser = argparse.ArgumentParser()
     parser.add_argument('--init', action='store_true', help="Initialize the vector database")
+    parser.add_argument('--rebuild', action='store_true', help="With --init, re-embed all documents")
     parser.add_argument('--query', type=str, default='', help="Query the vector database")
     args = parser.parse_args()
 
     if args.init:
-        init_vectordb()
+        init_vectordb(rebuild=args.rebuild)
     elif args.query:
         result = query_collection(args.query)
         print(result)